@@ -78,6 +78,8 @@ class MultiWorld():
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
+    sphere_analysis: Optional[SphereAnalysis]
+    """Analysis of the finished fill, shared by the output steps. None while items can still be placed."""
 
     plando_options: PlandoOptions
     early_items: Dict[int, Dict[str, int]]
@@ -168,6 +170,7 @@ class MultiWorld():
         self.indirect_connections = {}
         self.start_inventory_from_pool: Dict[int, Options.StartInventoryPool] = {}
         self.plando_item_blocks = {}
+        self.sphere_analysis = None
 
         for player in range(1, players + 1):
             def set_player_attr(attr: str, val) -> None:
@@ -564,6 +567,9 @@ class MultiWorld():
     def can_beat_game(self,
                       starting_state: Optional[CollectionState] = None,
                       locations: Optional[Iterable[Location]] = None) -> bool:
+        if starting_state is None and locations is None and self.sphere_analysis:
+            return self.sphere_analysis.beaten_at is not None
+
         if starting_state:
             if self.has_beaten_game(starting_state):
                 return True
@@ -581,6 +587,10 @@ class MultiWorld():
 
         return False
 
+    def get_sphere_analysis(self) -> SphereAnalysis:
+        """Returns the shared sphere analysis if the fill is done, otherwise analyzes the current fill."""
+        return self.sphere_analysis or SphereAnalysis(self)
+
     def get_spheres(self) -> Iterator[Set[Location]]:
         """
         yields a set of locations for each logical sphere
@@ -589,25 +599,18 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
         locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
+        for sphere in self.get_sphere_analysis().spheres:
+            sphere = {location for location in locations if location in sphere}
             if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
                 break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
+            yield sphere
             locations -= sphere
 
+        if locations:
+            yield set()
+            yield locations  # unreachable locations
+
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
         yields a set of multiserver sendable locations (location.item.code: int) for each logical sphere
@@ -615,46 +618,15 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
-        state = CollectionState(self)
-        locations: Set[Location] = set()
-        events: Set[Location] = set()
-        for location in self.get_filled_locations():
-            if type(location.item.code) is int and type(location.address) is int:
-                locations.add(location)
-            else:
-                events.add(location)
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
+        spheres, unreachable = self.get_sphere_analysis().sendable_spheres
+        yield from spheres
 
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        if unreachable:
+            yield set()
+            yield unreachable
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -683,36 +655,144 @@ class MultiWorld():
             return True
 
         locations = [location for location in self.get_locations() if location_relevant(location)]
+        if not locations:
+            return False
 
-        while locations:
-            sphere: List[Location] = []
-            for n in range(len(locations) - 1, -1, -1):
-                if locations[n].can_reach(state):
-                    sphere.append(locations.pop(n))
+        if state:
+            while locations:
+                sphere: List[Location] = []
+                for n in range(len(locations) - 1, -1, -1):
+                    if locations[n].can_reach(state):
+                        sphere.append(locations.pop(n))
+
+                if not sphere:
+                    break
+
+                for location in sphere:
+                    if location.item:
+                        state.collect(location.item, True, location)
+
+                if self.has_beaten_game(state):
+                    beatable_fulfilled = True
+
+                if all_done():
+                    return True
+        else:
+            # sweeping only the relevant locations reaches the same spheres, as no other location holds advancements
+            analysis = self.get_sphere_analysis()
+            locations = [location for location in locations if location in analysis.unreachable]
+            beatable_fulfilled = analysis.beaten_at is not None
+            if all_done():
+                return True
+
+        if locations:
+            if __debug__:
+                from Fill import FillError
+                raise FillError(
+                    f"Could not access required locations for accessibility check. Missing: {locations}",
+                    multiworld=self,
+                )
+            # ran out of places and did not finish yet, quit
+            logging.warning(f"Could not access required locations for accessibility check."
+                            f" Missing: {locations}")
+        return False
+
+
+class SphereAnalysis:
+    """Logical spheres of all locations of a multiworld, from a single sweep starting with a new CollectionState.
+
+    Each sphere contains all locations, filled or not, that are reachable with the items of all previous spheres.
+    Once the fill is done, one analysis is kept in MultiWorld.sphere_analysis, so that get_spheres,
+    get_sendable_spheres, fulfills_accessibility, can_beat_game and the spoiler playthrough don't re-sweep.
+    """
+    multiworld: MultiWorld
+    spheres: List[Set[Location]]
+    states: List[CollectionState]
+    """Collected state before each sphere, followed by the state after the last sphere. Must not be modified."""
+    unreachable: Set[Location]
+    beaten_at: Optional[int]
+    """Index in states of the first state that beats the game, None if it can't be beaten."""
+    _sendable_spheres: Optional[Tuple[List[Set[Location]], Set[Location]]]
+
+    def __init__(self, multiworld: MultiWorld):
+        self.multiworld = multiworld
+        self.spheres = []
+        self._sendable_spheres = None
 
+        state = CollectionState(multiworld)
+        self.states = [state.copy()]
+        self.beaten_at = 0 if multiworld.has_beaten_game(state) else None
+        locations = set(multiworld.get_locations())
+        while locations:
+            sphere = {location for location in locations if location.can_reach(state)}
             if not sphere:
-                if __debug__:
-                    from Fill import FillError
-                    raise FillError(
-                        f"Could not access required locations for accessibility check. Missing: {locations}",
-                        multiworld=self,
-                    )
-                # ran out of places and did not finish yet, quit
-                logging.warning(f"Could not access required locations for accessibility check."
-                                f" Missing: {locations}")
-                return False
+                break
 
             for location in sphere:
                 if location.item:
                     state.collect(location.item, True, location)
+            locations -= sphere
+            self.spheres.append(sphere)
+            self.states.append(state.copy())
+            if self.beaten_at is None and multiworld.has_beaten_game(state):
+                self.beaten_at = len(self.spheres)
+        self.unreachable = locations
 
-            if self.has_beaten_game(state):
-                beatable_fulfilled = True
+    @property
+    def final_state(self) -> CollectionState:
+        """State with the items of all reachable locations collected."""
+        return self.states[-1]
 
-            if all_done():
-                return True
+    @property
+    def sendable_spheres(self) -> Tuple[List[Set[Location]], Set[Location]]:
+        """
+        Spheres of multiserver sendable locations (location.item.code: int) and the unreachable sendable locations.
+        The sets are shared between all callers and must not be modified.
 
-        return False
+        These are computed separately on first access, as event locations are collected as soon as they are reachable
+        instead of counting as a sphere of their own.
+        """
+        if self._sendable_spheres is None:
+            self._sendable_spheres = self._get_sendable_spheres()
+        return self._sendable_spheres
+
+    def _get_sendable_spheres(self) -> Tuple[List[Set[Location]], Set[Location]]:
+        state = CollectionState(self.multiworld)
+        locations: Set[Location] = set()
+        events: Set[Location] = set()
+        for location in self.multiworld.get_filled_locations():
+            if type(location.item.code) is int and type(location.address) is int:
+                locations.add(location)
+            else:
+                events.add(location)
+
+        spheres: List[Set[Location]] = []
+        while locations:
+            sphere: Set[Location] = set()
+
+            # cull events out
+            done_events: Set[Union[Location, None]] = {None}
+            while done_events:
+                done_events = set()
+                for event in events:
+                    if event.can_reach(state):
+                        state.collect(event.item, True, event)
+                        done_events.add(event)
+                events -= done_events
+
+            for location in locations:
+                if location.can_reach(state):
+                    sphere.add(location)
+
+            if not sphere:
+                break
+            spheres.append(sphere)
+
+            for location in sphere:
+                state.collect(location.item, True, location)
+            locations -= sphere
+
+        return spheres, locations
 
 
 PathValue = Tuple[str, Optional["PathValue"]]
@@ -728,6 +808,8 @@ class CollectionState():
     locations_checked: Set[Location]
     stale: Dict[int, bool]
     allow_partial_entrances: bool
+    _shared_players: Set[int]
+    """players whose per-player containers may still be referenced by a copy of this state, see copy()"""
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
@@ -742,6 +824,7 @@ class CollectionState():
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
         self.allow_partial_entrances = allow_partial_entrances
+        self._shared_players = set()
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
@@ -749,6 +832,8 @@ class CollectionState():
                 self.collect(item, True)
 
     def update_reachable_regions(self, player: int):
+        if player in self._shared_players:
+            self.detach_player(player)
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
@@ -816,20 +901,39 @@ class CollectionState():
             queue.extend(blocked_connections)
 
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        """
+        Returns a copy of this state.
+
+        The per-player containers (prog_items, reachable_regions, blocked_connections) are shared copy-on-write between
+        both states, so copying is cheap and only players that change afterward are cloned.
+        Code that mutates these containers outside of collect/remove/add_item/remove_item/set_item has to
+        call detach_player first.
+        """
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        ret.prog_items = self.prog_items.copy()
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        ret.stale = self.stale.copy()
         ret.allow_partial_entrances = self.allow_partial_entrances
+        self._shared_players = set(self.prog_items)
+        ret._shared_players = set(self.prog_items)
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
 
+    def detach_player(self, player: int) -> None:
+        """Clone the containers of a player that are shared with a copy of this state, before mutating them."""
+        self._shared_players.discard(player)
+        self.prog_items[player] = self.prog_items[player].copy()
+        self.reachable_regions[player] = self.reachable_regions[player].copy()
+        self.blocked_connections[player] = self.blocked_connections[player].copy()
+
     def can_reach(self,
                   spot: Union[Location, Entrance, Region, str],
                   resolution_hint: Optional[str] = None,
@@ -1112,6 +1216,8 @@ class CollectionState():
     def collect(self, item: Item, prevent_sweep: bool = False, location: Optional[Location] = None) -> bool:
         if location:
             self.locations_checked.add(location)
+        if item.player in self._shared_players:
+            self.detach_player(item.player)
 
         changed = self.multiworld.worlds[item.player].collect(self, item)
 
@@ -1131,9 +1237,14 @@ class CollectionState():
         :param count: How many of the item to add.
         """
         assert count > 0
+        if player in self._shared_players:
+            self.detach_player(player)
         self.prog_items[player][item] += count
+        self.stale[player] = True
 
     def remove(self, item: Item):
+        if item.player in self._shared_players:
+            self.detach_player(item.player)
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
             # invalidate caches, nothing can be trusted anymore now
@@ -1150,6 +1261,8 @@ class CollectionState():
         :param count: How many of the item to remove.
         """
         assert count > 0
+        if player in self._shared_players:
+            self.detach_player(player)
         self.prog_items[player][item] -= count
         if self.prog_items[player][item] < 1:
             del (self.prog_items[player][item])
@@ -1163,10 +1276,13 @@ class CollectionState():
         :param count: How many of the item to now have.
         """
         assert count >= 0
+        if player in self._shared_players:
+            self.detach_player(player)
         if count == 0:
             del (self.prog_items[player][item])
         else:
             self.prog_items[player][item] = count
+            self.stale[player] = True
 
 
 class EntranceType(IntEnum):
@@ -1695,39 +1811,34 @@ class Spoiler:
         # get locations containing progress items
         multiworld = self.multiworld
         prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
-        state_cache: List[Optional[CollectionState]] = [None]
+        analysis = multiworld.get_sphere_analysis()
+        state_cache: List[CollectionState] = []
         collection_spheres: List[Set[Location]] = []
-        state = CollectionState(multiworld)
         sphere_candidates = set(prog_locations)
         logging.debug('Building up collection spheres.')
-        while sphere_candidates:
-
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-
+        # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres.
+        # Locations without advancement items don't change the state, so the analysis has the same spheres.
+        for state, sphere in zip(analysis.states, analysis.spheres):
+            if not sphere_candidates:
+                break
+            sphere = {location for location in sphere_candidates if location in sphere}
             sphere_candidates -= sphere
             collection_spheres.append(sphere)
-            state_cache.append(state.copy())
+            state_cache.append(state)
 
             logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
                           len(sphere),
                           len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if not multiworld.has_beaten_game(state):
-                    raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
-                                       "Something went terribly wrong here. "
-                                       f"Unreachable progression items: {sphere_candidates}")
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+        if sphere_candidates:
+            logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
+                location.item.name, location.item.player, location.name, location.player) for location in
+                                                                           sphere_candidates])
+            if analysis.beaten_at is None:
+                raise RuntimeError("During playthrough generation, the game was determined to be unbeatable. "
+                                   "Something went terribly wrong here. "
+                                   f"Unreachable progression items: {sphere_candidates}")
+            else:
+                self.unreachables = sphere_candidates
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
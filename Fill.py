@@ -1,13 +1,15 @@
 import collections
+import heapq
 import itertools
 import logging
+import time
 import typing
 from collections import Counter, deque
 
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock
 from Options import Accessibility
 
-from worlds.AutoWorld import call_all
+from worlds.AutoWorld import call_all, perf_logger
 from worlds.generic.Rules import add_item_rule
 
 
@@ -24,6 +26,106 @@ def _log_fill_progress(name: str, placed: int, total_items: int) -> None:
     logging.info(f"Current fill step ({name}) at {placed}/{total_items} items placed.")
 
 
+class _LocationPool:
+    """
+    Unfilled locations of a fill step, bucketed by player, progress type and item rule, so that whole buckets can be
+    skipped for an item. Keeps the order of the original list, so the same spots get picked as with a linear scan.
+    """
+    _BucketKey = typing.Tuple[int, LocationProgressType, typing.Optional[typing.Callable[[Item], bool]], bool]
+
+    locations: typing.Dict[int, Location]
+    """all locations still in the pool, by their index in the original list"""
+    buckets: typing.Dict[_BucketKey, typing.Dict[int, Location]]
+    bucket_of: typing.Dict[int, _BucketKey]
+    reachable: typing.Dict[Location, bool]
+    """cached Location.can_reach results for reachability_state"""
+    reachability_state: typing.Optional[CollectionState] = None
+
+    _ACCESS = 0
+    _ITEM_RULE = 1
+    _CAN_FILL = 2
+
+    def __init__(self, locations: typing.Iterable[Location]) -> None:
+        self.locations = dict(enumerate(locations))
+        self.buckets = {}
+        self.bucket_of = {}
+        self.reachable = {}
+        for index, location in self.locations.items():
+            location_type = type(location)
+            # only locations that neither override can_fill nor always_allow can be judged by their bucket alone
+            simple = location_type.can_fill is Location.can_fill and location_type.always_allow is \
+                Location.always_allow and "always_allow" not in location.__dict__
+            # an item_rule that is not set on the instance is shared by every location of that type
+            item_rule = location_type.item_rule if simple and "item_rule" not in location.__dict__ else None
+            key = (location.player, location.progress_type, item_rule, simple)
+            self.buckets.setdefault(key, {})[index] = location
+            self.bucket_of[index] = key
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def remove(self, index: int) -> Location:
+        key = self.bucket_of.pop(index)
+        bucket = self.buckets[key]
+        del bucket[index]
+        if not bucket:
+            del self.buckets[key]
+        return self.locations.pop(index)
+
+    def remaining(self) -> typing.List[Location]:
+        return list(self.locations.values())
+
+    def can_reach(self, location: Location, state: CollectionState) -> bool:
+        if state is not self.reachability_state:
+            self.reachability_state = state
+            self.reachable = {}
+        reachable = self.reachable.get(location)
+        if reachable is None:
+            reachable = self.reachable[location] = location.can_reach(state)
+        return reachable
+
+    def find_spot(self, state: CollectionState, item: Item, check_access: bool,
+                  single_player_placement: bool) -> typing.Optional[int]:
+        """
+        Returns the index of the first location in the pool that can be filled with item, or None.
+
+        state must not change between calls, as long as it is the same object; can_reach results are cached for it.
+        """
+        relevant_items = item.advancement or item.useful
+        # per bucket, which checks are left to do for each of its locations
+        checks: typing.Dict[_LocationPool._BucketKey, int] = {}
+        for key in self.buckets:
+            player, progress_type, item_rule, simple = key
+            if single_player_placement and player != item.player:
+                continue
+            if not simple:
+                checks[key] = self._CAN_FILL
+            elif progress_type == LocationProgressType.EXCLUDED and relevant_items:
+                continue
+            elif item_rule is None:
+                checks[key] = self._ITEM_RULE
+            elif item_rule(item):
+                checks[key] = self._ACCESS
+        if not checks:
+            return None
+
+        candidates: typing.Iterable[typing.Tuple[int, Location]]
+        if len(checks) == 1:
+            candidates = self.buckets[next(iter(checks))].items()
+        else:
+            candidates = heapq.merge(*(self.buckets[key].items() for key in checks))
+        bucket_of = self.bucket_of
+        for index, location in candidates:
+            check = checks[bucket_of[index]]
+            if check == self._CAN_FILL:
+                if location.can_fill(state, item, check_access):
+                    return index
+            elif (check == self._ACCESS or location.item_rule(item)) and \
+                    (not check_access or self.can_reach(location, state)):
+                return index
+        return None
+
+
 def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item] = tuple(),
                     locations: typing.Optional[typing.List[Location]] = None) -> CollectionState:
     new_state = base_state.copy()
@@ -51,6 +153,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     :param allow_excluded: if true and placement fails, it is re-attempted while ignoring excluded on Locations
     :param name: name of this fill step for progress logging purposes
     """
+    start = time.perf_counter()
     unplaced_items: typing.List[Item] = []
     placements: typing.List[Location] = []
     cleanup_required = False
@@ -58,12 +161,13 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     reachable_items: typing.Dict[int, typing.Deque[Item]] = {}
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
+    location_pool = _LocationPool(locations)
 
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
 
-    while any(reachable_items.values()) and locations:
+    while any(reachable_items.values()) and location_pool:
         if one_item_per_player:
             # grab one item per player
             items_to_place = [items.pop()
@@ -90,12 +194,13 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not location_pool:
                 unplaced_items += items_to_place
                 break
             item_to_place = items_to_place.pop(0)
 
             spot_to_fill: typing.Optional[Location] = None
+            spot_index: typing.Optional[int]
 
             # if minimal accessibility, only check whether location is reachable if game not beatable
             if multiworld.worlds[item_to_place.player].options.accessibility == Accessibility.option_minimal:
@@ -105,14 +210,10 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
+            spot_index = location_pool.find_spot(maximum_exploration_state, item_to_place, perform_access_check,
+                                                 single_player_placement)
+            if spot_index is not None:
+                spot_to_fill = location_pool.remove(spot_index)
             else:
                 # we filled all reachable spots.
                 if swap:
@@ -209,6 +310,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
+    locations[:] = location_pool.remaining()
+    del location_pool
+
     if cleanup_required:
         # validate all placements and remove invalid ones
         state = sweep_from_pool(
@@ -253,6 +357,10 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
     item_pool.extend(unplaced_items)
 
+    taken = time.perf_counter() - start
+    perf_logger.log(logging.INFO if taken > 1.0 else logging.DEBUG,
+                    f"Took {taken:.4f} seconds in fill step ({name}), placing {placed}/{total} items.")
+
 
 def remaining_fill(multiworld: MultiWorld,
                    locations: typing.List[Location],
@@ -730,6 +838,92 @@ def flood_items(multiworld: MultiWorld) -> None:
                 break
 
 
+class _ReachabilityIndex:
+    """
+    The spheres progression balancing finds from one of its spheres on, as long as no items get swapped.
+    Records for each location the sphere it first became reachable in, so that the spheres walked ahead while looking
+    for items to swap are reused by the spheres that follow, and sweeps over them can visit locations in that order.
+    Swapping items into earlier spheres only makes locations reachable earlier, so after a swap the index starts over
+    from the next sphere with the spheres of the previous one as hints: locations it had found by a sphere are known to
+    be reachable by that sphere again, and only the others get tested.
+    """
+    state: CollectionState
+    """state with the items of all spheres but the last one collected"""
+    unchecked: typing.Set[Location]
+    start: int
+    """number of the first sphere"""
+    spheres: typing.List[typing.Set[Location]]
+    sphere_of: typing.Dict[Location, int]
+    beaten_at: typing.Optional[int] = None
+    """number of the first sphere that is reached with a state that has beaten the game"""
+    hinted: typing.Dict[int, typing.Set[Location]]
+    """unchecked locations by the sphere a previous index found them in, they are reachable by that sphere as well"""
+    tested: int = 0
+    """number of reachability tests done, locations known from hints are not tested"""
+
+    def __init__(self, state: CollectionState, locations: typing.Iterable[Location], start: int,
+                 hints: typing.Optional[typing.Dict[Location, int]] = None) -> None:
+        self.state = state.copy()
+        self.unchecked = set(locations)
+        self.start = start
+        self.spheres = []
+        self.sphere_of = {}
+        self.hinted = {}
+        if hints:
+            for location, num in hints.items():
+                if location in self.unchecked:
+                    self.hinted.setdefault(max(num, start), set()).add(location)
+
+    def get_sphere(self, num: int) -> typing.Set[Location]:
+        """Returns the locations that first become reachable in sphere num, sweeping for it if necessary."""
+        state = self.state
+        while self.start + len(self.spheres) <= num:
+            if self.spheres:
+                for location in self.spheres[-1]:
+                    if location.advancement:
+                        state.collect(location.item, True, location)
+            sphere_num = self.start + len(self.spheres)
+            if self.beaten_at is None and state.multiworld.has_beaten_game(state):
+                self.beaten_at = sphere_num
+            known: typing.Set[Location] = set()
+            for hinted_num in [hinted_num for hinted_num in self.hinted if hinted_num <= sphere_num]:
+                known |= self.hinted.pop(hinted_num)
+            known &= self.unchecked
+            untested = self.unchecked - known
+            self.tested += len(untested)
+            sphere = known | {location for location in untested if state.can_reach(location)}
+            self.unchecked -= sphere
+            for location in sphere:
+                self.sphere_of[location] = sphere_num
+            self.spheres.append(sphere)
+        return self.spheres[num - self.start]
+
+    def beaten_before(self, num: int) -> bool:
+        """Returns if the state that sphere num is reached with has beaten the game. Sphere num has to be swept already."""
+        return self.beaten_at is not None and self.beaten_at <= num
+
+    def sweep(self, state: CollectionState, locations: typing.Iterable[Location]) -> None:
+        """
+        Same as state.sweep_for_advancements(locations) for already swept locations, but visits them in the order they
+        first became reachable in and collects right away, so that most are found in a single pass.
+        """
+        sphere_of = self.sphere_of
+        pending = sorted((location for location in locations
+                          if location.advancement and location not in state.advancements),
+                         key=sphere_of.__getitem__)
+        while pending:
+            unreachable: typing.List[Location] = []
+            for location in pending:
+                if location.can_reach(state):
+                    state.advancements.add(location)
+                    state.collect(location.item, True, location)
+                else:
+                    unreachable.append(location)
+            if len(unreachable) == len(pending):
+                break
+            pending = unreachable
+
+
 def balance_multiworld_progression(multiworld: MultiWorld) -> None:
     # A system to reduce situations where players have no checks remaining, popularly known as "BK mode."
     # Overall progression balancing algorithm:
@@ -768,6 +962,10 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
+        resweep_count: int = 0
+        tested_count: int = 0
+        index: typing.Optional[_ReachabilityIndex] = None
+        hints: typing.Optional[typing.Dict[Location, int]] = None
 
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
@@ -781,10 +979,13 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             return
 
         while True:
+            if index is None:
+                index = _ReachabilityIndex(state, unchecked_locations, sphere_num, hints)
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            current_sphere = sphere_num
+            sphere_locations = index.get_sphere(current_sphere).copy()
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -814,16 +1015,17 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
-                    balancing_state = state.copy()
-                    balancing_unchecked_locations = unchecked_locations.copy()
+                    # the spheres ahead come from the index, reusing those walked for earlier spheres
+                    balancing_sphere_num = current_sphere
                     balancing_reachables = reachable_locations_count.copy()
-                    balancing_sphere = sphere_locations.copy()
+                    balancing_sphere = sphere_locations
+                    # Gather a set of locations which we can swap items into
+                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
                             if location.advancement:
-                                balancing_state.collect(location.item, True, location)
                                 player = location.item.player
                                 # only replace items that end up in another player's world
                                 if (not location.locked and not location.item.skip_in_prog_balancing and
@@ -832,23 +1034,20 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        balancing_sphere_num += 1
+                        balancing_sphere = index.get_sphere(balancing_sphere_num)
                         for location in balancing_sphere:
-                            balancing_unchecked_locations.remove(location)
+                            unlocked_locations[location.player].add(location)
                             if not location.locked:
                                 balancing_reachables[location.player] += 1
-                        if multiworld.has_beaten_game(balancing_state) or all(
+                        if index.beaten_before(balancing_sphere_num) or all(
                                 item_percentage(player, reachables) >= threshold_percentages[player]
                                 for player, reachables in balancing_reachables.items()
                                 if player in threshold_percentages):
                             break
                         elif not balancing_sphere:
                             raise RuntimeError("Not all required items reachable. Something went terribly wrong here.")
-                    # Gather a set of locations which we can swap items into
-                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
-                    for l in unchecked_locations:
-                        if l not in balancing_unchecked_locations:
-                            unlocked_locations[l.player].add(l)
+                    balancing_beaten = index.beaten_before(balancing_sphere_num)
                     items_to_replace: typing.List[Location] = []
                     for player in balancing_players:
                         locations_to_test = unlocked_locations[player]
@@ -864,13 +1063,16 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                             ), items_to_test):
                                 reducing_state.collect(location.item, True, location)
 
-                            reducing_state.sweep_for_advancements(locations=locations_to_test)
+                            index.sweep(reducing_state, locations_to_test)
 
-                            if multiworld.has_beaten_game(balancing_state):
+                            if balancing_beaten:
                                 if not multiworld.has_beaten_game(reducing_state):
                                     items_to_replace.append(testing)
                             else:
-                                reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
+                                # the sweep already reached the advancement locations it collected
+                                reduced_sphere = {location for location in locations_to_test
+                                                  if location in reducing_state.advancements
+                                                  or reducing_state.can_reach(location)}
                                 p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
                                 if p < threshold_percentages[player]:
                                     items_to_replace.append(testing)
@@ -908,6 +1110,12 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                             if not location.locked:
                                 reachable_locations_count[location.player] += 1
                             sphere_locations.add(location)
+                        # the swapped items can make locations that are still unchecked reachable earlier,
+                        # but never later, so the next index only tests those not found by a sphere already
+                        hints = index.sphere_of
+                        tested_count += index.tested
+                        index = None
+                        resweep_count += 1
 
             for location in sphere_locations:
                 if location.advancement:
@@ -920,6 +1128,11 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                 logging.warning("Progression Balancing ran out of paths.")
                 break
 
+        if index is not None:
+            tested_count += index.tested
+        logging.info(f"Progression balancing swapped {moved_item_count} items, re-indexed the spheres "
+                     f"{resweep_count} times and tested the reachability of {tested_count} locations.")
+
 
 def swap_location_item(location_1: Location, location_2: Location, check_locked: bool = True) -> None:
     """Swaps Items of locations. Does NOT swap flags like shop_slot or locked, but does swap event"""
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import copy
+import hashlib
 import logging
+import logging.handlers
 import os
+import pickle
 import random
 import string
 import sys
+import threading
 import urllib.parse
 import urllib.request
-from collections import Counter
-from itertools import chain
+from collections import Counter, OrderedDict
+from collections.abc import Sequence
+from itertools import chain, repeat
 from typing import Any
 
 import ModuleUpdate
@@ -57,6 +63,14 @@ def mystery_argparse(argv: list[str] | None = None):
     parser.add_argument("--spoiler_only", action="store_true",
                         help="Skips generation assertion and multidata, outputting only a spoiler log. "
                              "Intended for debugging and testing purposes.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Measure the time spent in each access rule and world during the fill, and write it "
+                             "to AP_<seed>_profile.json and, for flamegraph tools, AP_<seed>_profile.folded "
+                             "in the output folder.")
+    parser.add_argument("--roll_workers", type=int, default=0,
+                        help="Parse player files and roll their options in this many processes. Every player is "
+                             "rolled with its own seed drawn from the generation seed, so results differ from "
+                             "rolling in this process, but not between amounts of processes.")
     args = parser.parse_args(argv)
 
     if args.skip_output and args.spoiler_only:
@@ -95,6 +109,15 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
         logging.info("Race mode enabled. Using non-deterministic random source.")
         random.seed()  # reset to time-based random source
 
+    if args.roll_workers > 0:
+        with start_roll_pool(args.roll_workers) as roll_pool:
+            return roll_players(args, seed, seed_name, roll_pool)
+    return roll_players(args, seed, seed_name)
+
+
+def roll_players(args: argparse.Namespace, seed: int, seed_name: str,
+                 roll_pool: concurrent.futures.Executor | None = None) -> tuple[argparse.Namespace, int]:
+    """Reads the weights files of args and rolls the options of every player, parsing and rolling in roll_pool."""
     weights_cache: dict[str, tuple[Any, ...]] = {}
     if args.weights_file_path and os.path.exists(args.weights_file_path):
         try:
@@ -122,26 +145,37 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     player_id: int = 1
     player_files: dict[int, str] = {}
     player_errors: list[str] = []
+    player_paths: list[str] = []
     for file in os.scandir(args.player_files_path):
         fname = file.name
         if file.is_file() and not fname.startswith(".") and not fname.lower().endswith(".ini") and \
                 os.path.join(args.player_files_path, fname) not in {args.meta_file_path, args.weights_file_path}:
-            path = os.path.join(args.player_files_path, fname)
-            try:
-                weights_for_file = []
-                for doc_idx, yaml in enumerate(read_weights_yamls(path)):
-                    if yaml is None:
-                        logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
-                    else:
-                        weights_for_file.append(yaml)
-                weights_cache[fname] = tuple(weights_for_file)
-                        
-            except Exception as e:
-                logging.exception(f"Exception reading weights in file {fname}")
-                player_errors.append(
-                    f"{len(player_errors) + 1}. "
-                    f"File {fname} is invalid. Please fix your yaml.\n{Utils.get_all_causes(e)}"
-                )
+            player_paths.append(os.path.join(args.player_files_path, fname))
+    if roll_pool:
+        player_documents = read_weights_yamls_in_pool(player_paths, roll_pool)
+    else:
+        player_documents = [None] * len(player_paths)
+    for path, documents in zip(player_paths, player_documents):
+        fname = os.path.basename(path)
+        try:
+            if documents is None:
+                documents = read_weights_yamls(path)
+            elif isinstance(documents, Exception):
+                raise documents
+            weights_for_file = []
+            for doc_idx, yaml in enumerate(documents):
+                if yaml is None:
+                    logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
+                else:
+                    weights_for_file.append(yaml)
+            weights_cache[fname] = tuple(weights_for_file)
+                    
+        except Exception as e:
+            logging.exception(f"Exception reading weights in file {fname}")
+            player_errors.append(
+                f"{len(player_errors) + 1}. "
+                f"File {fname} is invalid. Please fix your yaml.\n{Utils.get_all_causes(e)}"
+            )
 
     # sort dict for consistent results across platforms:
     weights_cache = {key: value for key, value in sorted(weights_cache.items(), key=lambda k: k[0].casefold())}
@@ -177,6 +211,10 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
                         f"Provide a general weights file ({args.weights_file_path}) or individual player files. "
                         f"A mix is also permitted.")
 
+    import worlds
+    # with lazy world loading, only the worlds of games the weights could roll get imported
+    worlds.load_worlds(_referenced_strings((weights_cache, meta_weights)))
+
     from worlds.AutoWorld import AutoWorldRegister
     args.outputname = seed_name
     args.sprite = dict.fromkeys(range(1, args.multi+1), None)
@@ -205,11 +243,46 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
                             else:
                                 yaml[category_name][key] = option
 
+    player_path_cache: dict[int, str] = {}
+    for player in range(1, args.multi + 1):
+        player_path_cache[player] = player_files.get(player, args.weights_file_path)
+
+    pool_settings: dict[Any, argparse.Namespace | Exception] = {}
+    if roll_pool:
+        # roll everything up front, every player with its own seed drawn in player order,
+        # so that results don't depend on the process a player gets rolled in
+        to_roll: dict[Any, dict] = {}
+        if args.sameoptions:
+            for fname, yamls in weights_cache.items():
+                for doc_index, yaml in enumerate(yamls):
+                    to_roll[fname, doc_index] = yaml
+        else:
+            player = 1
+            while player <= args.multi:
+                path = player_path_cache[player]
+                if not path:
+                    player += 1
+                    continue
+                for yaml in weights_cache[path]:
+                    to_roll[player] = yaml
+                    player += 1
+        roll_seeds = [random.getrandbits(64) for _ in to_roll]
+        pool_settings = dict(zip(to_roll, roll_settings_in_pool(roll_pool, list(to_roll.values()), args.plando,
+                                                                roll_seeds)))
+
+    def roll(key: Any, yaml: dict) -> argparse.Namespace:
+        if key not in pool_settings:
+            return roll_settings(yaml, args.plando)
+        settings = pool_settings[key]
+        if isinstance(settings, Exception):
+            raise settings
+        return settings
+
     settings_cache: dict[str, tuple[argparse.Namespace, ...]] = {fname: None for fname in weights_cache}
     if args.sameoptions:
         for fname, yamls in weights_cache.items():
             try:
-                settings_cache[fname] = tuple(roll_settings(yaml, args.plando) for yaml in yamls)
+                settings_cache[fname] = tuple(roll((fname, doc_index), yaml) for doc_index, yaml in enumerate(yamls))
             except Exception as e:
                 logging.exception(f"Exception reading settings in file {fname}")
                 player_errors.append(
@@ -222,9 +295,6 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
             raise ValueError(f"Encountered {len(player_errors)} error(s) in player files. "
                              f"See logs for full tracebacks.\n\n{errors}")
 
-    player_path_cache: dict[int, str] = {}
-    for player in range(1, args.multi + 1):
-        player_path_cache[player] = player_files.get(player, args.weights_file_path)
     name_counter = Counter()
     args.player_options = {}
 
@@ -244,7 +314,7 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
                 settingsObject: argparse.Namespace = (
                     settings_cache[path][doc_index]
                     if settings_cache[path]
-                    else roll_settings(yaml, args.plando)
+                    else roll(player, yaml)
                 )
                 
                 for k, v in vars(settingsObject).items():
@@ -291,21 +361,132 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     return args, seed
 
 
+class YamlCache:
+    """
+    Parsed weights files by the hash of their content, so that rolling the same files again skips parsing them.
+    Documents are kept pickled, so that every lookup returns a copy that is free to be modified, e.g. by meta.yaml.
+    """
+    max_size: int
+    _documents: OrderedDict[bytes, bytes]
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(text: str | bytes) -> bytes:
+        # the parser decodes bytes itself, so they are kept apart from str of the same content
+        if isinstance(text, str):
+            return hashlib.blake2b(text.encode("utf-8"), digest_size=16, person=b"str").digest()
+        return hashlib.blake2b(text, digest_size=16, person=b"bytes").digest()
+
+    def get(self, key: bytes) -> tuple[Any, ...] | None:
+        with self._lock:
+            documents = self._documents.get(key)
+            if documents is None:
+                return None
+            self._documents.move_to_end(key)
+        return pickle.loads(documents)
+
+    def put(self, key: bytes, documents: bytes) -> None:
+        with self._lock:
+            self._documents[key] = documents
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.max_size:
+                self._documents.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+yaml_cache = YamlCache()
+
+
 def read_weights_yamls(path) -> tuple[Any, ...]:
+    return parse_weights_yamls(_read_weights_file(path))
+
+
+def read_weights_yamls_in_pool(paths: Sequence[str],
+                               roll_pool: concurrent.futures.Executor) -> list[tuple[Any, ...] | Exception]:
+    """
+    Reads the weights files at paths like read_weights_yamls, parsing them with parse_weights_yamls_in_pool.
+    Returns the documents of every file, or the exception reading or parsing it raised instead.
+    """
+    results: list[tuple[Any, ...] | Exception | None] = [None] * len(paths)
+    texts: dict[int, str] = {}
+    for index, path in enumerate(paths):
+        try:
+            texts[index] = _read_weights_file(path)
+        except Exception as e:
+            results[index] = e
+    for index, documents in zip(texts, parse_weights_yamls_in_pool(list(texts.values()), roll_pool)):
+        results[index] = documents
+    return results
+
+
+def parse_weights_yamls_in_pool(texts: Sequence[str | bytes],
+                                roll_pool: concurrent.futures.Executor) -> list[tuple[Any, ...] | Exception]:
+    """
+    Parses weights files like parse_weights_yamls, the ones that are not in yaml_cache in roll_pool.
+    Returns the documents of every file, or the exception parsing it raised instead.
+    """
+    results: list[tuple[Any, ...] | Exception | None] = []
+    parsing: dict[int, tuple[bytes, concurrent.futures.Future[bytes]]] = {}
+    for text in texts:
+        key = yaml_cache.get_key(text)
+        documents = yaml_cache.get(key)
+        if documents is None:
+            parsing[len(results)] = key, roll_pool.submit(_parse_weights_yamls, text)
+        results.append(documents)
+    for index, (key, future) in parsing.items():
+        try:
+            documents = future.result()
+        except Exception as e:
+            # the pool attaches the traceback of the worker as cause, which would read like an error of its own
+            e.__cause__ = None
+            results[index] = e
+        else:
+            yaml_cache.put(key, documents)
+            results[index] = pickle.loads(documents)
+    return results
+
+
+def parse_weights_yamls(text: str | bytes) -> tuple[Any, ...]:
+    """Parses all documents of a weights file, taking them from yaml_cache if the same text was parsed before."""
+    key = yaml_cache.get_key(text)
+    documents = yaml_cache.get(key)
+    if documents is None:
+        pickled = _parse_weights_yamls(text)
+        yaml_cache.put(key, pickled)
+        documents = pickle.loads(pickled)
+    return documents
+
+
+def _read_weights_file(path) -> str:
     try:
         if urllib.parse.urlparse(path).scheme in ('https', 'file'):
-            yaml = str(urllib.request.urlopen(path).read(), "utf-8-sig")
+            return str(urllib.request.urlopen(path).read(), "utf-8-sig")
         else:
             with open(path, 'rb') as f:
-                yaml = str(f.read(), "utf-8-sig")
+                return str(f.read(), "utf-8-sig")
     except Exception as e:
         raise Exception(f"Failed to read weights ({path})") from e
 
+
+def _parse_weights_yamls(yaml: str | bytes) -> bytes:
+    """Parses all documents of a weights file and returns them pickled for yaml_cache."""
     from yaml.error import MarkedYAMLError
     try:
-        return tuple(parse_yamls(yaml))
+        return pickle.dumps(tuple(parse_yamls(yaml)))
     except MarkedYAMLError as ex:
         if ex.problem_mark:
+            if isinstance(yaml, bytes):
+                yaml = str(yaml, "utf-8-sig", errors="replace")
             lines = yaml.splitlines()
             if ex.context_mark:
                 relevant_lines = "\n".join(lines[ex.context_mark.line:ex.problem_mark.line+1])
@@ -520,6 +701,22 @@ def handle_option(ret: argparse.Namespace, game_weights: dict, option_key: str,
         player_option.verify(AutoWorldRegister.world_types[ret.game], ret.name, plando_options)
 
 
+def _referenced_strings(data: Any) -> set[str]:
+    """Collects all strings in weights, which includes the names of all games they could roll or set options for."""
+    strings: set[str] = set()
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, str):
+            strings.add(value)
+        elif isinstance(value, dict):
+            pending.extend(value.keys())
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple, set)):
+            pending.extend(value)
+    return strings
+
+
 def roll_settings(weights: dict, plando_options: PlandoOptions = PlandoOptions.bosses):
     """
     Roll options from specified weights, usually originating from a .yaml options file.
@@ -649,9 +846,78 @@ def roll_alttp_settings(ret: argparse.Namespace, weights):
                         ret.sprite_pool += [key] * int(value)
 
 
+def start_roll_pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """Starts a pool of processes to parse weights files and roll options in, which hand back what they log."""
+    return concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_roll_worker,
+                                                  initargs=(logging.getLogger().level,))
+
+
+def roll_settings_in_pool(roll_pool: concurrent.futures.Executor, weights: Sequence[dict],
+                          plando_options: PlandoOptions, roll_seeds: Sequence[int]) -> list[argparse.Namespace | Exception]:
+    """
+    Rolls options for each of weights in roll_pool, with random seeded by the matching roll seed, so that results only
+    depend on the seeds. Returns the options of each, or the exception rolling them raised instead.
+    What gets logged while rolling is logged again in this process.
+    """
+    # rolling a single file is quick, so files are sent to the workers in chunks to keep the overhead of the pool low
+    chunk_size = max(1, len(weights) // (4 * (os.cpu_count() or 1)))
+    results: list[argparse.Namespace | Exception] = []
+    for settings, records in roll_pool.map(_roll_settings_seeded, weights, repeat(plando_options),
+                                           roll_seeds, chunksize=chunk_size):
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+        if isinstance(settings, list):
+            # causes don't survive pickling, so the worker sends the whole chain of the exception
+            for exception, cause in zip(settings, settings[1:]):
+                exception.__cause__ = cause
+            settings = settings[0]
+        results.append(settings)
+    return results
+
+
+def _init_roll_worker(log_level: int) -> None:
+    # records are handed back to the process that started the pool, which logs them to its own handlers
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.setLevel(log_level)
+
+
+def _roll_settings_seeded(weights: dict, plando_options: PlandoOptions, roll_seed: int) \
+        -> tuple[argparse.Namespace | list[Exception], list[logging.LogRecord]]:
+    import worlds
+    # with lazy world loading, workers only have the worlds loaded that they rolled for before
+    worlds.load_worlds(_referenced_strings(weights))
+    random.seed(roll_seed)
+    handler = logging.handlers.BufferingHandler(sys.maxsize)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    try:
+        settings = roll_settings(weights, plando_options)
+    except Exception as e:
+        settings = [e]
+        while settings[-1].__cause__:
+            settings.append(settings[-1].__cause__)
+        try:
+            pickle.dumps(settings)
+        except Exception:
+            settings = [Exception(Utils.get_all_causes(e))]
+    finally:
+        root_logger.removeHandler(handler)
+    for record in handler.buffer:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+    return settings, handler.buffer
+
+
 if __name__ == '__main__':
     import atexit
     confirmation = atexit.register(input, "Press enter to close.")
+    # only import the worlds of games that are rolled, unless asked otherwise
+    os.environ.setdefault("LAZY_WORLD_LOADING", "1")
     erargs, seed = main()
     from Main import main as ERmain
     multiworld = ERmain(erargs, seed)
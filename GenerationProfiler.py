@@ -0,0 +1,234 @@
+"""
+Opt-in profiler for the fill of a generation, enabled with Generate.py's --profile.
+
+While it is active, the access rule of every Location and Entrance is wrapped, as are fill_restrictive,
+CollectionState.sweep_for_advancements and CollectionState.update_reachable_regions. The time spent in them is
+attributed to the rule and world it belongs to, and written out as a JSON report and as collapsed stacks that
+flamegraph.pl, speedscope and similar tools can read.
+
+Only the thread that entered the profiler is measured. Access rules that are set after it was entered are not wrapped,
+and are kept when it exits.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import threading
+import time
+import typing
+from collections import defaultdict
+
+import Fill
+from BaseClasses import CollectionState, Entrance, Location, MultiWorld
+
+__all__ = ["GenerationProfiler"]
+
+perf_logger = logging.getLogger("performance")
+
+# calls, total seconds including nested measured calls, own seconds excluding them
+_Stat = typing.List[typing.Union[int, float]]
+_StatKey = typing.Tuple[str, int, str]
+
+
+class _ProfiledRule:
+    __slots__ = ("profiler", "rule", "labels", "stat")
+
+    def __init__(self, profiler: GenerationProfiler, rule: typing.Callable[[CollectionState], bool],
+                 labels: typing.Tuple[str, ...], stat: _Stat) -> None:
+        self.profiler = profiler
+        self.rule = rule
+        self.labels = labels
+        self.stat = stat
+
+    def __call__(self, state: CollectionState) -> bool:
+        return self.profiler.measure(self.labels, self.stat, self.rule, state)
+
+
+class GenerationProfiler:
+    multiworld: MultiWorld
+    stats: typing.Dict[_StatKey, _Stat]
+    """Measurements by kind, player and name. Kind is Location, Entrance or the name of a wrapped function."""
+    folded: typing.Dict[typing.Tuple[str, ...], float]
+    """Own seconds by stack of labels, the root being "fill"."""
+    duration: float = 0.0
+
+    _thread_id: typing.Optional[int] = None
+    _stack: typing.List[typing.List[typing.Any]]
+    _start: float = 0.0
+    _rules: typing.List[typing.Tuple[typing.Union[Location, Entrance], typing.Any, _ProfiledRule]]
+    _patches: typing.List[typing.Tuple[typing.Any, str, typing.Any]]
+
+    def __init__(self, multiworld: MultiWorld) -> None:
+        self.multiworld = multiworld
+        self.stats = {}
+        self.folded = defaultdict(float)
+        self._stack = []
+        self._rules = []
+        self._patches = []
+
+    def world_label(self, player: int) -> str:
+        game = self.multiworld.game.get(player, "Unknown")
+        return f"{self.multiworld.player_name.get(player, f'Player {player}')} ({game})".replace(";", ",")
+
+    def measure(self, labels: typing.Tuple[str, ...], stat: _Stat,
+                function: typing.Callable[..., typing.Any], *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        """Calls function, adding the time taken to stat and to the stack of the caller extended by labels."""
+        if threading.get_ident() != self._thread_id:
+            return function(*args, **kwargs)
+        stack = self._stack
+        frame = [stack[-1][0] + labels, 0.0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            taken = time.perf_counter() - start
+            stack.pop()
+            stack[-1][1] += taken
+            own = taken - frame[1]
+            stat[0] += 1
+            stat[1] += taken
+            stat[2] += own
+            self.folded[frame[0]] += own
+
+    def _stat(self, kind: str, player: int, name: str) -> _Stat:
+        return self.stats.setdefault((kind, player, name), [0, 0.0, 0.0])
+
+    def _wrap_rules(self, spots: typing.Iterable[typing.Union[Location, Entrance]], kind: str) -> None:
+        for spot in spots:
+            labels = (self.world_label(spot.player), f"{kind} {spot.name}".replace(";", ","))
+            profiled = _ProfiledRule(self, spot.access_rule, labels, self._stat(kind, spot.player, spot.name))
+            self._rules.append((spot, spot.__dict__.get("access_rule"), profiled))
+            spot.access_rule = profiled
+
+    def _patch(self, owner: typing.Any, name: str, replacement: typing.Any) -> None:
+        self._patches.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, replacement)
+
+    def __enter__(self) -> GenerationProfiler:
+        assert self._thread_id is None, "GenerationProfiler is already active"
+        self._wrap_rules(self.multiworld.get_locations(), "Location")
+        self._wrap_rules(self.multiworld.get_entrances(), "Entrance")
+
+        profiler = self
+        fill_restrictive = Fill.fill_restrictive
+
+        def profiled_fill_restrictive(*args: typing.Any, **kwargs: typing.Any) -> None:
+            name = kwargs.get("name", "Unknown")
+            return profiler.measure((f"fill_restrictive {name}".replace(";", ","),),
+                                    profiler._stat("fill_restrictive", 0, name), fill_restrictive, *args, **kwargs)
+
+        # worlds tend to import fill_restrictive by name, so it is replaced in every module that did
+        for module in list(sys.modules.values()):
+            if getattr(module, "__dict__", {}).get("fill_restrictive") is fill_restrictive:
+                self._patch(module, "fill_restrictive", profiled_fill_restrictive)
+
+        sweep_for_advancements = CollectionState.sweep_for_advancements
+        sweep_labels = ("sweep_for_advancements",)
+        sweep_stat = self._stat("sweep_for_advancements", 0, "")
+
+        def profiled_sweep_for_advancements(state: CollectionState, *args: typing.Any, **kwargs: typing.Any) \
+                -> typing.Optional[typing.Iterator[None]]:
+            sweeps = profiler.measure(sweep_labels, sweep_stat, sweep_for_advancements, state, *args, **kwargs)
+            if sweeps is None:
+                return None
+            return profiler._profile_iterator(sweep_labels, sweep_stat, sweeps)
+
+        self._patch(CollectionState, "sweep_for_advancements", profiled_sweep_for_advancements)
+
+        update_reachable_regions = CollectionState.update_reachable_regions
+        update_labels: typing.Dict[int, typing.Tuple[str, ...]] = {}
+
+        def profiled_update_reachable_regions(state: CollectionState, player: int) -> None:
+            labels = update_labels.get(player)
+            if labels is None:
+                labels = update_labels[player] = ("update_reachable_regions", profiler.world_label(player))
+            return profiler.measure(labels, profiler._stat("update_reachable_regions", player, ""),
+                                    update_reachable_regions, state, player)
+
+        self._patch(CollectionState, "update_reachable_regions", profiled_update_reachable_regions)
+
+        self._thread_id = threading.get_ident()
+        self._stack.append([("fill",), 0.0])
+        self._start = time.perf_counter()
+        return self
+
+    def _profile_iterator(self, labels: typing.Tuple[str, ...], stat: _Stat,
+                          iterator: typing.Iterator[None]) -> typing.Iterator[None]:
+        while True:
+            try:
+                self.measure(labels, stat, next, iterator)
+            except StopIteration:
+                return
+            yield
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        taken = time.perf_counter() - self._start
+        self.duration += taken
+        root = self._stack.pop()
+        self.folded[root[0]] += taken - root[1]
+        self._thread_id = None
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+        for spot, rule, profiled in self._rules:
+            if spot.__dict__.get("access_rule") is not profiled:
+                # set_rule or add_rule ran while profiling, the wrapper left in there only measures while active
+                logging.debug(f"Keeping the access rule of {spot.name}, which was changed while profiling.")
+            elif rule is None:
+                del spot.access_rule
+            else:
+                spot.access_rule = rule
+        self._rules.clear()
+
+    def report(self) -> typing.Dict[str, typing.Any]:
+        """Returns the measurements by function, world and access rule, each sorted by own time, slowest first."""
+        def entry(stat: _Stat, **fields: typing.Any) -> typing.Dict[str, typing.Any]:
+            return {**fields, "calls": stat[0], "total_time": stat[1], "own_time": stat[2]}
+
+        functions: typing.Dict[str, _Stat] = {}
+        worlds: typing.Dict[int, typing.Dict[str, _Stat]] = {}
+        rules = []
+        for (kind, player, name), stat in self.stats.items():
+            if kind in ("Location", "Entrance"):
+                rules.append(entry(stat, kind=kind, player=player, game=self.multiworld.game.get(player),
+                                   name=name))
+            else:
+                function_stat = functions.setdefault(kind, [0, 0.0, 0.0])
+                for index, value in enumerate(stat):
+                    function_stat[index] += value
+            if player:
+                world_stat = worlds.setdefault(player, {}).setdefault(kind, [0, 0.0, 0.0])
+                for index, value in enumerate(stat):
+                    world_stat[index] += value
+
+        def world_entry(player: int, stats: typing.Dict[str, _Stat]) -> typing.Dict[str, typing.Any]:
+            return {"player": player, "name": self.multiworld.player_name.get(player),
+                    "game": self.multiworld.game.get(player),
+                    "own_time": sum(stat[2] for stat in stats.values()),
+                    **{kind: entry(stat) for kind, stat in stats.items()}}
+
+        return {
+            "seed_name": self.multiworld.seed_name,
+            "duration": self.duration,
+            "functions": sorted((entry(stat, name=name) for name, stat in functions.items()),
+                                key=lambda function: function["own_time"], reverse=True),
+            "worlds": sorted((world_entry(player, stats) for player, stats in worlds.items()),
+                             key=lambda world: world["own_time"], reverse=True),
+            "rules": sorted(rules, key=lambda rule: rule["own_time"], reverse=True),
+        }
+
+    def write_report(self, path: str) -> None:
+        """Writes the report to path.json and the collapsed stacks, in microseconds, to path.folded."""
+        report = self.report()
+        with open(f"{path}.json", "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=1)
+        with open(f"{path}.folded", "w", encoding="utf-8") as folded_file:
+            for stack, own in sorted(self.folded.items()):
+                microseconds = round(own * 1_000_000)
+                if microseconds > 0:
+                    folded_file.write(f"{';'.join(stack)} {microseconds}\n")
+        for world in report["worlds"][:5]:
+            perf_logger.info(f"Spent {world['own_time']:.4f} seconds of the fill in the access rules and "
+                             f"region updates of player {world['player']}, named {world['name']}.")
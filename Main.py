@@ -1,4 +1,5 @@
 import collections
+import contextlib
 from collections.abc import Mapping
 import concurrent.futures
 import logging
@@ -7,23 +8,33 @@ import tempfile
 import time
 from typing import Any
 import zipfile
-import zlib
 
 import worlds
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
+from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, SphereAnalysis
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, flood_items, \
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
+from GenerationProfiler import GenerationProfiler
 from NetUtils import convert_to_base_types
 from Options import StartInventoryPool
-from Utils import __version__, output_path, restricted_dumps, version_tuple
+from Utils import __version__, output_path, version_tuple
 from settings import get_settings
 from worlds import AutoWorld
+from worlds.Files import delta_pool
 from worlds.generic.Rules import exclusion_rules, locality_rules
 
 __all__ = ["main"]
 
 
-def main(args, seed=None, baked_server_options: dict[str, object] | None = None):
+def main(args, seed=None, baked_server_options: dict[str, object] | None = None,
+         stage_timings: dict[str, float] | None = None):
+    """
+    Generate a multiworld from the rolled args.
+
+    :param stage_timings: optional dict that gets filled with the seconds spent in the
+        "generate", "fill" and "output" stages
+    """
+    if stage_timings is None:
+        stage_timings = {}
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
     assert isinstance(baked_server_options, dict)
@@ -184,31 +195,39 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if any(world.options.item_links for world in multiworld.worlds.values()):
         multiworld._all_state = None
 
-    logger.info("Running Item Plando.")
-    resolve_early_locations_for_planned(multiworld)
-    distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
-                                           for x in multiworld.plando_item_blocks[player]])
+    profiler = GenerationProfiler(multiworld) if args.profile else None
+    with profiler or contextlib.nullcontext():
+        logger.info("Running Item Plando.")
+        resolve_early_locations_for_planned(multiworld)
+        distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
+                                               for x in multiworld.plando_item_blocks[player]])
 
-    logger.info('Running Pre Main Fill.')
+        logger.info('Running Pre Main Fill.')
 
-    AutoWorld.call_all(multiworld, "pre_fill")
+        AutoWorld.call_all(multiworld, "pre_fill")
 
-    logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
+        fill_start = time.perf_counter()
+        stage_timings["generate"] = fill_start - start
+        logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
 
-    if multiworld.algorithm == 'flood':
-        flood_items(multiworld)  # different algo, biased towards early game progress items
-    elif multiworld.algorithm == 'balanced':
-        distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
+        if multiworld.algorithm == 'flood':
+            flood_items(multiworld)  # different algo, biased towards early game progress items
+        elif multiworld.algorithm == 'balanced':
+            distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
 
-    AutoWorld.call_all(multiworld, 'post_fill')
+        AutoWorld.call_all(multiworld, 'post_fill')
 
-    if multiworld.players > 1 and not args.skip_prog_balancing:
-        balance_multiworld_progression(multiworld)
-    else:
-        logger.info("Progression balancing skipped.")
+        if multiworld.players > 1 and not args.skip_prog_balancing:
+            balance_multiworld_progression(multiworld)
+        else:
+            logger.info("Progression balancing skipped.")
+    if profiler:
+        profiler.write_report(output_path(f"AP_{multiworld.seed_name}_profile"))
 
     # we're about to output using multithreading, so we're removing the global random state to prevent accidental use
     multiworld.random.passthrough = False
+    output_start = time.perf_counter()
+    stage_timings["fill"] = output_start - fill_start
 
     if args.skip_output:
         logger.info('Done. Skipped output/spoiler generation. Total Time: %s', time.perf_counter() - start)
@@ -216,6 +235,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     logger.info(f'Beginning output...')
     outfilebase = 'AP_' + multiworld.seed_name
+    # the fill is done, so the spoiler, accessibility check and multidata can share one sweep
+    multiworld.sphere_analysis = SphereAnalysis(multiworld)
 
     if args.spoiler_only:
         if args.spoiler > 1:
@@ -230,7 +251,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+        with delta_pool(get_settings().generator.delta_workers), \
+                concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
             output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
@@ -350,10 +372,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 for key in ("slot_data", "er_hint_data"):
                     multidata[key] = convert_to_base_types(multidata[key])
 
-                serialized_multidata = zlib.compress(restricted_dumps(multidata), 9)
+                serialized_multidata = NetUtils.encode_multidata(multidata)
 
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
                     f.write(serialized_multidata)
 
             output_file_futures.append(pool.submit(write_multidata))
@@ -383,5 +404,6 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
             for file in os.scandir(temp_dir):
                 zf.write(file.path, arcname=file.name)
 
+    stage_timings["output"] = time.perf_counter() - output_start
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
@@ -12,7 +12,9 @@ import inspect
 import itertools
 import logging
 import math
+import mmap
 import operator
+import os
 import pickle
 import random
 import shlex
@@ -139,6 +141,41 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+def write_journal_record(filename: str, record: dict, truncate: bool = False) -> int:
+    """Appends a length prefixed, compressed record to a save journal and returns the amount of bytes written."""
+    # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+    data = zlib.compress(pickle.dumps(record))
+    data = len(data).to_bytes(4, "little") + data
+    with open(filename, "wb" if truncate else "ab") as f:
+        f.write(data)
+    return len(data)
+
+
+def read_journal(filename: str, generation: int) -> typing.List[dict]:
+    """
+    Reads the records of a save journal written by write_journal_record.
+    Returns no records if the journal belongs to another generation of the save file.
+    A record cut off by a crash while writing it, and everything after it, gets ignored.
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+    records: typing.List[dict] = []
+    position = 0
+    while position + 4 <= len(data):
+        length = int.from_bytes(data[position:position + 4], "little")
+        position += 4
+        if position + length > len(data):
+            break
+        try:
+            records.append(restricted_loads(zlib.decompress(data[position:position + length])))
+        except (zlib.error, pickle.UnpicklingError, EOFError):
+            break
+        position += length
+    if not records or records[0].get("generation") != generation:
+        return []
+    return records[1:]
+
+
 class Client(Endpoint):
     __slots__ = (
         "__weakref__",
@@ -228,6 +265,10 @@ class Context:
                       "compatibility": int}
     # team -> slot id -> list of clients authenticated to slot.
     clients: typing.Dict[int, typing.Dict[int, typing.List[Client]]]
+    # team -> tag -> clients authenticated with that tag, kept in sync by (un)index_client_tags.
+    tag_clients: typing.Dict[int, typing.Dict[str, typing.Set[Client]]]
+    # game -> slot ids playing it
+    game_slots: typing.Dict[str, typing.List[int]]
     endpoints: list[Client]
     locations: LocationStore  # typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
     location_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
@@ -249,6 +290,8 @@ class Context:
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    location_spheres: typing.Dict[int, typing.Dict[int, int]]
+    """ { player: { location_id: sphere, ... } }, built from spheres """
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
@@ -261,6 +304,8 @@ class Context:
         self.log_network = log_network
         self.endpoints = []
         self.clients = {}
+        self.tag_clients = {}
+        self.game_slots = {}
         self.compatibility: int = compatibility
         self.shutdown_task = None
         self.data_filename = None
@@ -277,6 +322,8 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.new_item_receivers: typing.Set[team_slot] = set()  # slots that got items not yet sent to their clients
+        self.new_items_handle: typing.Optional[asyncio.Handle] = None
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -284,6 +331,10 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding_player, location) -> hints for that location that a check can still change
+        self.hint_index: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = collections.defaultdict(set)
+        self.metrics: typing.Counter[str] = collections.Counter()  # performance counters, shown by /metrics
+        self.metrics_start = time.monotonic()
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -303,6 +354,14 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.journal_saves = False  # append changes to a journal instead of writing the full save each time
+        self.journal_generation = 0
+        self.journal_size = 0
+        self.journal_max_size = 0  # size at which the journal gets compacted into the save file
+        self.journaled_state: typing.Dict[str, typing.Any] = {}  # what the save file + journal contain
+        # keys of each save entry that changed since the last save, swapped out by the auto saver thread
+        self.save_changes: typing.DefaultDict[str, typing.Set[typing.Any]] = collections.defaultdict(set)
+        self.save_changes_lock = threading.Lock()
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -314,6 +373,7 @@ class Context:
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
         self.read_data = {}
         self.spheres = []
+        self.location_spheres = {}
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -335,17 +395,22 @@ class Context:
         import worlds
         self.gamespackage = worlds.network_data_package["games"]
 
-        self.item_name_groups = {world_name: world.item_name_groups for world_name, world in
-                                 worlds.AutoWorldRegister.world_types.items()}
-        self.location_name_groups = {world_name: world.location_name_groups for world_name, world in
-                                     worlds.AutoWorldRegister.world_types.items()}
         for world_name, world in worlds.AutoWorldRegister.world_types.items():
+            if world_name in self.item_name_groups:
+                continue  # already known, worlds that get loaded later are added by calling this again
+            self.item_name_groups[world_name] = world.item_name_groups
+            self.location_name_groups[world_name] = world.location_name_groups
             self.non_hintable_names[world_name] = world.hint_blacklist
 
-        for game_package in self.gamespackage.values():
             # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            self.gamespackage[world_name].pop("item_name_groups", None)
+            self.gamespackage[world_name].pop("location_name_groups", None)
+
+    def _load_multiworld_game_data(self, games: typing.AbstractSet[str]):
+        """Loads the worlds of games, in case worlds get loaded lazily."""
+        import worlds
+        worlds.load_worlds(games)
+        self._load_game_data()
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -446,9 +511,34 @@ class Context:
         msgs = self.dumper(msgs)
         async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
 
+    def multicast(self, endpoints: typing.Sequence[Endpoint], msgs: typing.List[dict]):
+        """Sends msgs to each of endpoints like send_msgs, but encodes them only once for all of them."""
+        if len(endpoints) == 1:
+            async_start(self.send_msgs(endpoints[0], msgs))
+        elif endpoints:
+            data = self.dumper(msgs)
+            for endpoint in endpoints:
+                async_start(self.send_encoded_msgs(endpoint, data))
+
+    def index_client_tags(self, client: Client) -> None:
+        """Adds client to tag_clients for its team and tags. Remove it with unindex_client_tags before changing them."""
+        team_tags = self.tag_clients.setdefault(client.team, {})
+        for tag in client.tags:
+            team_tags.setdefault(tag, set()).add(client)
+
+    def unindex_client_tags(self, client: Client) -> None:
+        team_tags = self.tag_clients.get(client.team, {})
+        for tag in client.tags:
+            tagged = team_tags.get(tag)
+            if tagged is not None:
+                tagged.discard(client)
+                if not tagged:
+                    del team_tags[tag]
+
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
             self.endpoints.remove(endpoint)
+        self.unindex_client_tags(endpoint)
         if endpoint.slot and endpoint in self.clients[endpoint.team][endpoint.slot]:
             self.clients[endpoint.team][endpoint.slot].remove(endpoint)
         await on_client_disconnected(self, endpoint)
@@ -477,20 +567,35 @@ class Context:
                         break
                 else:
                     raise Exception("No .archipelago found in archive.")
+            self._load(self.decompress(data), {}, use_embedded_server_options)
         else:
-            with open(multidatapath, 'rb') as f:
-                data = f.read()
-
-        self._load(self.decompress(data), {}, use_embedded_server_options)
+            with open(multidatapath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                decoded_obj = self.decompress(data)
+                # keep slot_data encoded until a slot connects, but don't keep the file mapped (and locked on Windows)
+                if isinstance(decoded_obj.get("slot_data"), NetUtils.LazySlotData):
+                    decoded_obj["slot_data"].detach()
+            self._load(decoded_obj, {}, use_embedded_server_options)
         self.data_filename = multidatapath
 
     @staticmethod
     def decompress(data: bytes) -> dict:
         format_version = data[0]
-        if format_version > 3:
+        if format_version > NetUtils.multidata_format_version:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version == NetUtils.multidata_format_version:
+            return NetUtils.decode_multidata(data)
         return restricted_loads(zlib.decompress(data[1:]))
 
+    @staticmethod
+    def index_spheres(spheres: typing.List[typing.Dict[int, typing.Set[int]]]) \
+            -> typing.Dict[int, typing.Dict[int, int]]:
+        """Maps every location of spheres to the index of the earliest sphere it is in, by player."""
+        location_spheres: typing.Dict[int, typing.Dict[int, int]] = {}
+        for i in range(len(spheres) - 1, -1, -1):
+            for player, locations in spheres[i].items():
+                location_spheres.setdefault(player, {}).update(dict.fromkeys(locations, i))
+        return location_spheres
+
     def _load(self, decoded_obj: MultiData, game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
 
@@ -513,6 +618,9 @@ class Context:
 
         self.slot_info = decoded_obj["slot_info"]
         self.games = {slot: slot_info.game for slot, slot_info in self.slot_info.items()}
+        self.game_slots = {}
+        for slot, game in self.games.items():
+            self.game_slots.setdefault(game, []).append(slot)
         self.groups = {slot: set(slot_info.group_members) for slot, slot_info in self.slot_info.items()
                        if slot_info.type == SlotType.group}
 
@@ -533,10 +641,12 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        locations = decoded_obj.pop("locations")  # pre-emptively free memory
+        # format 4 multidata already comes with a LocationStore
+        self.locations = locations if isinstance(locations, LocationStore) else LocationStore(locations)
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda slot=slot: self.slot_data[slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -546,6 +656,8 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            for hint in hints:
+                self.index_hint(0, hint)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -557,6 +669,8 @@ class Context:
             server_options = decoded_obj.get("server_options", {})
             self._set_options(server_options)
 
+        self._load_multiworld_game_data({slot_info.game for slot_info in self.slot_info.values()})
+
         # embedded data package
         for game_name, data in decoded_obj.get("datapackage", {}).items():
             if game_name in game_data_packages:
@@ -576,6 +690,7 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.location_spheres = self.index_spheres(self.spheres)
 
     # saving
 
@@ -591,18 +706,58 @@ class Context:
         return False
 
     def _save(self, exit_save: bool = False) -> bool:
+        if self.journal_saves and not exit_save and self.journal_size < self.journal_max_size:
+            return self._append_save_journal()
+        changes = self.take_save_changes()
         try:
+            save = self.get_save()
+            if self.journal_saves:
+                save["journal_generation"] = self.journal_generation + 1
             # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-            encoded_save = pickle.dumps(self.get_save())
+            encoded_save = zlib.compress(pickle.dumps(save))
             with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+                f.write(encoded_save)
+            if self.journal_saves:
+                # the journal of the previous generation no longer applies to the new save file
+                self.journal_generation += 1
+                self.journal_size = write_journal_record(self.journal_filename, {"generation": self.journal_generation},
+                                                         truncate=True)
+                self.journal_max_size = max(len(encoded_save), 1024 * 1024)
+                self.journaled_state = {
+                    "received_items": {key: len(items) for key, items in self.received_items.items()},
+                    "random_state": save["random_state"],
+                    "game_options": save["game_options"],
+                }
         except Exception as e:
+            self.restore_save_changes(changes)
             self.logger.exception(e)
             return False
         else:
             return True
 
-    def init_save(self, enabled: bool = True):
+    def _append_save_journal(self) -> bool:
+        changes = self.take_save_changes()
+        try:
+            delta = self.get_save_delta(changes)
+            if delta:
+                self.journal_size += write_journal_record(self.journal_filename, delta)
+        except Exception as e:
+            self.restore_save_changes(changes)
+            self.logger.exception(e)
+            return False
+        else:
+            for key, (start, items) in delta.get("received_items", {}).items():
+                self.journaled_state.setdefault("received_items", {})[key] = start + len(items)
+            for name in ("random_state", "game_options"):
+                if name in delta:
+                    self.journaled_state[name] = delta[name]
+            return True
+
+    @property
+    def journal_filename(self) -> str:
+        return self.save_filename + ".journal"
+
+    def init_save(self, enabled: bool = True, journal: bool = False):
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
@@ -616,8 +771,24 @@ class Context:
                     self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
+                save_data = {}
             except Exception as e:
                 self.logger.exception(e)
+                save_data = {}
+            self.journal_generation = save_data.get("journal_generation", 0)
+            try:
+                deltas = read_journal(self.journal_filename, self.journal_generation)
+            except FileNotFoundError:
+                pass
+            else:
+                for delta in deltas:
+                    self.apply_save_delta(delta)
+                self.logger.info(f"Replayed {len(deltas)} journal entries on top of the save file")
+            self.recheck_hints()  # indexes the loaded hints
+            self.journal_saves = journal
+            if journal:
+                # compact right away, so the journal starts out empty
+                self._save()
             self._start_async_saving()
 
     def _start_async_saving(self, atexit_save: bool = True):
@@ -669,13 +840,7 @@ class Context:
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
             "stored_data": self.stored_data,
-            "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
-                             "server_password": self.server_password, "password": self.password,
-                             "release_mode": self.release_mode,
-                             "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
-                             "countdown_mode": self.countdown_mode,
-                             "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
+            "game_options": self._get_game_options()
         }
 
         return d
@@ -701,16 +866,7 @@ class Context:
         self.random.setstate(savedata["random_state"])
 
         if "game_options" in savedata:
-            self.hint_cost = savedata["game_options"]["hint_cost"]
-            self.location_check_points = savedata["game_options"]["location_check_points"]
-            self.server_password = savedata["game_options"]["server_password"]
-            self.password = savedata["game_options"]["password"]
-            self.release_mode = savedata["game_options"]["release_mode"]
-            self.remaining_mode = savedata["game_options"]["remaining_mode"]
-            self.collect_mode = savedata["game_options"]["collect_mode"]
-            self.countdown_mode = savedata["game_options"].get("countdown_mode", self.countdown_mode)
-            self.item_cheat = savedata["game_options"]["item_cheat"]
-            self.compatibility = savedata["game_options"]["compatibility"]
+            self._set_game_options(savedata["game_options"])
 
         if "group_collected" in savedata:
             self.group_collected = savedata["group_collected"]
@@ -722,6 +878,105 @@ class Context:
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
             f'for {sum(k[2] for k in self.received_items)} players')
 
+    def _get_game_options(self) -> dict:
+        return {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
+                "server_password": self.server_password, "password": self.password,
+                "release_mode": self.release_mode,
+                "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
+                "countdown_mode": self.countdown_mode,
+                "item_cheat": self.item_cheat, "compatibility": self.compatibility}
+
+    def _set_game_options(self, game_options: dict):
+        self.hint_cost = game_options["hint_cost"]
+        self.location_check_points = game_options["location_check_points"]
+        self.server_password = game_options["server_password"]
+        self.password = game_options["password"]
+        self.release_mode = game_options["release_mode"]
+        self.remaining_mode = game_options["remaining_mode"]
+        self.collect_mode = game_options["collect_mode"]
+        self.countdown_mode = game_options.get("countdown_mode", self.countdown_mode)
+        self.item_cheat = game_options["item_cheat"]
+        self.compatibility = game_options["compatibility"]
+
+    # journaled saving
+
+    def note_save_change(self, name: str, key: typing.Any) -> None:
+        """Remembers that key of the save entry name changed, so the next journal entry only has to write that key."""
+        if self.journal_saves:
+            with self.save_changes_lock:
+                self.save_changes[name].add(key)
+
+    def take_save_changes(self) -> typing.DefaultDict[str, typing.Set[typing.Any]]:
+        """Returns the changes noted since the last call and starts noting anew."""
+        with self.save_changes_lock:
+            changes = self.save_changes
+            self.save_changes = collections.defaultdict(set)
+        return changes
+
+    def restore_save_changes(self, changes: typing.Dict[str, typing.Set[typing.Any]]) -> None:
+        """Notes changes taken for a save that failed again, so the next save writes them."""
+        with self.save_changes_lock:
+            for name, keys in changes.items():
+                self.save_changes[name] |= keys
+
+    def get_save_delta(self, changes: typing.Dict[str, typing.Set[typing.Any]]) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the keys noted in changes as a journal entry for apply_save_delta.
+        Every entry holds the new values, instead of the operations, so replaying an entry twice is harmless.
+        """
+        old = self.journaled_state
+        delta: typing.Dict[str, typing.Any] = {}
+
+        received_items = {}
+        for key in changes.get("received_items", ()):
+            # received items are only ever appended, so only the ones after the journaled length are new
+            start = old.get("received_items", {}).get(key, 0)
+            if len(self.received_items[key]) > start:
+                received_items[key] = (start, self.received_items[key][start:])
+        location_checks = {key: set(self.location_checks[key]) for key in changes.get("location_checks", ())}
+        hints = {key: set(self.hints[key]) for key in changes.get("hints", ())}
+        stored_data = {key: self.stored_data[key] for key in changes.get("stored_data", ()) if key in self.stored_data}
+        hints_used = {key: self.hints_used[key] for key in changes.get("hints_used", ())}
+        client_game_state = {key: self.client_game_state[key] for key in changes.get("client_game_state", ())}
+        group_collected = {group: set(self.group_collected[group]) for group in changes.get("group_collected", ())}
+        for name, entry_changes in (("received_items", received_items), ("location_checks", location_checks),
+                                    ("hints", hints), ("stored_data", stored_data), ("hints_used", hints_used),
+                                    ("client_game_state", client_game_state), ("group_collected", group_collected)):
+            if entry_changes:
+                delta[name] = entry_changes
+
+        for name in ("client_activity_timers", "client_connection_timers"):
+            timers = getattr(self, name)
+            if changes.get(name):
+                delta[name] = {key: timers[key].timestamp() for key in changes[name]}
+        if changes.get("name_aliases"):
+            # aliases can be removed, so they are replaced as a whole
+            delta["name_aliases"] = dict(self.name_aliases)
+        for name, value in (("random_state", self.random.getstate()), ("game_options", self._get_game_options())):
+            if value != old.get(name):
+                delta[name] = value
+        return delta
+
+    def apply_save_delta(self, delta: typing.Dict[str, typing.Any]):
+        for key, (start, items) in delta.get("received_items", {}).items():
+            self.received_items.setdefault(key, [])[start:start + len(items)] = items
+        self.location_checks.update(delta.get("location_checks", {}))
+        self.hints.update(delta.get("hints", {}))
+        self.stored_data.update(delta.get("stored_data", {}))
+        self.hints_used.update(delta.get("hints_used", {}))
+        self.client_game_state.update(delta.get("client_game_state", {}))
+        self.group_collected.update({group: set(players)
+                                     for group, players in delta.get("group_collected", {}).items()})
+        for name in ("client_activity_timers", "client_connection_timers"):
+            getattr(self, name).update({key: datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+                                        for key, value in delta.get(name, {}).items()})
+        if "name_aliases" in delta:
+            self.name_aliases = delta["name_aliases"]
+        if "random_state" in delta:
+            self.random.setstate(delta["random_state"])
+        if "game_options" in delta:
+            self._set_game_options(delta["game_options"])
+
     # rest
 
     def get_hint_cost(self, slot):
@@ -734,6 +989,7 @@ class Context:
         """Refreshes the hints for the specified team/slot. Providing 'None' for either team or slot
         will refresh all teams or all slots respectively. If a set is passed for 'changed', each (team,slot)
         pair that has at least one hint modified will be added to the set.
+        This also adds the hints to hint_index, which catches hints that were added to self.hints directly.
         """
         for hint_team, hint_slot in self.hints:
             if team != hint_team and team is not None:
@@ -741,11 +997,14 @@ class Context:
             if slot != hint_slot and slot is not None:
                 continue  # Check specified slot only, all if slot is None
             new_hints: typing.Set[Hint] = set()
+            self.metrics["hints_rechecked"] += len(self.hints[hint_team, hint_slot])
             for hint in self.hints[hint_team, hint_slot]:
                 new_hint = hint.re_check(self, hint_team)
                 new_hints.add(new_hint)
+                self.index_hint(hint_team, new_hint)
                 if hint == new_hint:
                     continue
+                self.note_save_change("hints", (hint_team, hint_slot))
                 for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
                     if changed is not None:
                         changed.add((hint_team,player))
@@ -753,6 +1012,33 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes the hints for the specified locations of team/slot, which are the only hints that checking
+        those locations can change. If a set is passed for 'changed', each (team,slot) pair that has at least one
+        hint modified will be added to the set.
+        """
+        for location in locations:
+            hints = self.hint_index.pop((team, slot, location), None)
+            if not hints:
+                continue
+            self.metrics["hints_rechecked"] += len(hints)
+            for hint in hints:
+                new_hint = hint.re_check(self, team)
+                if hint == new_hint:
+                    self.index_hint(team, hint)
+                    continue
+                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                    if changed is not None:
+                        changed.add((team, player))
+                    self.replace_hint(team, player, hint, new_hint)
+
+    def index_hint(self, team: int, hint: Hint) -> None:
+        """Adds hint to hint_index, unless it is found already, as then checks can't change it anymore.
+        Stale entries are fine, they get dropped once their location is checked."""
+        if not hint.found or hint.status != HintStatus.HINT_FOUND:
+            self.hint_index[team, hint.finding_player, hint.location].add(hint)
+
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
         return self.hints[team, slot]
@@ -760,11 +1046,11 @@ class Context:
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
-            raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
-                           f"Location or player may not exist.")
+            sphere = self.location_spheres.get(player, {}).get(location_id)
+            if sphere is None:
+                raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
+                               f"Location or player may not exist.")
+            return sphere
         return -1
 
     def get_players_package(self):
@@ -823,6 +1109,7 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.index_hint(team, hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
@@ -830,15 +1117,15 @@ class Context:
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
         for slot in new_hint_events:
+            self.note_save_change("hints", (team, slot))
             self.on_new_hint(team, slot)
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
-                clients = filter(lambda c: not c.no_text, self.clients[team].get(slot, []))
+                clients = [client for client in self.clients[team].get(slot, []) if not client.no_text]
                 if not clients:
                     continue
                 client_hints = [datum[1] for datum in sorted(hint_data, key=lambda x: x[0].finding_player != slot)]
-                for client in clients:
-                    async_start(self.send_msgs(client, client_hints))
+                self.multicast(clients, client_hints)
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
         for hint in self.hints[team, finding_player]:
@@ -850,6 +1137,8 @@ class Context:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self.index_hint(team, new_hint)
+            self.note_save_change("hints", (team, slot))
     
     # "events"
 
@@ -988,12 +1277,14 @@ async def on_client_joined(ctx: Context, client: Client):
                                   "It may stop working in the future. If you are a player, please report this to the "
                                   "client's developer.")
     ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+    ctx.note_save_change("client_connection_timers", (client.team, client.slot))
 
 
 async def on_client_left(ctx: Context, client: Client):
     if len(ctx.clients[client.team][client.slot]) < 1:
         update_client_status(ctx, client, ClientStatus.CLIENT_UNKNOWN)
         ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+        ctx.note_save_change("client_connection_timers", (client.team, client.slot))
 
     version_str = '.'.join(str(x) for x in client.version)
 
@@ -1072,19 +1363,40 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+    """
+    Sends items given through send_items_to to the clients of their receivers.
+    Calls within the same event loop tick are combined into one ReceivedItems per client.
+    """
+    if not ctx.new_item_receivers or ctx.new_items_handle:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # not called from within the server's event loop, so there is nothing to batch with
+        flush_new_items(ctx)
+    else:
+        ctx.new_items_handle = loop.call_soon(flush_new_items, ctx)
+
+
+def flush_new_items(ctx: Context):
+    ctx.new_items_handle = None
+    receivers = ctx.new_item_receivers
+    ctx.new_item_receivers = set()
+    for team, slot in receivers:
+        # clients of a slot that are at the same index and handle the same items get the same message
+        recipients: typing.Dict[typing.Tuple[int, bool, bool], typing.List[Client]] = collections.defaultdict(list)
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if not client.no_items:
+                recipients[client.send_index, client.remote_start_inventory, client.remote_items].append(client)
+        for (send_index, remote_start_inventory, remote_items), clients in recipients.items():
+            start_inventory = get_start_inventory(ctx, slot, remote_start_inventory)
+            items = get_received_items(ctx, team, slot, remote_items)
+            if len(start_inventory) + len(items) > send_index:
+                first_new_item = max(0, send_index - len(start_inventory))
+                ctx.multicast(clients, [{
+                    "cmd": "ReceivedItems",
+                    "index": send_index,
+                    "items": start_inventory[send_index:] + items[first_new_item:]}])
+                for client in clients:
                     client.send_index = len(start_inventory) + len(items)
 
 
@@ -1119,6 +1431,7 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
             if slot in group_players:
                 group_collected_players = ctx.group_collected.setdefault(group, set())
                 group_collected_players.add(slot)
+                ctx.note_save_change("group_collected", group)
                 if set(group_players) == group_collected_players:
                     collect_player(ctx, team, group, True)
 
@@ -1133,6 +1446,9 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.note_save_change("received_items", (team, target, False))
+        ctx.note_save_change("received_items", (team, target, True))
+        ctx.new_item_receivers.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1143,6 +1459,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
     if new_locations:
         if count_activity:
             ctx.client_activity_timers[team, slot] = datetime.datetime.now(datetime.timezone.utc)
+            ctx.note_save_change("client_activity_timers", (team, slot))
 
         sortable: list[tuple[int, int, int, int]] = []
         for location in new_locations:
@@ -1170,6 +1487,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        ctx.note_save_change("location_checks", (team, slot))
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1177,7 +1495,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1644,12 +1962,14 @@ class ClientMessageProcessor(CommonCommandProcessor):
         if alias_name:
             alias_name = alias_name[:16].strip()
             self.ctx.name_aliases[self.client.team, self.client.slot] = alias_name
+            self.ctx.note_save_change("name_aliases", (self.client.team, self.client.slot))
             self.output(f"Hello, {alias_name}")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
             return True
         elif (self.client.team, self.client.slot) in self.ctx.name_aliases:
             del (self.ctx.name_aliases[self.client.team, self.client.slot])
+            self.ctx.note_save_change("name_aliases", (self.client.team, self.client.slot))
             self.output("Removed Alias")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
@@ -1669,6 +1989,9 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.note_save_change("received_items", (self.client.team, self.client.slot, False))
+                self.ctx.note_save_change("received_items", (self.client.team, self.client.slot, True))
+                self.ctx.new_item_receivers.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1689,6 +2012,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
             hints = {hint.re_check(self.ctx, self.client.team) for hint in
                      self.ctx.hints[self.client.team, self.client.slot]}
             self.ctx.hints[self.client.team, self.client.slot] = hints
+            self.ctx.note_save_change("hints", (self.client.team, self.client.slot))
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1780,6 +2104,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     hints.append(hint)
                     can_pay -= 1
                     self.ctx.hints_used[self.client.team, self.client.slot] += 1
+                    self.ctx.note_save_change("hints_used", (self.client.team, self.client.slot))
 
                 self.ctx.notify_hints(self.client.team, hints)
                 if not_found_hints:
@@ -1897,6 +2222,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             await ctx.send_msgs(client, [{"cmd": "ConnectionRefused", "errors": list(errors)}])
         else:
             team, slot = ctx.connect_names[args['name']]
+            ctx.unindex_client_tags(client)
             if client.auth and client.team is not None and client.slot in ctx.clients[client.team]:
                 ctx.clients[team][slot].remove(client)  # re-auth, remove old entry
                 if client.team != team or client.slot != slot:
@@ -1908,6 +2234,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             ctx.clients[team][slot].append(client)
             client.version = args['version']
             client.tags = args['tags']
+            ctx.index_client_tags(client)
             client.no_locations = bool(client.tags & _non_game_messages.keys())
             # set NoText for old PopTracker clients that predate the tag to save traffic
             client.no_text = "NoText" in client.tags or ("PopTracker" in client.tags and client.version < (0, 5, 1))
@@ -1980,7 +2307,9 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
 
             if "tags" in args:
                 old_tags = client.tags
+                ctx.unindex_client_tags(client)
                 client.tags = args["tags"]
+                ctx.index_client_tags(client)
                 if set(old_tags) != set(client.tags):
                     client.no_locations = bool(client.tags & _non_game_messages.keys())
                     client.no_text = "NoText" in client.tags or (
@@ -2147,11 +2476,17 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             args["cmd"] = "Bounced"
             msg = ctx.dumper([args])
 
-            for bounceclient in ctx.endpoints:
-                if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
-                                                         set(bounceclient.tags) & tags or
-                                                         bounceclient.slot in slots):
-                    await ctx.send_encoded_msgs(bounceclient, msg)
+            for game in games:
+                slots.update(ctx.game_slots.get(game, ()))
+            team_clients = ctx.clients[client.team]
+            team_tags = ctx.tag_clients.get(client.team, {})
+            bounceclients: typing.Set[Client] = set()
+            for slot in slots:
+                bounceclients.update(team_clients.get(slot, ()))
+            for tag in tags:
+                bounceclients.update(team_tags.get(tag, ()))
+            if bounceclients:
+                await ctx.broadcast_send_encoded_msgs(bounceclients, msg)
 
         elif cmd == "Get":
             if "keys" not in args or type(args["keys"]) != list:
@@ -2181,6 +2516,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            ctx.note_save_change("stored_data", args["key"])
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", False):
                 targets.add(client)
@@ -2209,6 +2545,7 @@ def update_client_status(ctx: Context, client: Client, new_status: ClientStatus)
                 ctx.broadcast_text_all(f"Team #{client.team + 1} has completed all of their games! Congratulations!")
 
         ctx.client_game_state[client.team, client.slot] = new_status
+        ctx.note_save_change("client_game_state", (client.team, client.slot))
         ctx.on_client_status_change(client.team, client.slot)
         ctx.save()
 
@@ -2249,6 +2586,14 @@ class ServerCommandProcessor(CommonCommandProcessor):
             self.output(get_status_string(self.ctx, team, tag))
         return True
 
+    def _cmd_metrics(self) -> bool:
+        """Get the performance counters of the server, in total and per second since it started."""
+        uptime = time.monotonic() - self.ctx.metrics_start
+        self.output(f"Uptime: {uptime:.0f} seconds")
+        for name, count in sorted(self.ctx.metrics.items()):
+            self.output(f"{name}: {count} ({count / uptime:.2f} per second)")
+        return True
+
     def _cmd_exit(self) -> bool:
         """Shutdown the server"""
         try:
@@ -2268,12 +2613,14 @@ class ServerCommandProcessor(CommonCommandProcessor):
                     if alias_name:
                         alias_name = alias_name.strip()[:15]
                         self.ctx.name_aliases[team, slot] = alias_name
+                        self.ctx.note_save_change("name_aliases", (team, slot))
                         self.output(f"Named {player_name} as {alias_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
                         return True
                     else:
                         del (self.ctx.name_aliases[team, slot])
+                        self.ctx.note_save_change("name_aliases", (team, slot))
                         self.output(f"Removed Alias for {player_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
@@ -2583,6 +2930,9 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--password', default=defaults["password"])
     parser.add_argument('--savefile', default=defaults["savefile"])
     parser.add_argument('--disable_save', default=defaults["disable_save"], action='store_true')
+    parser.add_argument('--journal_save', default=defaults["journal_save"], action='store_true',
+                        help="Append changes to a journal next to the save file, "
+                             "instead of rewriting the whole save file every time.")
     parser.add_argument('--cert', help="Path to a SSL Certificate for encryption.")
     parser.add_argument('--cert_key', help="Path to SSL Certificate Key file")
     parser.add_argument('--loglevel', default=defaults["loglevel"],
@@ -2713,7 +3063,7 @@ async def main(args: argparse.Namespace):
         logging.exception(f"Failed to read multiworld data ({e})")
         raise
 
-    ctx.init_save(not args.disable_save)
+    ctx.init_save(not args.disable_save, args.journal_save)
 
     ssl_context = load_server_cert(args.cert, args.cert_key) if args.cert else None
 
@@ -2741,6 +3091,8 @@ async def main(args: argparse.Namespace):
 client_message_processor = ClientMessageProcessor
 
 if __name__ == '__main__':
+    # only import the worlds of games in the multiworld, unless asked otherwise
+    os.environ.setdefault("LAZY_WORLD_LOADING", "1")
     try:
         asyncio.run(main(parse_args()))
     except asyncio.exceptions.CancelledError:
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 from collections.abc import Mapping, Sequence
+import bisect
 import typing
 import enum
+import math
+import struct
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, restricted_dumps, restricted_loads
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -95,13 +104,60 @@ class NetworkItem(typing.NamedTuple):
     flags: int = 0
 
 
+_json_scalar_types = frozenset((str, int, float, bool, type(None)))
+_TypedTuple_names: typing.Dict[type, str] = {}
+"""Class names of the NamedTuple types encoded so far, as checking for a NamedTuple is comparatively slow."""
+
+
+def _TypedTuple_to_dict(obj: typing.Any) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    name = _TypedTuple_names.get(type(obj), None)
+    if name is None:
+        if not isinstance(obj, tuple) or not hasattr(obj, "_fields"):  # NamedTuple is not actually a parent class
+            return None
+        name = _TypedTuple_names[type(obj)] = obj.__class__.__name__
+    data = dict(zip(obj._fields, obj))
+    data["class"] = name
+    return data
+
+
 def _scan_for_TypedTuples(obj: typing.Any) -> typing.Any:
-    if isinstance(obj, tuple) and hasattr(obj, "_fields"):  # NamedTuple is not actually a parent class
-        data = obj._asdict()
-        data["class"] = obj.__class__.__name__
+    """
+    Converts the NamedTuples in obj to dicts and sets to lists, so they can be encoded.
+    Containers that have nothing to convert in them are returned as they are, instead of being copied.
+    """
+    obj_type = type(obj)
+    name = _TypedTuple_names.get(obj_type, None)
+    if name is not None:
+        data = dict(zip(obj._fields, obj))
+        data["class"] = name
+        return data
+    if obj_type is dict:
+        converted = None
+        for key, value in obj.items():
+            if type(value) not in _json_scalar_types:
+                new_value = _scan_for_TypedTuples(value)
+                if new_value is not value:
+                    if converted is None:
+                        converted = obj.copy()
+                    converted[key] = new_value
+        return obj if converted is None else converted
+    if obj_type is list or obj_type is tuple:
+        converted = None
+        for index, value in enumerate(obj):
+            if type(value) not in _json_scalar_types:
+                new_value = _scan_for_TypedTuples(value)
+                if new_value is not value:
+                    if converted is None:
+                        converted = list(obj)
+                    converted[index] = new_value
+        return obj if converted is None else converted
+    if obj_type in _json_scalar_types:
+        return obj
+    data = _TypedTuple_to_dict(obj)
+    if data is not None:
         return data
     if isinstance(obj, (tuple, list, set, frozenset)):
-        return tuple(_scan_for_TypedTuples(o) for o in obj)
+        return [_scan_for_TypedTuples(o) for o in obj]
     if isinstance(obj, dict):
         return {key: _scan_for_TypedTuples(value) for key, value in obj.items()}
     return obj
@@ -135,10 +191,40 @@ _encode = JSONEncoder(
 ).encode
 
 
-def encode(obj: typing.Any) -> str:
+def encode_json(obj: typing.Any) -> str:
     return _encode(_scan_for_TypedTuples(obj))
 
 
+def _orjson_default(obj: typing.Any) -> typing.Any:
+    data = _TypedTuple_to_dict(obj)
+    if data is not None:
+        return data
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def _contains_non_finite(obj: typing.Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_contains_non_finite(key) or _contains_non_finite(value) for key, value in obj.items())
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        return any(_contains_non_finite(o) for o in obj)
+    return False
+
+
+def encode_orjson(obj: typing.Any) -> str:
+    try:
+        data = orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:  # such as integers beyond 64 bits, which the json module can handle
+        return encode_json(obj)
+    # orjson writes inf, -inf and nan as null, the json module as Infinity, -Infinity and NaN
+    if b"null" in data and _contains_non_finite(obj):
+        return encode_json(obj)
+    return data.decode("utf-8")
+
+
 def get_any_version(data: dict) -> Version:
     data = {key.lower(): value for key, value in data.items()}  # .NET version classes have capitalized keys
     return Version(int(data["major"]), int(data["minor"]), int(data["build"]))
@@ -155,23 +241,37 @@ custom_hooks = {
 }
 
 
-def _object_hook(o: typing.Any) -> typing.Any:
-    if isinstance(o, dict):
-        hook = custom_hooks.get(o.get("class", None), None)
-        if hook:
-            return hook(o)
-        cls = allowlist.get(o.get("class", None), None)
-        if cls:
-            for key in tuple(o):
-                if key not in cls._fields:
-                    del (o[key])
-            return cls(**o)
+def _object_hook(o: typing.Dict[str, typing.Any]) -> typing.Any:
+    class_name = o.get("class", None)
+    if class_name is None:
+        return o
+    hook = custom_hooks.get(class_name, None)
+    if hook:
+        return hook(o)
+    cls = allowlist.get(class_name, None)
+    if cls:
+        try:
+            return cls._make([o[field] for field in cls._fields])
+        except KeyError:  # leave missing fields to their defaults
+            pass
+        for key in tuple(o):
+            if key not in cls._fields:
+                del (o[key])
+        return cls(**o)
 
     return o
 
 
 decode = JSONDecoder(object_hook=_object_hook).decode
 
+codecs: typing.Dict[str, typing.Callable[[typing.Any], str]] = {"json": encode_json}
+"""Available encoders by name. They all decode with the same decode, as orjson's loads plus applying the object hook
+in Python is no faster than the json module calling it."""
+if orjson is not None:
+    codecs["orjson"] = encode_orjson
+codec = "orjson" if "orjson" in codecs else "json"
+encode = codecs[codec]
+
 
 class Endpoint:
     __slots__ = ("socket",)
@@ -427,20 +527,73 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+    _hint_index: typing.Optional[typing.List[typing.Tuple[int, int, int, int, int, int]]] = None
+
+    def __setitem__(self, key: int, value: typing.Dict[int, typing.Tuple[int, int, int]]) -> None:
+        self._hint_index = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: int) -> None:
+        self._hint_index = None
+        super().__delitem__(key)
+
+    def __ior__(self, other: typing.Any) -> _LocationStore:
+        self.update(other)
+        return self
+
+    def update(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        self._hint_index = None
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key: int, default: typing.Any = None) -> typing.Any:
+        self._hint_index = None
+        return super().setdefault(key, default)
+
+    def pop(self, *args: typing.Any) -> typing.Any:
+        self._hint_index = None
+        return super().pop(*args)
+
+    def popitem(self) -> typing.Tuple[int, typing.Dict[int, typing.Tuple[int, int, int]]]:
+        self._hint_index = None
+        return super().popitem()
+
+    def clear(self) -> None:
+        self._hint_index = None
+        super().clear()
+
+    def _get_hint_index(self) -> typing.List[typing.Tuple[int, int, int, int, int, int]]:
+        """
+        Entries as (receiver, item, position, sender, location, flags), sorted by receiver and item, so that hints are a
+        range lookup. Position is the order the entry has in the store. Built on first use and dropped when players get
+        set or removed, the location dicts of the players should not be changed in place.
+        """
+        if self._hint_index is None:
+            entries = ((finding_player, location_id, values) for finding_player, check_data in self.items()
+                       for location_id, values in check_data.items())
+            self._hint_index = sorted((values[1], values[0], position, finding_player, location_id, values[2])
+                                      for position, (finding_player, location_id, values) in enumerate(entries))
+        return self._hint_index
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
-        for finding_player, check_data in self.items():
-            for location_id, (item_id, receiving_player, item_flags) in check_data.items():
-                if receiving_player in slots and item_id == seeked_item_id:
-                    yield finding_player, location_id, item_id, receiving_player, item_flags
+        hint_index = self._get_hint_index()
+        found: typing.List[typing.Tuple[int, int, int, int, int, int]] = []
+        for receiving_player in slots:
+            found += hint_index[bisect.bisect_left(hint_index, (receiving_player, seeked_item_id)):
+                                bisect.bisect_left(hint_index, (receiving_player, seeked_item_id + 1))]
+        if len(slots) > 1:
+            # keep the order of the store across receivers
+            found.sort(key=lambda entry: entry[2])
+        for receiving_player, item_id, _, finding_player, location_id, item_flags in found:
+            yield finding_player, location_id, item_id, receiving_player, item_flags
 
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
-        import collections
-        all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
-        for source_slot, location_data in self.items():
-            for location_id, values in location_data.items():
-                if values[1] == slot:
-                    all_locations[source_slot].add(location_id)
+        hint_index = self._get_hint_index()
+        found = hint_index[bisect.bisect_left(hint_index, (slot,)):bisect.bisect_left(hint_index, (slot + 1,))]
+        found.sort(key=lambda entry: entry[2])
+        all_locations: typing.Dict[int, typing.Set[int]] = {}
+        for _, _, _, source_slot, location_id, _ in found:
+            all_locations.setdefault(source_slot, set()).add(location_id)
         return all_locations
 
     def get_checked(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int, slot: int
@@ -473,6 +626,40 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
                         location_id in player_locations if
                         location_id not in checked])
 
+    @classmethod
+    def from_table(cls, table: typing.Any) -> _LocationStore:
+        return cls(unpack_location_table(table))
+
+
+# Binary location table of multidata format 4. The header is the amount of slots, followed by one entry per location,
+# sorted by sender and location. Entries match the memory layout of _speedups.LocationEntry on little endian hosts.
+location_table_header = struct.Struct("<Q")
+location_table_entry = struct.Struct("<qIIqI4x")  # location, sender, receiver, item, flags
+
+
+def pack_location_table(locations: Mapping[int, Mapping[int, Sequence[int]]]) -> bytes:
+    table = bytearray(location_table_header.pack(len(locations)))
+    for sender, sender_locations in sorted(locations.items()):
+        for location, data in sorted(sender_locations.items()):
+            table += location_table_entry.pack(location, sender, data[1], data[0], data[2] if len(data) > 2 else 0)
+    return bytes(table)
+
+
+def unpack_location_table(table: typing.Any) -> typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]:
+    view = memoryview(table).cast("B")
+    if len(view) < location_table_header.size or \
+            (len(view) - location_table_header.size) % location_table_entry.size:
+        raise ValueError("Invalid location table size")
+    slot_count, = location_table_header.unpack_from(view)
+    locations: typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]] = {
+        slot: {} for slot in range(1, slot_count + 1)
+    }
+    for location, sender, receiver, item, flags in location_table_entry.iter_unpack(view[location_table_header.size:]):
+        if sender not in locations:
+            raise ValueError(f"Invalid player id {sender} for location")
+        locations[sender][location] = item, receiver, flags
+    return locations
+
 
 class MinimumVersions(typing.TypedDict):
     server: tuple[int, int, int]
@@ -510,6 +697,93 @@ class MultiData(typing.TypedDict):
     race_mode: int
 
 
+# Format 4 of .archipelago files, after the format version byte and the length of the section index, is a zlib
+# compressed section index followed by the sections. Locations are stored as a location table, slot_data as a section
+# per slot, so it only gets decoded when needed, and all other keys of MultiData as zlib compressed sections.
+multidata_format_version = 4
+multidata_header = struct.Struct("<BI")  # format version, length of section index
+
+
+class LazySlotData(Mapping[int, typing.Any]):
+    """slot_data of a multidata in format 4, decoding the slot_data of a slot on first access."""
+    _data: memoryview
+    _sections: typing.Dict[int, typing.Tuple[int, int]]
+    _decoded: typing.Dict[int, typing.Any]
+
+    def __init__(self, data: memoryview, sections: typing.Dict[int, typing.Tuple[int, int]]):
+        self._data = data
+        self._sections = sections
+        self._decoded = {}
+
+    def __getitem__(self, slot: int) -> typing.Any:
+        if slot not in self._decoded:
+            offset, length = self._sections[slot]
+            self._decoded[slot] = restricted_loads(zlib.decompress(self._data[offset:offset + length]))
+        return self._decoded[slot]
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def detach(self) -> None:
+        """Copies the still encoded slot_data out of the buffer it was decoded from, so that buffer can be closed."""
+        data = bytearray()
+        sections: typing.Dict[int, typing.Tuple[int, int]] = {}
+        for slot, (offset, length) in self._sections.items():
+            sections[slot] = len(data), length
+            data += self._data[offset:offset + length]
+        self._data = memoryview(bytes(data))
+        self._sections = sections
+
+
+def encode_multidata(multidata: Mapping[str, typing.Any]) -> bytes:
+    """Encode multidata into the contents of an .archipelago file in format 4."""
+    body = bytearray()
+
+    def add_section(data: bytes) -> typing.Tuple[int, int]:
+        offset = len(body)
+        body.extend(data)
+        return offset, len(data)
+
+    index: typing.Dict[str, typing.Any] = {}
+    for key, value in multidata.items():
+        if key == "locations":
+            index[key] = add_section(pack_location_table(value))
+        elif key == "slot_data":
+            index[key] = {slot: add_section(zlib.compress(restricted_dumps(slot_data), 9))
+                          for slot, slot_data in value.items()}
+        else:
+            index[key] = add_section(zlib.compress(restricted_dumps(value), 9))
+    compressed_index = zlib.compress(restricted_dumps(index), 9)
+    return multidata_header.pack(multidata_format_version, len(compressed_index)) + compressed_index + body
+
+
+def decode_multidata(data: typing.Any) -> typing.Dict[str, typing.Any]:
+    """Decode the contents of an .archipelago file in format 4 from any buffer, like bytes or an mmap.
+    locations are returned as LocationStore and slot_data as LazySlotData, which keeps a reference to data."""
+    view = memoryview(data).cast("B")
+    format_version, index_length = multidata_header.unpack_from(view)
+    if format_version != multidata_format_version:
+        raise ValueError(f"Expected multidata format {multidata_format_version}, got {format_version}")
+    body_start = multidata_header.size + index_length
+    index: typing.Dict[str, typing.Any] = restricted_loads(zlib.decompress(view[multidata_header.size:body_start]))
+    multidata: typing.Dict[str, typing.Any] = {}
+    for key, section in index.items():
+        if key == "slot_data":
+            multidata[key] = LazySlotData(view, {slot: (body_start + offset, length)
+                                                 for slot, (offset, length) in section.items()})
+            continue
+        offset, length = section
+        section_data = view[body_start + offset:body_start + offset + length]
+        if key == "locations":
+            multidata[key] = LocationStore.from_table(section_data)
+        else:
+            multidata[key] = restricted_loads(zlib.decompress(section_data))
+    return multidata
+
+
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
 else:
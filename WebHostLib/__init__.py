@@ -47,6 +47,8 @@ app.config["JOB_THRESHOLD"] = 1
 app.config["JOB_TIME"] = 600
 # memory limit for generator processes in bytes
 app.config["GENERATOR_MEMORY_LIMIT"] = 4294967296
+# import worlds once in a fork server and fork a generator process per job from it, if supported by the platform
+app.config["GENERATOR_PRELOAD"] = False
 
 # waitress uses one thread for I/O, these are for processing of views that then get sent
 # archipelago.gg uses gunicorn + nginx; ignoring this option
@@ -58,7 +60,11 @@ app.config["PONY"] = {
     'create_db': True
 }
 app.config["MAX_ROLL"] = 20
+# processes to parse and roll uploaded options files in, 0 to roll them in the web-thread
+app.config["ROLL_WORKERS"] = 0
 app.config["CACHE_TYPE"] = "SimpleCache"
+# estimated bytes of decoded seeds and multisaves kept in memory for trackers, per process
+app.config["TRACKER_CACHE_SIZE"] = 256 * 1024 * 1024
 app.config["HOST_ADDRESS"] = ""
 app.config["ASSET_RIGHTS"] = False
 
@@ -1,4 +1,5 @@
 import json
+import time
 from uuid import UUID
 
 from flask import request, session, url_for
@@ -50,7 +51,9 @@ def generate_api():
             return {"text": "Max size of multiworld exceeded",
                     "detail": app.config["MAX_ROLL"]}, 409
         meta = get_meta(meta_options_source, race)
-        results, gen_options = roll_options(options, set(meta["plando_options"]))
+        roll_start = time.perf_counter()
+        results, gen_options = roll_options(options, set(meta["plando_options"]), app.config["ROLL_WORKERS"])
+        meta["timings"] = {"roll_settings": time.perf_counter() - roll_start}
         if any(type(result) == str for result in results.values()):
             return {"text": str(results),
                     "detail": results}, 400
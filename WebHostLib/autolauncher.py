@@ -3,6 +3,8 @@ from __future__ import annotations
 import json
 import logging
 import multiprocessing
+import os
+import time
 import typing
 from datetime import timedelta, datetime
 from threading import Event, Thread
@@ -14,6 +16,7 @@ from pony.orm import db_session, select, commit, PrimaryKey
 from Utils import restricted_loads
 from .locker import Locker, AlreadyRunningException
 
+_import_start = time.perf_counter()
 _stop_event = Event()
 
 
@@ -45,7 +48,14 @@ def _mp_gen_game(
 ) -> PrimaryKey | None:
     from setproctitle import setproctitle
 
+    global _import_time
+
     setproctitle(f"Generator ({sid})")
+    if meta is None:
+        meta = {}
+    # only the first job of a process that imported the worlds itself pays for the import
+    meta.setdefault("timings", {})["import"] = _import_time if _import_pid == os.getpid() else 0.0
+    _import_time = 0.0
     try:
         return gen_game(gen_options, meta=meta, owner=owner, sid=sid, timeout=timeout)
     finally:
@@ -141,14 +151,26 @@ def autohost(config: dict):
     Thread(target=keep_running, name="AP_Autohost").start()
 
 
+def get_generator_context(config: dict) -> tuple[multiprocessing.context.BaseContext, int]:
+    """Returns the multiprocessing context and maxtasksperchild to run Generator processes with."""
+    if config["GENERATOR_PRELOAD"]:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            # the fork server imports the worlds once, each job then runs in a fresh fork of it
+            context.set_forkserver_preload(["__main__", __name__])
+            return context, 1
+        logging.warning("GENERATOR_PRELOAD is not supported on this platform, falling back to regular Generators.")
+    return multiprocessing.get_context(), 10
+
+
 def autogen(config: dict):
     def keep_running():
         stop_event = _stop_event
         try:
             with Locker("autogen"):
-
-                with multiprocessing.Pool(config["GENERATORS"], initializer=init_generator,
-                                          initargs=(config,), maxtasksperchild=10) as generator_pool:
+                context, maxtasksperchild = get_generator_context(config)
+                with context.Pool(config["GENERATORS"], initializer=init_generator,
+                                  initargs=(config,), maxtasksperchild=maxtasksperchild) as generator_pool:
                     job_time = config["JOB_TIME"]
                     with db_session:
                         to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
@@ -228,3 +250,6 @@ class MultiworldInstance():
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
 from .customserver import run_server_process, get_static_server_data
 from .generate import gen_game
+
+_import_time = time.perf_counter() - _import_start
+_import_pid = os.getpid()
@@ -1,7 +1,12 @@
+import argparse
 import os
+import random
 import zipfile
 import base64
+import threading
 from collections.abc import Set
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any
 
 from flask import request, flash, redirect, url_for, render_template
 from markupsafe import Markup
@@ -9,8 +14,8 @@ from markupsafe import Markup
 from WebHostLib import app
 from WebHostLib.upload import allowed_options, allowed_options_extensions, banned_file
 
-from Generate import roll_settings, PlandoOptions
-from Utils import parse_yamls
+from Generate import parse_weights_yamls, parse_weights_yamls_in_pool, roll_settings, roll_settings_in_pool, \
+    start_roll_pool, PlandoOptions
 
 
 @app.route('/check', methods=['GET', 'POST'])
@@ -25,7 +30,7 @@ def check():
             if isinstance(options, str):
                 flash(options)
             else:
-                results, _ = roll_options(options)
+                results, _ = roll_options(options, roll_workers=app.config["ROLL_WORKERS"])
                 if len(options) > 1:
                     # offer combined file back
                     combined_yaml = "\n---\n".join(f"# original filename: {file_name}\n{file_content.decode('utf-8-sig')}"
@@ -85,29 +90,79 @@ def get_yaml_data(files) -> dict[str, str] | str | Markup:
 
 
 def roll_options(options: dict[str, dict | str],
-                 plando_options: Set[str] = frozenset({"bosses", "items", "connections", "texts"})) -> \
+                 plando_options: Set[str] = frozenset({"bosses", "items", "connections", "texts"}),
+                 roll_workers: int = 0) -> \
+        tuple[dict[str, str | bool], dict[str, dict]]:
+    if roll_workers > 0 and len(options) > 1:
+        return _roll_options(options, plando_options, get_roll_pool(roll_workers))
+    return _roll_options(options, plando_options)
+
+
+_roll_pool: ProcessPoolExecutor | None = None
+_roll_pool_lock = threading.Lock()
+
+
+def get_roll_pool(roll_workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the pool of this process to roll options in. It is started on first use and then kept, as starting one
+    imports all worlds again in each of its processes.
+    """
+    global _roll_pool
+    with _roll_pool_lock:
+        if _roll_pool is None:
+            _roll_pool = start_roll_pool(roll_workers)
+        return _roll_pool
+
+
+def _name_documents(filename: str, yaml_datas: tuple[Any, ...]) -> dict[str, Any]:
+    if len(yaml_datas) == 1:
+        return {filename: yaml_datas[0]}
+    return {f"{filename}/{i + 1}": yaml_data for i, yaml_data in enumerate(yaml_datas) if yaml_data is not None}
+
+
+def _roll_options(options: dict[str, dict | str], plando_options: Set[str], roll_pool: Executor | None = None) -> \
         tuple[dict[str, str | bool], dict[str, dict]]:
     plando_options = PlandoOptions.from_set(set(plando_options))
     results: dict[str, str | bool] = {}
     rolled_results: dict[str, dict] = {}
+    parsed: dict[str, tuple[Any, ...] | Exception] = {}
+    pool_settings: dict[str, argparse.Namespace | Exception] = {}
+    if roll_pool:
+        texts = {filename: text for filename, text in options.items() if type(text) is not dict}
+        parsed = dict(zip(texts, parse_weights_yamls_in_pool(list(texts.values()), roll_pool)))
+        to_roll: dict[str, Any] = {}
+        for filename, text in options.items():
+            yaml_datas = (text, ) if type(text) is dict else parsed[filename]
+            if not isinstance(yaml_datas, Exception):
+                to_roll.update(_name_documents(filename, yaml_datas))
+        roll_seeds = [random.getrandbits(64) for _ in to_roll]
+        pool_settings = dict(zip(to_roll, roll_settings_in_pool(roll_pool, list(to_roll.values()), plando_options,
+                                                                roll_seeds)))
+
+    def roll(name: str, yaml_data: Any) -> argparse.Namespace:
+        if name not in pool_settings:
+            return roll_settings(yaml_data, plando_options=plando_options)
+        settings = pool_settings[name]
+        if isinstance(settings, Exception):
+            raise settings
+        return settings
+
     for filename, text in options.items():
         try:
             if type(text) is dict:
                 yaml_datas = (text, )
+            elif filename in parsed:
+                yaml_datas = parsed[filename]
+                if isinstance(yaml_datas, Exception):
+                    raise yaml_datas
             else:
-                yaml_datas = tuple(parse_yamls(text))
+                yaml_datas = parse_weights_yamls(text)
         except Exception as e:
             results[filename] = f"Failed to parse YAML data in {filename}: {e}"
         else:
             try:
-                if len(yaml_datas) == 1:
-                    rolled_results[filename] = roll_settings(yaml_datas[0],
-                                                             plando_options=plando_options)
-                else:
-                    for i, yaml_data in enumerate(yaml_datas):
-                        if yaml_data is not None:
-                            rolled_results[f"{filename}/{i + 1}"] = roll_settings(yaml_data,
-                                                                                  plando_options=plando_options)
+                for name, yaml_data in _name_documents(filename, yaml_datas).items():
+                    rolled_results[name] = roll(name, yaml_data)
             except Exception as e:
                 if e.__cause__:
                     results[filename] = f"Failed to generate options in {filename}: {e} - {e.__cause__}"
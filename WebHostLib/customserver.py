@@ -10,7 +10,6 @@ import pickle
 import random
 import socket
 import threading
-import time
 import typing
 import sys
 
@@ -60,6 +59,64 @@ class DBCommandProcessor(ServerCommandProcessor):
         self.ctx.logger.info(text)
 
 
+class CommandDispatcher:
+    """
+    Fetches the pending Commands of all rooms hosted by this process with a single query
+    and hands each of them to the event loop of its room.
+    """
+    poll_interval: float = 1.0
+
+    def __init__(self):
+        self.processors: typing.Dict[typing.Any, DBCommandProcessor] = {}  # room id -> processor
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread: typing.Optional[threading.Thread] = None
+
+    def register(self, ctx: WebHostContext):
+        with self.lock:
+            self.processors[ctx.room_id] = DBCommandProcessor(ctx)
+            if not self.thread:
+                self.thread = threading.Thread(target=self.run, name="CommandDispatcher", daemon=True)
+                self.thread.start()
+        self.notify()  # pick up commands that were sent while the room was offline
+
+    def unregister(self, ctx: WebHostContext):
+        with self.lock:
+            if ctx.room_id in self.processors and self.processors[ctx.room_id].ctx is ctx:
+                del self.processors[ctx.room_id]
+
+    def notify(self):
+        """Fetch commands right away, instead of at the next poll."""
+        self.wakeup.set()
+
+    def run(self):
+        while 1:
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+            with self.lock:
+                processors = {room_id: processor for room_id, processor in self.processors.items()
+                              if not processor.ctx.exit_event.is_set()}
+            if processors:
+                try:
+                    self.dispatch(processors)
+                except Exception as e:
+                    logging.exception(e)
+
+    @staticmethod
+    @db_session
+    def dispatch(processors: typing.Dict[typing.Any, DBCommandProcessor]):
+        room_ids = list(processors)
+        commands = select(command for command in Command if command.room.id in room_ids).order_by(Command.id)[:]
+        for command in commands:
+            processor = processors[command.room.id]
+            processor.ctx.main_loop.call_soon_threadsafe(processor, command.commandtext)
+            command.delete()
+        commit()
+
+
+command_dispatcher = CommandDispatcher()
+
+
 class WebHostContext(Context):
     room_id: int
 
@@ -89,19 +146,8 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            with db_session:
-                commands = select(command for command in Command if command.room.id == self.room_id)
-                if commands:
-                    for command in commands:
-                        self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                        command.delete()
-                    commit()
-            del commands
-            time.sleep(5)
+    def _load_multiworld_game_data(self, games: typing.AbstractSet[str]):
+        pass  # static server data already covers all worlds
 
     @db_session
     def load(self, room_id: int):
@@ -158,7 +204,7 @@ class WebHostContext(Context):
                 if savegame_data:
                     self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
             self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
+        command_dispatcher.register(self)
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
@@ -342,6 +388,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 try:
                     ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
                     ctx.exit_event.set()  # make sure the saving thread stops at some point
+                    command_dispatcher.unregister(ctx)
                     # NOTE: async saving should probably be an async task and could be merged with shutdown_task
                     with db_session:
                         # ensure the Room does not spin up again on its own, minute of safety buffer
@@ -3,6 +3,7 @@ import json
 import os
 import random
 import tempfile
+import time
 import zipfile
 from collections import Counter
 from pickle import PicklingError
@@ -78,7 +79,9 @@ def format_exception(e: BaseException) -> str:
 
 
 def start_generation(options: dict[str, dict | str], meta: dict[str, Any]):
-    results, gen_options = roll_options(options, set(meta["plando_options"]))
+    roll_start = time.perf_counter()
+    results, gen_options = roll_options(options, set(meta["plando_options"]), app.config["ROLL_WORKERS"])
+    meta["timings"] = {"roll_settings": time.perf_counter() - roll_start}
 
     if any(type(result) == str for result in results.values()):
         return render_template("checkResult.html", results=results)
@@ -122,6 +125,8 @@ def gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=None,
     if meta is None:
         meta = {}
 
+    # seconds spent per stage, reported back to the Generation and stored with the Seed
+    timings: dict[str, float] = meta.setdefault("timings", {})
     meta.setdefault("server_options", {}).setdefault("hint_cost", 10)
     race = meta.setdefault("generator_options", {}).setdefault("race", False)
 
@@ -169,9 +174,18 @@ def gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=None,
             args.name[player] = handle_name(args.name[player], player, name_counter)
         if len(set(args.name.values())) != len(args.name):
             raise Exception(f"Names have to be unique. Names: {Counter(args.name.values())}")
-        ERmain(args, seed, baked_server_options=meta["server_options"])
+        ERmain(args, seed, baked_server_options=meta["server_options"], stage_timings=timings)
 
-        return upload_to_db(target.name, sid, owner, race)
+        if sid:
+            with db_session:
+                gen = Generation.get(id=sid)
+                if gen is not None:
+                    gen_meta = json.loads(gen.meta)
+                    gen_meta["timings"] = timings
+                    gen.meta = json.dumps(gen_meta)
+                    commit()
+
+        return upload_to_db(target.name, sid, owner, race, timings)
 
     thread_pool = DaemonThreadPoolExecutor(max_workers=1)
     thread = thread_pool.submit(task)
@@ -188,6 +202,7 @@ def gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=None,
                     meta["error"] = ("Allowed time for Generation exceeded, " +
                                      "please consider generating locally instead. " +
                                      format_exception(e))
+                    meta["timings"] = timings
                     gen.meta = json.dumps(meta)
                     commit()
     except (KeyboardInterrupt, SystemExit):
@@ -201,6 +216,7 @@ def gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=None,
                     gen.state = STATE_ERROR
                     meta = json.loads(gen.meta)
                     meta["error"] = format_exception(e)
+                    meta["timings"] = timings
                     gen.meta = json.dumps(meta)
                     commit()
         raise
@@ -228,13 +244,16 @@ def wait_seed(seed: UUID):
     return render_template("waitSeed.html", seed_id=seed_id)
 
 
-def upload_to_db(folder, sid, owner, race):
+def upload_to_db(folder, sid, owner, race, timings: dict[str, float] | None = None):
+    meta: dict[str, Any] = {"race": race}
+    if timings:
+        meta["timings"] = timings
     for file in os.listdir(folder):
         file = os.path.join(folder, file)
         if file.endswith(".zip"):
             with db_session:
                 with zipfile.ZipFile(file) as zfile:
-                    res = upload_zip_to_db(zfile, owner, {"race": race}, sid)
+                    res = upload_zip_to_db(zfile, owner, meta, sid)
                 if type(res) == "str":
                     raise Exception(res)
                 elif res:
@@ -1,7 +1,9 @@
 import datetime
 import collections
+import hashlib
+import threading
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
@@ -24,20 +26,132 @@ TeamPlayer = Tuple[int, int]
 ItemMetadata = Tuple[int, int, int]
 
 
-def _cache_results(func: Callable) -> Callable:
-    """Stores the results of any computationally expensive methods after the initial call in TrackerData.
-    If called again, returns the cached result instead, as results will not change for the lifetime of TrackerData.
+def _cached_in(cache_name: str) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        def method_wrapper(self: "TrackerData", *args):
+            results = getattr(self, cache_name)
+            cache_key = f"{func.__name__}{''.join(f'_[{arg.__repr__()}]' for arg in args)}"
+            if cache_key in results:
+                return results[cache_key]
+
+            result = func(self, *args)
+            results[cache_key] = result
+            return result
+
+        return method_wrapper
+
+    return decorator
+
+
+_cache_results = _cached_in("_tracker_cache")
+"""Stores the results of any computationally expensive methods after the initial call in TrackerData.
+If called again, returns the cached result instead, as results will not change for the same multisave.
+The results are shared between all requests for the same multisave, so they must not be modified by callers.
+"""
+
+_cache_request_results = _cached_in("_request_cache")
+"""Like _cache_results, but only for the lifetime of one TrackerData, for results that depend on the current time."""
+
+
+class TrackerDataCache:
+    """Process wide LRU cache for the decoded data behind TrackerData, limited to an estimated amount of bytes.
+
+    Sizes are estimated from the serialized data the entries were loaded from, so the actual memory use is a multiple
+    of max_size. The newest entry is always kept, even if it alone is larger than max_size.
+    Without a max_size, the TRACKER_CACHE_SIZE of the app config at the time of insertion is used.
     """
-    def method_wrapper(self: "TrackerData", *args):
-        cache_key = f"{func.__name__}{''.join(f'_[{arg.__repr__()}]' for arg in args)}"
-        if cache_key in self._tracker_cache:
-            return self._tracker_cache[cache_key]
+    max_size: Optional[int]
+    size: int
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: collections.OrderedDict[Hashable, Tuple[int, Any]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, factory: Callable[[], Tuple[int, Any]]) -> Any:
+        """Returns the value stored for key, or creates and stores it with factory, which returns (size, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        # load outside the lock, so a large seed does not block other rooms. Concurrent misses may load twice.
+        size, value = factory()
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[0]
+            self._entries[key] = size, value
+            self.size += size
+            max_size = app.config["TRACKER_CACHE_SIZE"] if self.max_size is None else self.max_size
+            while self.size > max_size and len(self._entries) > 1:
+                self.size -= self._entries.popitem(last=False)[1][0]
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+@dataclass
+class _SeedData:
+    """Everything TrackerData needs from a seed, which does not change after upload."""
+    multidata: Dict[str, Any]
+    item_id_to_name: Dict[str, Dict[int, str]]
+    location_id_to_name: Dict[str, Dict[int, str]]
+    item_name_to_id: Dict[str, Dict[str, int]]
+    location_name_to_id: Dict[str, Dict[str, int]]
+    location_spheres: Optional[Dict[int, Dict[int, int]]] = None
+    """Built on first use by TrackerData.get_location_spheres."""
+
+
+@dataclass
+class _SaveData:
+    """An unpickled multisave with the results of TrackerData methods derived from it."""
+    multisave: Dict[str, Any]
+    tracker_cache: Dict[str, Any]
+
 
-        result = func(self, *args)
-        self._tracker_cache[cache_key] = result
-        return result
+tracker_data_cache = TrackerDataCache()
 
-    return method_wrapper
+
+def _load_seed_data(room: Room) -> Tuple[int, _SeedData]:
+    multidata_blob = room.seed.multidata
+    size = len(multidata_blob)
+    multidata = Context.decompress(multidata_blob)
+
+    item_name_to_id: Dict[str, Dict[str, int]] = {}
+    location_name_to_id: Dict[str, Dict[str, int]] = {}
+
+    # Generate inverse lookup tables from data package, useful for trackers.
+    item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+        game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
+    })
+    location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+        game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
+    })
+    for game, game_package in multidata["datapackage"].items():
+        game_package_blob = GameDataPackage.get(checksum=game_package["checksum"]).data
+        size += len(game_package_blob)
+        game_package = restricted_loads(game_package_blob)
+        item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
+            id: name for name, id in game_package["item_name_to_id"].items()})
+        location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
+            id: name for name, id in game_package["location_name_to_id"].items()})
+
+        # Normal lookup tables as well.
+        item_name_to_id[game] = game_package["item_name_to_id"]
+        location_name_to_id[game] = game_package["location_name_to_id"]
+
+    return size, _SeedData(multidata, item_id_to_name, location_id_to_name, item_name_to_id, location_name_to_id)
 
 
 @dataclass
@@ -45,40 +159,41 @@ class TrackerData:
     """A helper dataclass that is instantiated each time an HTTP request comes in for tracker data.
 
     Provides helper methods to lazily load necessary data that each tracker require and caches any results so any
-    subsequent helper method calls do not need to recompute results during the lifetime of this instance.
+    subsequent helper method calls do not need to recompute results. Decoded seeds and multisaves, as well as the
+    results derived from them, are kept in tracker_data_cache, so they are shared with later requests for the same
+    seed or multisave.
     """
     room: Room
+    _seed_data: _SeedData
     _multidata: Dict[str, Any]
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
+    _request_cache: Dict[str, Any]
 
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
-        self._tracker_cache = {}
-
-        self.item_name_to_id: Dict[str, Dict[str, int]] = {}
-        self.location_name_to_id: Dict[str, Dict[str, int]] = {}
-
-        # Generate inverse lookup tables from data package, useful for trackers.
-        self.item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
-        })
-        self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
-        })
-        for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
-
-            # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+        seed_data: _SeedData = tracker_data_cache.get(("seed", room.seed.id), lambda: _load_seed_data(room))
+        self._seed_data = seed_data
+        self._multidata = seed_data.multidata
+        self.item_id_to_name = seed_data.item_id_to_name
+        self.location_id_to_name = seed_data.location_id_to_name
+        self.item_name_to_id = seed_data.item_name_to_id
+        self.location_name_to_id = seed_data.location_name_to_id
+
+        multisave_blob = room.multisave
+        if multisave_blob:
+            # the room has no save counter, so the content of the multisave is its version
+            multisave_version = hashlib.blake2b(multisave_blob, digest_size=16).digest()
+            save_data: _SaveData = tracker_data_cache.get(
+                ("save", room.id, multisave_version),
+                lambda: (len(multisave_blob), _SaveData(restricted_loads(multisave_blob), {})))
+            self._multisave = save_data.multisave
+            self._tracker_cache = save_data.tracker_cache
+        else:
+            self._multisave = {}
+            self._tracker_cache = {}
+        self._request_cache = {}
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -139,7 +254,7 @@ class TrackerData:
         """Retrieves a set of all hints relevant for a particular player."""
         return self._multisave.get("hints", {}).get((team, player), set())
 
-    @_cache_results
+    @_cache_request_results
     def get_player_last_activity(self, team: int, player: int) -> Optional[datetime.timedelta]:
         """Retrieves the relative timedelta for when a particular player was last active.
         Returns None if no activity was ever recorded.
@@ -267,7 +382,7 @@ class TrackerData:
 
         return long_player_names
 
-    @_cache_results
+    @_cache_request_results
     def get_room_last_activity(self) -> Dict[TeamPlayer, datetime.timedelta]:
         """Retrieves a dictionary of all players and the timedelta from now to their last activity.
         Does not include players who have no activity recorded.
@@ -296,6 +411,24 @@ class TrackerData:
         """ each sphere is { player: { location_id, ... } } """
         return self._multidata.get("spheres", [])
 
+    def get_location_spheres(self) -> Dict[int, Dict[int, int]]:
+        """Retrieves the index of the sphere of every location, as { player: { location_id: sphere, ... } }."""
+        if self._seed_data.location_spheres is None:
+            self._seed_data.location_spheres = Context.index_spheres(self.get_spheres())
+        return self._seed_data.location_spheres
+
+    @_cache_results
+    def get_checked_locations_by_sphere(self, team: int) -> List[Tuple[int, int, List[int]]]:
+        """Retrieves the checked locations with a sphere on a team, grouped as (sphere, player, [location_id, ...]) and
+        sorted by sphere and player."""
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for player, location_spheres in self.get_location_spheres().items():
+            for location_id in self.get_player_checked_locations(team, player):
+                sphere = location_spheres.get(location_id)
+                if sphere is not None:
+                    groups.setdefault((sphere, player), []).append(location_id)
+        return [(sphere, player, groups[sphere, player]) for sphere, player in sorted(groups)]
+
 
 def _process_if_request_valid(incoming_request: Request, room: Optional[Room]) -> Optional[Response]:
     if not room:
@@ -1244,7 +1377,9 @@ if "Starcraft 2" in network_data_package["games"]:
         UPGRADE_RESEARCH_COST_ITEM_ID = 1808
         REDUCED_MAX_SUPPLY_ITEM_ID = 1850
         slot_data = tracker_data.get_slot_data(player)
-        inventory: collections.Counter[int] = tracker_data.get_player_inventory_counts(team, player)
+        # copied, as bundled upgrades are written into it below
+        inventory: collections.Counter[int] = collections.Counter(
+            tracker_data.get_player_inventory_counts(team, player))
         item_id_to_name = tracker_data.item_id_to_name["Starcraft 2"]
         location_id_to_name = tracker_data.location_id_to_name["Starcraft 2"]
 
@@ -1,6 +1,5 @@
 #cython: language_level=3
 #distutils: language = c
-#distutils: depends = intset.h
 
 """
 Provides faster implementation of some core parts.
@@ -9,11 +8,14 @@ This is deliberately .pyx because using a non-compiled "pure python" may be slow
 
 # pip install cython cymem
 import cython
+import sys
 import warnings
 from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
-from libc.stdint cimport int64_t, uint32_t
+from libc.stdint cimport int64_t, uint32_t, uint64_t, INT64_MIN, INT64_MAX
+from libc.stdlib cimport qsort
+from libc.string cimport memcpy
 from collections import defaultdict
 
 cdef extern from *:
@@ -31,27 +33,6 @@ ctypedef int64_t ap_id_t
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
 cdef size_t INVALID_SIZE = <size_t>(-1)  # this is all 0xff... adding 1 results in 0, but it's not negative
 
-# configure INTSET for player
-cdef extern from *:
-    """
-    #define INTSET_NAME ap_player_set
-    #define INTSET_TYPE uint32_t  // has to match ap_player_t
-    """
-
-# create INTSET for player
-cdef extern from "intset.h":
-    """
-    #undef INTSET_NAME
-    #undef INTSET_TYPE
-    """
-    ctypedef struct ap_player_set:
-        pass
-
-    ap_player_set* ap_player_set_new(size_t bucket_count) nogil
-    void ap_player_set_free(ap_player_set* set) nogil
-    bint ap_player_set_add(ap_player_set* set, ap_player_t val) nogil
-    bint ap_player_set_contains(ap_player_set* set, ap_player_t val) nogil
-
 
 cdef struct LocationEntry:
     # layout is so that
@@ -69,6 +50,23 @@ cdef struct IndexEntry:
     size_t count
 
 
+cdef struct HintEntry:
+    # sort key of the hint index, followed by the position of the entry in LocationStore.entries
+    ap_player_t receiver
+    ap_id_t item
+    size_t index
+
+
+cdef int _compare_hint_entries(const void* a, const void* b) noexcept nogil:
+    cdef const HintEntry* x = <const HintEntry*>a
+    cdef const HintEntry* y = <const HintEntry*>b
+    if x.receiver != y.receiver:
+        return -1 if x.receiver < y.receiver else 1
+    if x.item != y.item:
+        return -1 if x.item < y.item else 1
+    return -1 if x.index < y.index else x.index > y.index
+
+
 if TYPE_CHECKING:
     State = Dict[Tuple[int, int], Set[int]]
 else:
@@ -92,6 +90,7 @@ cdef class LocationStore:
     cdef size_t entry_count
     cdef IndexEntry* sender_index  # 16KB/1000 players
     cdef size_t sender_index_size
+    cdef HintEntry* hint_index  # 2.4MB/100k items, sorted by receiver and item, built on first hint
     cdef list _keys  # ~36KB/1000 players, speed up iter (28 per int + 8 per list entry)
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
@@ -106,11 +105,12 @@ cdef class LocationStore:
         size += sum(sizeof(item) for item in self._items)
         size += sum(sizeof(proxy) for proxy in self._proxies)
         size += sizeof(self._raw_proxies[0]) * self.sender_index_size
+        if self.hint_index:
+            size += sizeof(HintEntry) * self.entry_count
         return size
 
     def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
         self._mem = Pool()
-        cdef object key
         self._keys = []
         self._items = []
         self._proxies = []
@@ -172,7 +172,12 @@ cdef class LocationStore:
                 self.sender_index[sender].count += 1
                 i += 1
 
+        self._build_caches(count, max_sender, sender_count)
+
+    cdef _build_caches(self, size_t count, size_t max_sender, size_t sender_count):
         # build pyobject caches
+        cdef object key
+        cdef size_t i
         self._proxies.append(None)  # player 0
         assert self.sender_index[0].count == 0
         for i in range(1, max_sender + 1):
@@ -190,6 +195,62 @@ cdef class LocationStore:
         self.entry_count = count
         self._len = sender_count
 
+    @classmethod
+    def from_table(cls, table: Any) -> LocationStore:
+        """Create a store from a location table as written by NetUtils.pack_location_table.
+
+        The table is read from any buffer, like bytes or an mmap, and copied as is on little endian hosts."""
+        if sys.byteorder != "little" or sizeof(LocationEntry) != 32:
+            # entries in the table don't match the native layout
+            from NetUtils import unpack_location_table
+            return cls(unpack_location_table(table))
+
+        cdef const unsigned char[::1] data = table
+        cdef size_t size = data.shape[0]
+        if size < sizeof(uint64_t) or (size - sizeof(uint64_t)) % sizeof(LocationEntry):
+            raise ValueError("Invalid location table size")
+        cdef uint64_t sender_count
+        memcpy(&sender_count, &data[0], sizeof(uint64_t))
+        if not sender_count:
+            raise ValueError(f"Rejecting game with 0 players")
+        if sender_count > MAX_PLAYER_ID:
+            raise ValueError(f"Invalid player id {sender_count} for location")
+        cdef size_t count = (size - sizeof(uint64_t)) // sizeof(LocationEntry)
+        if not count:
+            warnings.warn("Game has no locations")
+
+        cdef LocationStore store = cls.__new__(cls)
+        store._mem = Pool()
+        store._keys = []
+        store._items = []
+        store._proxies = []
+        if count:
+            store.entries = <LocationEntry*>store._mem.alloc(count, sizeof(LocationEntry))
+            memcpy(store.entries, &data[sizeof(uint64_t)], count * sizeof(LocationEntry))
+        store.sender_index = <IndexEntry*>store._mem.alloc(sender_count + 1, sizeof(IndexEntry))
+        store._raw_proxies = <PyObject**>store._mem.alloc(sender_count + 1, sizeof(PyObject*))
+
+        # validate the table and build the index, locations are required to be sorted by sender, then location
+        cdef size_t i
+        cdef LocationEntry* entry
+        cdef LocationEntry* previous = NULL
+        for i in range(count):
+            entry = store.entries + i
+            if entry.sender < 1 or entry.sender > sender_count:
+                raise ValueError(f"Invalid player id {entry.sender} for location")
+            if entry.receiver < 1 or entry.receiver > MAX_PLAYER_ID:
+                raise ValueError(f"Invalid player id {entry.receiver} for item")
+            if previous and (entry.sender < previous.sender or
+                             entry.sender == previous.sender and entry.location <= previous.location):
+                raise ValueError("Location table is not sorted")
+            if not store.sender_index[entry.sender].count:
+                store.sender_index[entry.sender].start = i
+            store.sender_index[entry.sender].count += 1
+            previous = entry
+
+        store._build_caches(count, sender_count, sender_count)
+        return store
+
     # fake dict access
     def __len__(self) -> int:
         return self._len
@@ -215,47 +276,69 @@ cdef class LocationStore:
         return self._items
 
     # specialized accessors
+    cdef HintEntry* _get_hint_index(self):
+        cdef size_t i
+        if not self.hint_index and self.entry_count:
+            self.hint_index = <HintEntry*>self._mem.alloc(self.entry_count, sizeof(HintEntry))
+            for i in range(self.entry_count):
+                self.hint_index[i].receiver = self.entries[i].receiver
+                self.hint_index[i].item = self.entries[i].item
+                self.hint_index[i].index = i
+            # ties are ordered by index, so ranges of the hint index keep the order of entries
+            qsort(self.hint_index, self.entry_count, sizeof(HintEntry), _compare_hint_entries)
+        return self.hint_index
+
+    cdef size_t _hint_bound(self, ap_player_t receiver, ap_id_t item, bint upper) noexcept nogil:
+        # binary search for the first entry after (upper) or not before (lower) receiver and item in the hint index
+        cdef size_t l = 0
+        cdef size_t r = self.entry_count
+        cdef size_t m
+        cdef HintEntry* entry
+        while l < r:
+            m = (l + r) // 2
+            entry = self.hint_index + m
+            if entry.receiver < receiver or entry.receiver == receiver and (
+                    entry.item < item or upper and entry.item == item):
+                l = m + 1
+            else:
+                r = m
+        return l
+
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
         cdef ap_player_t receiver
-        cdef ap_player_set* receivers
-        cdef size_t slot_count = len(slots)
-        if slot_count == 1:
-            # specialized implementation for single slot
-            receiver = list(slots)[0]
-            with nogil:
-                for entry in self.entries[:self.entry_count]:
-                    if entry.item == item and entry.receiver == receiver:
-                        with gil:
-                            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-        elif slot_count:
-            # generic implementation with lookup in set
-            receivers = ap_player_set_new(min(1023, slot_count))  # limit top level struct to 16KB
-            if not receivers:
-                raise MemoryError()
-            try:
-                for receiver in slots:
-                    if not ap_player_set_add(receivers, receiver):
-                        raise MemoryError()
-                with nogil:
-                    for entry in self.entries[:self.entry_count]:
-                        if entry.item == item and ap_player_set_contains(receivers, entry.receiver):
-                            with gil:
-                                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-            finally:
-                ap_player_set_free(receivers)
+        cdef size_t i
+        cdef LocationEntry* entry
+        if not self._get_hint_index():
+            return
+        positions: List[int] = []
+        for slot in slots:
+            receiver = slot
+            for i in range(self._hint_bound(receiver, item, False), self._hint_bound(receiver, item, True)):
+                positions.append(self.hint_index[i].index)
+        if len(slots) > 1:
+            # keep the order of entries across receivers
+            positions.sort()
+        for i in positions:
+            entry = self.entries + i
+            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
         cdef ap_player_t receiver = slot
+        cdef size_t i
+        cdef LocationEntry* entry
         all_locations: Dict[int, Set[int]] = {}
-        with nogil:
-            for entry in self.entries[:self.entry_count]:
-                if entry.receiver == receiver:
-                    with gil:
-                        sender: int = entry.sender
-                        if sender not in all_locations:
-                            all_locations[sender] = set()
-                        all_locations[sender].add(entry.location)
+        if not self._get_hint_index():
+            return all_locations
+        positions: List[int] = [self.hint_index[i].index for i in range(self._hint_bound(receiver, INT64_MIN, False),
+                                                                        self._hint_bound(receiver, INT64_MAX, True))]
+        positions.sort()
+        for i in positions:
+            entry = self.entries + i
+            sender: int = entry.sender
+            if sender not in all_locations:
+                all_locations[sender] = set()
+            all_locations[sender].add(entry.location)
         return all_locations
 
     def get_checked(self, state: State, team: int, slot: int) -> List[int]:
@@ -25,25 +25,25 @@ __all__ = [
 no_gui = False
 skip_autosave = False
 _world_settings_name_cache: dict[str, str] = {}  # TODO: cache on disk and update when worlds change
-_world_settings_name_cache_updated = False
+_world_settings_name_cache_updated = 0  # number of worlds the cache was updated from, worlds can be loaded lazily
 _lock = Lock()
 
 
 def _update_cache() -> None:
     """Load all worlds and update world_settings_name_cache"""
     global _world_settings_name_cache_updated
-    if _world_settings_name_cache_updated:
+    from worlds.AutoWorld import AutoWorldRegister
+    if _world_settings_name_cache_updated == len(AutoWorldRegister.world_types):
         return
 
     try:
-        from worlds.AutoWorld import AutoWorldRegister
         for world in AutoWorldRegister.world_types.values():
             annotation = world.__annotations__.get("settings", None)
             if annotation is None or annotation == "ClassVar[Optional['Group']]":
                 continue
             _world_settings_name_cache[world.settings_key] = f"{world.__module__}.{world.__name__}"
     finally:
-        _world_settings_name_cache_updated = True
+        _world_settings_name_cache_updated = len(AutoWorldRegister.world_types)
 
 
 def fmt_doc(cls: type, level: int) -> str:
@@ -535,6 +535,12 @@ class ServerOptions(Group):
     class DisableItemCheat(Bool):
         """Disallow !getitem"""
 
+    class JournalSave(Bool):
+        """
+        Append changes to a journal next to the save file, which gets compacted into the save file once it grows too big
+        Saves a lot of disk writes for large multiworlds
+        """
+
     class LocationCheckPoints(int):
         """
         Client hint system
@@ -615,6 +621,7 @@ class ServerOptions(Group):
     multidata: str | None = None
     savefile: str | None = None
     disable_save: bool = False
+    journal_save: JournalSave | bool = False
     loglevel: str = "info"
     logtime: bool = False
     server_password: ServerPassword | None = None
@@ -687,6 +694,12 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class DeltaWorkers(int):
+        """
+        Amount of processes to create bsdiff4 patches in while writing output files.
+        0 -> Create them in the threads writing the output files
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -696,6 +709,7 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    delta_workers: DeltaWorkers = DeltaWorkers(0)
     loglevel: str = "info"
     logtime: bool = False
 
@@ -421,6 +421,9 @@ class BuildExeCommand(cx_Freeze.command.build_exe.build_exe):
                     zf.writestr(apworld.manifest_path, json.dumps(manifest))
                     folders_to_remove.append(file_name)
                 shutil.rmtree(world_directory)
+        # lets Generate and MultiServer import only the worlds they need
+        from worlds import write_world_manifest
+        write_world_manifest(str(self.libfolder / "worlds"))
         shutil.copyfile("meta.yaml", self.buildfolder / "Players" / "Templates" / "meta.yaml")
         try:
             from maseya import z3pr  # type: ignore[import-untyped]
@@ -0,0 +1,75 @@
+def run_fill_benchmark(games: tuple[str, ...] = ("Pokemon Emerald", "Timespinner"), players: int = 50,
+                       seed: int = 0, runs: int = 2) -> None:
+    """
+    Run a benchmark of the main fill on a large multiworld.
+
+    :param games: Games to cycle through when assigning worlds to players.
+    :param players: Amount of players in the generated multiworld.
+    :param seed: Seed to generate with, so that every run fills the same multiworld.
+    :param runs: How often to generate and fill the multiworld.
+    """
+    import argparse
+    import gc
+    import logging
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    # the worlds import Fill themselves, so they have to be loaded first
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+    from BaseClasses import CollectionState, MultiWorld
+    from Fill import distribute_items_restrictive
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    gen_steps = (
+        "generate_early",
+        "create_regions",
+        "create_items",
+        "set_rules",
+        "connect_entrances",
+        "generate_basic",
+        "pre_fill",
+    )
+
+    def setup_multiworld() -> MultiWorld:
+        multiworld = MultiWorld(players)
+        multiworld.game = {player: games[(player - 1) % len(games)] for player in multiworld.player_ids}
+        multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+        multiworld.set_seed(seed)
+        args = argparse.Namespace()
+        for player in multiworld.player_ids:
+            world_type = AutoWorld.AutoWorldRegister.world_types[multiworld.game[player]]
+            for name, option in world_type.options_dataclass.type_hints.items():
+                values = getattr(args, name, {})
+                values[player] = option.from_any(option.default)
+                setattr(args, name, values)
+        multiworld.set_options(args)
+        multiworld.state = CollectionState(multiworld)
+        for step in gen_steps:
+            call_all(multiworld, step)
+        return multiworld
+
+    for run in range(1, runs + 1):
+        with TimeIt(f"generating {players} players up to fill", logger):
+            multiworld = setup_multiworld()
+        gc.collect()
+        with TimeIt(f"fill run {run}", logger):
+            distribute_items_restrictive(multiworld)
+        del multiworld
+
+
+if __name__ == "__main__":
+    import argparse
+    from path_change import change_home
+    change_home()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", nargs="+", default=["Pokemon Emerald", "Timespinner"])
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=2)
+    args = parser.parse_args()
+    run_fill_benchmark(tuple(args.games), args.players, args.seed, args.runs)
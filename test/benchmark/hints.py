@@ -0,0 +1,55 @@
+def run_hints_benchmark(slots: int = 1000, locations: int = 300, hints: int = 1000) -> None:
+    """
+    Run a benchmark of the hint lookups of both LocationStore implementations, as used by !hint and collect,
+    against a synthetic room.
+
+    :param slots: Amount of slots in the synthetic room.
+    :param locations: Amount of locations per slot, each with a random item for a random slot.
+    :param hints: Amount of find_item and get_for_player calls per implementation.
+    """
+    import logging
+    import random
+
+    from time_it import TimeIt
+
+    from NetUtils import LocationStore, _LocationStore
+    from Utils import init_logging
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    rng = random.Random(0)
+    items = 1000
+    location_data = {slot: {location: (rng.randrange(items), rng.randint(1, slots), 0)
+                            for location in range(locations)}
+                     for slot in range(1, slots + 1)}
+    hint_requests = [({rng.randint(1, slots)}, rng.randrange(items)) for _ in range(hints)]
+
+    implementations = {"_LocationStore": _LocationStore}
+    if LocationStore is not _LocationStore:
+        implementations["LocationStore"] = LocationStore
+    for name, implementation in implementations.items():
+        store = implementation(location_data)
+        found = 0
+        with TimeIt(f"{name} first find_item, including the hint index", logger):
+            found += len(list(store.find_item(*hint_requests[0])))
+        with TimeIt(f"{name} {hints} find_item", logger) as timer:
+            for slot_set, item in hint_requests:
+                found += len(list(store.find_item(slot_set, item)))
+        logger.info(f"{name} {hints / timer.dif:.0f} hints per second, found {found} items")
+        with TimeIt(f"{name} {hints} get_for_player", logger):
+            for slot_set, _ in hint_requests:
+                store.get_for_player(next(iter(slot_set)))
+
+
+if __name__ == "__main__":
+    import argparse
+    from path_change import change_home
+    change_home()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=1000)
+    parser.add_argument("--locations", type=int, default=300)
+    parser.add_argument("--hints", type=int, default=1000)
+    args = parser.parse_args()
+    run_hints_benchmark(args.slots, args.locations, args.hints)
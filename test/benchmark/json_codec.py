@@ -0,0 +1,120 @@
+def legacy_encode(obj) -> str:
+    """The encode that NetUtils used before codecs, copying every container while converting NamedTuples."""
+    from NetUtils import _encode
+
+    def scan(o):
+        if isinstance(o, tuple) and hasattr(o, "_fields"):
+            data = o._asdict()
+            data["class"] = o.__class__.__name__
+            return data
+        if isinstance(o, (tuple, list, set, frozenset)):
+            return tuple(scan(value) for value in o)
+        if isinstance(o, dict):
+            return {key: scan(value) for key, value in o.items()}
+        return o
+
+    return _encode(scan(obj))
+
+
+def legacy_object_hook(o):
+    """The object hook that NetUtils used before codecs, constructing NamedTuples by keyword."""
+    from NetUtils import allowlist, custom_hooks
+
+    if isinstance(o, dict):
+        hook = custom_hooks.get(o.get("class", None), None)
+        if hook:
+            return hook(o)
+        cls = allowlist.get(o.get("class", None), None)
+        if cls:
+            for key in tuple(o):
+                if key not in cls._fields:
+                    del (o[key])
+            return cls(**o)
+    return o
+
+
+def run_json_codec_benchmark(slots: int = 100, locations: int = 1000, repeats: int = 5) -> None:
+    """
+    Run a benchmark of encoding and decoding the ReceivedItems, PrintJSON and Connected packets of a synthetic room,
+    comparing the legacy codec against every codec in NetUtils.codecs.
+
+    :param slots: Amount of slots in the synthetic room.
+    :param locations: Amount of locations per slot, half of them checked. ReceivedItems holds this many items.
+    :param repeats: Amount of times each packet is timed over 10 runs, the fastest time is reported.
+    """
+    import json
+    import logging
+    import random
+    import timeit
+
+    import MultiServer
+    import NetUtils
+    from NetUtils import NetworkItem, NetworkSlot, SlotType
+    from Utils import init_logging, version_tuple
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    rng = random.Random(0)
+    multidata = {
+        "version": version_tuple,
+        "minimum_versions": {"server": (0, 0, 0), "clients": {slot: (0, 0, 0) for slot in range(1, slots + 1)}},
+        "slot_info": {slot: NetworkSlot(f"Player{slot}", "Archipelago", SlotType.player)
+                      for slot in range(1, slots + 1)},
+        "seed_name": "Benchmark",
+        "connect_names": {f"Player{slot}": (0, slot) for slot in range(1, slots + 1)},
+        "locations": {slot: {location: (rng.randrange(1000), rng.randint(1, slots), rng.choice((0, 1, 2, 4)))
+                             for location in range(1, locations + 1)}
+                      for slot in range(1, slots + 1)},
+        "slot_data": {slot: {"options": {f"option{option}": rng.randrange(10) for option in range(50)}}
+                      for slot in range(1, slots + 1)},
+        "er_hint_data": {},
+        "precollected_items": {slot: [] for slot in range(1, slots + 1)},
+        "precollected_hints": {slot: set() for slot in range(1, slots + 1)},
+    }
+    ctx = MultiServer.Context("localhost", 0, None, None, 0, 0, False, logger=logging.getLogger("Server"))
+    ctx._load(multidata, {}, False)
+    ctx.location_checks[0, 1] = set(range(1, locations // 2 + 1))
+
+    items = [NetworkItem(item, location, slot, flags) for slot in range(1, slots + 1)
+             for location, (item, target, flags) in ctx.locations[slot].items() if target == 1][:locations]
+    packets = {
+        "ReceivedItems": [{"cmd": "ReceivedItems", "index": 0, "items": items}],
+        "PrintJSON": [MultiServer.json_format_send_event(item, 1) for item in items[:140]],
+        "Connected": [{
+            "cmd": "Connected",
+            "team": 0, "slot": 1,
+            "players": ctx.get_players_package(),
+            "missing_locations": MultiServer.get_missing_checks(ctx, 0, 1),
+            "checked_locations": MultiServer.get_checked_checks(ctx, 0, 1),
+            "slot_info": ctx.slot_info,
+            "hint_points": MultiServer.get_slot_points(ctx, 0, 1),
+            "slot_data": ctx.slot_data[1],
+        }],
+    }
+
+    legacy_decode = json.JSONDecoder(object_hook=legacy_object_hook).decode
+    codecs = {"legacy": (legacy_encode, legacy_decode),
+              **{name: (encode, NetUtils.decode) for name, encode in NetUtils.codecs.items()}}
+    for packet_name, packet in packets.items():
+        data = NetUtils.encode(packet)
+        results = []
+        for codec_name, (encode, decode) in codecs.items():
+            assert decode(encode(packet)) == NetUtils.decode(data), f"{codec_name} changed {packet_name}"
+            encode_time = min(timeit.repeat(lambda: encode(packet), number=10, repeat=repeats)) / 10
+            decode_time = min(timeit.repeat(lambda: decode(data), number=10, repeat=repeats)) / 10
+            results.append(f"{codec_name}: {encode_time * 1000:.3f} ms encode, {decode_time * 1000:.3f} ms decode")
+        logger.info(f"{packet_name} ({len(data)} bytes) {', '.join(results)}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from path_change import change_home
+    change_home()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=100)
+    parser.add_argument("--locations", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    run_json_codec_benchmark(args.slots, args.locations, args.repeats)
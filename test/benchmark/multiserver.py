@@ -0,0 +1,115 @@
+def run_multiserver_benchmark(slots: int = 100, clients: int = 2000, checks: int = 2000, text: bool = False) -> None:
+    """
+    Run a load benchmark of a local MultiServer, with many connected clients and a stream of location checks.
+
+    :param slots: Amount of slots in the synthetic multiworld, every slot has as many locations as checks / slots.
+    :param clients: Amount of websocket clients, spread evenly across all slots. Has to be at least slots.
+    :param checks: Amount of location checks to send, one per LocationChecks packet.
+    :param text: If the clients should also receive PrintJSON for every item sent in their team.
+    """
+    import asyncio
+    import functools
+    import logging
+    import random
+
+    import websockets
+    from time_it import TimeIt
+
+    import MultiServer
+    from NetUtils import NetworkSlot, SlotType, decode, encode
+    from Utils import init_logging, version_tuple
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    assert clients >= slots, "every slot needs a client to send its checks"
+    locations_per_slot = max(1, checks // slots)
+    rng = random.Random(0)
+    multidata = {
+        "version": version_tuple,
+        "minimum_versions": {"server": (0, 0, 0), "clients": {slot: (0, 0, 0) for slot in range(1, slots + 1)}},
+        "slot_info": {slot: NetworkSlot(f"Player{slot}", "Archipelago", SlotType.player)
+                      for slot in range(1, slots + 1)},
+        "seed_name": "Benchmark",
+        "connect_names": {f"Player{slot}": (0, slot) for slot in range(1, slots + 1)},
+        "locations": {slot: {location: (location, rng.randint(1, slots), 0)
+                             for location in range(1, locations_per_slot + 1)}
+                      for slot in range(1, slots + 1)},
+        "slot_data": {slot: {} for slot in range(1, slots + 1)},
+        "er_hint_data": {},
+        "precollected_items": {slot: [] for slot in range(1, slots + 1)},
+        "precollected_hints": {slot: set() for slot in range(1, slots + 1)},
+    }
+    expected_items = sum(clients // slots + (target <= clients % slots)
+                         for locations in multidata["locations"].values()
+                         for _, target, _ in locations.values())
+
+    async def run() -> None:
+        ctx = MultiServer.Context("localhost", 0, None, None, 0, 0, False, logger=logging.getLogger("Server"))
+        ctx.logger.setLevel(logging.WARNING)
+        ctx._load(multidata, {}, False)
+        ctx.server = websockets.serve(functools.partial(MultiServer.server, ctx=ctx), host="localhost", port=0,
+                                      extensions=[MultiServer.server_per_message_deflate_factory])
+        server = await ctx.server
+        port = server.sockets[0].getsockname()[1]
+
+        received = 0
+        all_received = asyncio.Event()
+
+        async def receive(socket) -> None:
+            nonlocal received
+            async for data in socket:
+                for msg in decode(data):
+                    if msg["cmd"] == "ReceivedItems":
+                        received += len(msg["items"])
+                        if received >= expected_items:
+                            all_received.set()
+
+        async def connect(slot: int, tags: list[str]) -> websockets.WebSocketClientProtocol:
+            socket = await websockets.connect(f"ws://localhost:{port}", max_size=None)
+            await socket.recv()  # RoomInfo
+            await socket.send(encode([{
+                "cmd": "Connect", "password": None, "game": "Archipelago", "name": f"Player{slot}",
+                "uuid": f"benchmark-{slot}", "version": version_tuple, "items_handling": 0b111,
+                "tags": tags if text else tags + ["NoText"], "slot_data": False,
+            }]))
+            assert decode(await socket.recv())[0]["cmd"] == "Connected"
+            return socket
+
+        with TimeIt(f"connecting {clients} clients", logger):
+            # the first client of each slot is the game sending the checks, all others are trackers
+            sockets = [await connect(client % slots + 1, ["Tracker"] if client >= slots else [])
+                       for client in range(clients)]
+        readers = [asyncio.create_task(receive(socket)) for socket in sockets]
+
+        with TimeIt(f"sending {checks} checks and receiving {expected_items} items", logger):
+            sent = 0
+            for slot in range(1, slots + 1):
+                for location in range(1, locations_per_slot + 1):
+                    await sockets[slot - 1].send(encode([{"cmd": "LocationChecks", "locations": [location]}]))
+                    sent += 1
+            await all_received.wait()
+        logger.info(f"{sent} checks delivered to {clients} clients")
+
+        for reader in readers:
+            reader.cancel()
+        for socket in sockets:
+            await socket.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    import argparse
+    from path_change import change_home
+    change_home()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--text", action="store_true", help="also send PrintJSON to all clients")
+    args = parser.parse_args()
+    run_multiserver_benchmark(args.slots, args.clients, args.checks, args.text)
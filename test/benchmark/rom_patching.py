@@ -0,0 +1,148 @@
+def legacy_apply_tokens(rom_data: bytearray, token_data: bytes) -> None:
+    """The byte by byte token application that APPatchExtension.apply_tokens used before RomBuffer."""
+    from worlds.Files import APTokenTypes
+
+    token_count = int.from_bytes(token_data[0:4], "little")
+    bpr = 4
+    for _ in range(token_count):
+        token_type = token_data[bpr:bpr + 1][0]
+        offset = int.from_bytes(token_data[bpr + 1:bpr + 5], "little")
+        size = int.from_bytes(token_data[bpr + 5:bpr + 9], "little")
+        data = token_data[bpr + 9:bpr + 9 + size]
+        if token_type in [APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8]:
+            arg = data[0]
+            if token_type == APTokenTypes.AND_8:
+                rom_data[offset] = rom_data[offset] & arg
+            elif token_type == APTokenTypes.OR_8:
+                rom_data[offset] = rom_data[offset] | arg
+            else:
+                rom_data[offset] = rom_data[offset] ^ arg
+        elif token_type in [APTokenTypes.COPY, APTokenTypes.RLE]:
+            length = int.from_bytes(data[:4], "little")
+            value = int.from_bytes(data[4:], "little")
+            if token_type == APTokenTypes.COPY:
+                rom_data[offset: offset + length] = rom_data[value: value + length]
+            else:
+                rom_data[offset: offset + length] = bytes([value] * length)
+        else:
+            rom_data[offset:offset + len(data)] = data
+        bpr += 9 + size
+
+
+def legacy_write_snes_checksum(rom_data: bytearray) -> None:
+    """The SNES checksum that APPatchExtension.calc_snes_crc and ALttP's LocalRom.write_crc used before RomBuffer."""
+    crc = (sum(rom_data[:0x7FDC] + rom_data[0x7FE0:]) + 0x01FE) & 0xFFFF
+    inv = crc ^ 0xFFFF
+    rom_data[0x7FDC:0x7FE0] = [inv & 0xFF, (inv >> 8) & 0xFF, crc & 0xFF, (crc >> 8) & 0xFF]
+
+
+def legacy_n64_cic6105_crc(data: bytes) -> tuple[int, int]:
+    """The word by word CRC that Ocarina of Time's calculate_crc used before RomBuffer."""
+    import itertools
+
+    t1 = t2 = t3 = t4 = t5 = t6 = 0xDF26F436
+    u32 = 0xFFFFFFFF
+    m1 = data[0x1000:0x101000]
+    words = (int.from_bytes(m1[i:i + 4], "big") for i in range(0, len(m1), 4))
+    m2 = data[0x750:0x850]
+    words2 = [int.from_bytes(m2[i:i + 4], "big") for i in range(0, len(m2), 4)]
+    for d, d2 in zip(words, itertools.cycle(words2)):
+        if ((t6 + d) & u32) < t6:
+            t4 += 1
+        t6 = (t6 + d) & u32
+        t3 ^= d
+        shift = d & 0x1F
+        r = ((d << shift) | (d >> (32 - shift)))
+        t5 += r
+        if t2 > d:
+            t2 ^= r & u32
+        else:
+            t2 ^= t6 ^ d
+        t1 += d2 ^ d
+    return (t6 ^ t4 ^ t3) & u32, (t5 ^ t2 ^ t1) & u32
+
+
+def run_rom_patching_benchmark(rom_size: int = 0x400000, tokens: int = 20000, repeats: int = 5) -> None:
+    """
+    Run a benchmark of the patch steps that run on the whole ROM, per game that uses them, comparing the byte by byte
+    implementations against RomBuffer with and without NumPy.
+    Base ROMs are not needed, every game patches the same synthetic ROM and token file.
+
+    :param rom_size: Size of the synthetic ROM in bytes.
+    :param tokens: Amount of tokens in the synthetic token file, an even mix of all token types.
+    :param repeats: Amount of times each step is run, the fastest run is reported.
+    """
+    import logging
+    import random
+    import time
+    from unittest import mock
+
+    from Utils import init_logging
+    from worlds import RomBuffer
+    from worlds.Files import APTokenMixin, APTokenTypes, AutoPatchRegister
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    rng = random.Random(0)
+    rom = rng.randbytes(max(rom_size, 0x101000))
+    token_patch = APTokenMixin()
+    for token in range(tokens):
+        token_type = APTokenTypes(token % len(APTokenTypes))
+        offset = rng.randrange(len(rom) - 64)
+        if token_type == APTokenTypes.WRITE:
+            token_patch.write_token(token_type, offset, rng.randbytes(rng.randint(1, 64)))
+        elif token_type in (APTokenTypes.COPY, APTokenTypes.RLE):
+            token_patch.write_token(token_type, offset, (rng.randint(1, 64), rng.randrange(256)))
+        else:
+            token_patch.write_token(token_type, offset, rng.randrange(256))
+    token_data = token_patch.get_token_binary()
+
+    implementations = {
+        "apply_tokens": (lambda data: legacy_apply_tokens(data, token_data),
+                         lambda data: RomBuffer.apply_tokens(data, token_data)),
+        "calc_snes_crc": (legacy_write_snes_checksum, RomBuffer.write_snes_checksum),
+        "n64_cic6105_crc": (legacy_n64_cic6105_crc, RomBuffer.n64_cic6105_crc),
+    }
+    backends = {"byte by byte": 0, "RomBuffer": 1, "RomBuffer without NumPy": 1}
+
+    def measure(steps: list[str], backend: str) -> float:
+        numpy = None if backend.endswith("without NumPy") else RomBuffer.numpy
+        with mock.patch.object(RomBuffer, "numpy", numpy):
+            fastest = float("inf")
+            for _ in range(repeats):
+                data = bytearray(rom)
+                start = time.perf_counter()
+                for step in steps:
+                    implementations[step][backends[backend]](data)
+                fastest = min(fastest, time.perf_counter() - start)
+        return fastest
+
+    games: dict[str, list[str]] = {
+        # these write their checksum outside of APProcedurePatch procedures
+        "A Link to the Past": ["calc_snes_crc"],
+        "Ocarina of Time": ["n64_cic6105_crc"],
+    }
+    for patch_type in AutoPatchRegister.patch_types.values():
+        steps = [step[0] for step in getattr(patch_type, "procedure", None) or () if step[0] in implementations]
+        if steps:
+            games.setdefault(patch_type.game, steps)
+
+    if RomBuffer.numpy is None:
+        del backends["RomBuffer without NumPy"]
+    for game, steps in sorted(games.items()):
+        results = ", ".join(f"{backend}: {measure(steps, backend) * 1000:.2f} ms" for backend in backends)
+        logger.info(f"{game} ({', '.join(steps)}) {results}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from path_change import change_home
+    change_home()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rom_size", type=int, default=0x400000)
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    run_rom_patching_benchmark(args.rom_size, args.tokens, args.repeats)
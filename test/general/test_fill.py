@@ -4,8 +4,8 @@ import unittest
 from Options import Accessibility
 from test.general import generate_items, generate_locations, generate_test_multiworld
 from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
-from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
+    distribute_early_items, distribute_items_restrictive, _ReachabilityIndex
+from BaseClasses import CollectionState, Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
 
@@ -463,6 +463,24 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_unfilled_locations_keep_order(self):
+        """Test that the locations left over after a partial fill stay in their original order"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 6, 2)
+        player2 = generate_player_data(multiworld, 2, 6, 0)
+        player1.locations[0].progress_type = LocationProgressType.EXCLUDED
+        add_item_rule(player1.locations[1], lambda item: False)
+        set_rule(player2.locations[0], lambda state: False)
+        locations = [location for pair in zip(player1.locations, player2.locations) for location in pair]
+        expected_order = locations.copy()
+        items = player1.prog_items.copy()
+
+        fill_restrictive(multiworld, multiworld.state, locations, player1.prog_items, allow_partial=True)
+
+        self.assertEqual(player2.locations[1].item, items[1])
+        self.assertEqual(player1.locations[2].item, items[0])
+        self.assertEqual(locations, [location for location in expected_order if not location.item])
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -856,6 +874,27 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
         self.assertRegionContains(
             self.player1.regions[1], self.player2.prog_items[0])
 
+    def test_reports_swaps_and_resweeps(self) -> None:
+        """Test that progression balancing reports how many items it swapped and how often it had to sweep again"""
+        self.multiworld.worlds[self.player1.id].options.progression_balancing.value = 50
+        self.multiworld.worlds[self.player2.id].options.progression_balancing.value = 50
+
+        with self.assertLogs(level="INFO") as logs:
+            balance_multiworld_progression(self.multiworld)
+
+        self.assertIn("INFO:root:Progression balancing swapped 1 items, re-indexed the spheres 1 times and tested the "
+                      "reachability of 120 locations.", logs.output)
+
+    def test_reachability_index_hints(self) -> None:
+        """Test that locations a previous index found by a sphere are taken as reachable by it, without testing them"""
+        locations = self.multiworld.get_locations()
+        later = set(self.player2.regions[1].locations)
+        index = _ReachabilityIndex(CollectionState(self.multiworld), locations, 1,
+                                   {location: 1 for location in later})
+        sphere = index.get_sphere(1)
+        self.assertEqual(set(self.player1.regions[1].locations) | later, sphere)
+        self.assertEqual(len(locations) - len(later), index.tested)
+
     def test_skips_balancing_progression(self) -> None:
         """Test that progression balancing is skipped when players have it disabled"""
         self.multiworld.worlds[self.player1.id].options.progression_balancing.value = 0
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+
+import Fill
+from BaseClasses import CollectionState
+from Fill import distribute_items_restrictive
+from GenerationProfiler import GenerationProfiler
+from worlds.AutoWorld import AutoWorldRegister
+from worlds.generic.Rules import add_rule, set_rule
+
+from . import setup_multiworld
+
+
+class TestGenerationProfiler(unittest.TestCase):
+    def test_profile_fill(self) -> None:
+        """Test that the fill is attributed to functions, worlds and rules, and that everything is restored after."""
+        world_types = [AutoWorldRegister.world_types["Timespinner"], AutoWorldRegister.world_types["Raft"]]
+        multiworld = setup_multiworld(world_types, seed=0)
+        location = next(location for location in multiworld.get_locations() if "access_rule" in location.__dict__)
+        location_rule = location.access_rule
+        update_reachable_regions = CollectionState.update_reachable_regions
+        fill_restrictive = Fill.fill_restrictive
+
+        with GenerationProfiler(multiworld) as profiler:
+            self.assertIsNot(location_rule, location.access_rule)
+            distribute_items_restrictive(multiworld)
+
+        self.assertIs(location_rule, location.access_rule)
+        self.assertIs(update_reachable_regions, CollectionState.update_reachable_regions)
+        self.assertIs(fill_restrictive, Fill.fill_restrictive)
+        report = profiler.report()
+        self.assertEqual({"fill_restrictive", "sweep_for_advancements", "update_reachable_regions"},
+                         {function["name"] for function in report["functions"]})
+        self.assertEqual({1, 2}, {world["player"] for world in report["worlds"]})
+        self.assertTrue(any(rule["kind"] == "Entrance" and rule["calls"] for rule in report["rules"]))
+        self.assertTrue(any(rule["kind"] == "Location" and rule["calls"] for rule in report["rules"]))
+        self.assertAlmostEqual(profiler.duration, sum(profiler.folded.values()), delta=profiler.duration / 100)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "profile")
+            profiler.write_report(path)
+            with open(f"{path}.json", encoding="utf-8") as report_file:
+                self.assertEqual(report["seed_name"], json.load(report_file)["seed_name"])
+            with open(f"{path}.folded", encoding="utf-8") as folded_file:
+                for line in folded_file:
+                    stack, microseconds = line.rsplit(" ", 1)
+                    self.assertTrue(stack.startswith("fill"), line)
+                    self.assertGreater(int(microseconds), 0)
+
+    def test_rules_changed_while_profiling(self) -> None:
+        """Test that access rules set or extended while profiling are kept when the profiler exits."""
+        multiworld = setup_multiworld([AutoWorldRegister.world_types["Timespinner"]], seed=0)
+        locations = list(multiworld.get_locations())
+        set_location, added_location, kept_location = locations[:3]
+        kept_rule = kept_location.access_rule
+
+        def new_rule(state: CollectionState) -> bool:
+            return True
+
+        with GenerationProfiler(multiworld):
+            set_rule(set_location, new_rule)
+            add_rule(added_location, new_rule)
+            added_rule = added_location.access_rule
+
+        self.assertIs(new_rule, set_location.access_rule)
+        self.assertIs(added_rule, added_location.access_rule)
+        self.assertIs(kept_rule, kept_location.access_rule)
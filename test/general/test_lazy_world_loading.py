@@ -0,0 +1,97 @@
+import dataclasses
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import Utils
+import worlds
+from worlds import WorldSource, network_data_package
+from worlds.AutoWorld import AutoWorldRegister
+
+
+class TestLazyWorldLoading(unittest.TestCase):
+    manifest: worlds.WorldManifest
+
+    def setUp(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "manifest.json")
+            worlds.write_world_manifest(worlds.local_folder, path)
+            with open(path, encoding="utf-8") as manifest_file:
+                self.manifest = json.load(manifest_file)
+
+    def test_manifest(self) -> None:
+        """Test that the manifest lists every loaded world of the worlds folder with its data package checksum."""
+        manifest_games = {game: manifest_game for manifest_source in self.manifest["sources"].values()
+                          for game, manifest_game in manifest_source["games"].items()}
+        for game, world in AutoWorldRegister.world_types.items():
+            if world.__file__.startswith(worlds.local_folder) and not world.zip_path:
+                with self.subTest(game):
+                    self.assertIn(game, manifest_games)
+                    self.assertEqual(manifest_games[game]["module"], world.__module__)
+                    self.assertEqual(manifest_games[game]["world_version"], world.world_version.as_simple_string())
+                    self.assertEqual(manifest_games[game]["checksum"], network_data_package["games"][game]["checksum"])
+                    self.assertEqual(set(manifest_games[game]["options"]), set(world.options_dataclass.type_hints))
+        self.assertIn("Timespinner", self.manifest["sources"]["timespinner"]["games"])
+
+    def test_load_worlds(self) -> None:
+        """Test that only the sources of requested games are loaded, along with the ones the manifest can't tell."""
+        sources = [dataclasses.replace(world_source, load_attempted=False) for world_source in worlds.world_sources
+                   if world_source.relative and not world_source.is_zip]
+        sources.append(WorldSource("not_in_manifest"))
+        self.manifest["sources"]["raft"]["signature"] = [0]
+        loaded: list[str] = []
+
+        def load(world_source: WorldSource) -> bool:
+            world_source.load_attempted = True
+            loaded.append(world_source.path)
+            return True
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(worlds, "world_sources", sources), \
+                mock.patch.object(worlds, "world_manifest", self.manifest), \
+                mock.patch.object(worlds, "world_manifest_path", os.path.join(temp_dir, "manifest.json")), \
+                mock.patch.object(AutoWorldRegister, "world_types", {}), \
+                mock.patch.object(WorldSource, "load", load):
+            # worlds that failed to load are not in the manifest either
+            unknown = [world_source.path for world_source in sources
+                       if world_source.path not in self.manifest["sources"]]
+            worlds.load_worlds({"Timespinner", "description"})
+            self.assertEqual(sorted(["generic", "raft", "timespinner", *unknown]), sorted(loaded))
+            loaded.clear()
+            worlds.load_worlds({"Timespinner"})
+            self.assertEqual([], loaded)
+            worlds.load_worlds()
+            self.assertEqual(len(sources) - 3 - len(unknown), len(loaded))
+
+    def test_data_package_cache(self) -> None:
+        """Test that data packages are read from the cache by checksum, and built when the checksum is not cached."""
+        world = AutoWorldRegister.world_types["Timespinner"]
+        data_package = world.get_data_package_data()
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(Utils.cache_path, "cached_path", temp_dir), \
+                mock.patch.object(Utils, "persistent_load", return_value={}):
+            self.assertEqual(data_package, worlds._get_data_package("Timespinner", world, "0" * 40))
+            with mock.patch.object(world, "get_data_package_data", side_effect=AssertionError("built again")):
+                self.assertEqual(data_package,
+                                 worlds._get_data_package("Timespinner", world, data_package["checksum"]))
+            # ids changed without the checksum in the manifest knowing, e.g. by upgrading a package the world uses
+            changed_ids = {**world.item_name_to_id, "Upgraded Item": max(world.item_name_to_id.values()) + 1}
+            with mock.patch.object(world, "item_name_to_id", changed_ids):
+                self.assertEqual(changed_ids,
+                                 worlds._get_data_package("Timespinner", world, data_package["checksum"])
+                                 ["item_name_to_id"])
+
+    def test_manifest_not_written_eagerly(self) -> None:
+        """Test that loading all worlds without lazy world loading doesn't write the manifest into the worlds folder."""
+        sources = [dataclasses.replace(world_source, load_attempted=False) for world_source in worlds.world_sources
+                   if world_source.path in ("generic", "timespinner")]
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(worlds, "world_sources", sources), \
+                mock.patch.object(worlds, "world_manifest", {"version": self.manifest["version"], "sources": {}}), \
+                mock.patch.object(worlds, "world_manifest_path", os.path.join(temp_dir, "manifest.json")), \
+                mock.patch.object(worlds, "lazy_world_loading", False), \
+                mock.patch.object(WorldSource, "load", lambda world_source: True):
+            worlds.load_worlds()
+            self.assertFalse(os.path.exists(worlds.world_manifest_path))
@@ -1,6 +1,11 @@
-﻿import unittest
+﻿import os
+import random
+import tempfile
+import unittest
+from typing import Type
+
 from worlds.AutoWorld import AutoWorldRegister
-from worlds.Files import AutoPatchRegister
+from worlds.Files import APDeltaPatch, AutoPatchRegister, delta_pool
 
 
 class TestPatches(unittest.TestCase):
@@ -9,3 +14,46 @@ class TestPatches(unittest.TestCase):
             with self.subTest(game=game_name):
                 self.assertIn(game_name, AutoWorldRegister.world_types.keys(),
                               f"Patch '{game_name}' does not match the name of any world.")
+
+
+class TestDeltaPatch(unittest.TestCase):
+    class DeltaPatch(APDeltaPatch):
+        hash = None
+        patch_file_ending = ".aptest"
+        result_file_ending = ".bin"
+
+        @classmethod
+        def get_source_data(cls) -> bytes:
+            return random.Random(0).randbytes(0x10000)
+
+    def patch(self, patch_type: Type[APDeltaPatch], workers: int = 0) -> bytes:
+        """Writes a delta patch of patch_type from its source data to a changed file, and returns the file it patches."""
+        target = bytearray(patch_type.get_source_data())
+        target[0x1234:0x1236] = b"AP"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            patched_path = os.path.join(temp_dir, "patched.bin")
+            with open(patched_path, "wb") as f:
+                f.write(target)
+            patch = patch_type(os.path.join(temp_dir, "test.aptest"), player=1, player_name="Player1",
+                               patched_path=patched_path)
+            with delta_pool(workers):
+                patch.write()
+            patch = patch_type(patch.path)
+            patch.patch(os.path.join(temp_dir, "result.bin"))
+            with open(os.path.join(temp_dir, "result.bin"), "rb") as f:
+                result = f.read()
+        self.assertEqual(target, result)
+        return result
+
+    def test_bsdiff4(self) -> None:
+        """Test that bsdiff4 deltas patch the same with and without a delta pool."""
+        self.patch(self.DeltaPatch)
+        self.patch(self.DeltaPatch, 1)
+
+    def test_block_delta(self) -> None:
+        """Test that a patch type with a block size writes and patches with a block delta."""
+        class BlockDeltaPatch(self.DeltaPatch):
+            block_size = 0x100
+
+        self.assertEqual([("apply_block_delta", ["delta.blocks"])], BlockDeltaPatch().procedure)
+        self.patch(BlockDeltaPatch)
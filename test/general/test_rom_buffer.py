@@ -0,0 +1,61 @@
+import random
+import unittest
+from unittest import mock
+
+from worlds import RomBuffer
+from worlds.Files import APTokenMixin, APTokenTypes
+
+
+class TestRomBuffer(unittest.TestCase):
+    data: bytearray
+    backends = (None,) if RomBuffer.numpy is None else (RomBuffer.numpy, None)
+
+    def setUp(self) -> None:
+        self.data = bytearray(random.Random(0).randbytes(0x101000))
+
+    def test_snes_checksum(self) -> None:
+        """Test that the SNES checksum is the byte sum outside the header checksum, and is valid once written."""
+        expected = (sum(self.data[:0x7FDC] + self.data[0x7FE0:]) + 0x01FE) & 0xFFFF
+        for numpy in self.backends:
+            with self.subTest(numpy=bool(numpy)), mock.patch.object(RomBuffer, "numpy", numpy):
+                data = self.data.copy()
+                self.assertEqual(expected, RomBuffer.snes_checksum(data))
+                RomBuffer.write_snes_checksum(data)
+                self.assertEqual((expected ^ 0xFFFF).to_bytes(2, "little") + expected.to_bytes(2, "little"),
+                                 data[0x7FDC:0x7FE0])
+                self.assertEqual(expected, RomBuffer.snes_checksum(data))
+        with self.assertRaises(Exception):
+            RomBuffer.write_snes_checksum(bytearray(0x7FFF))
+
+    def test_n64_cic6105_crc(self) -> None:
+        """Test that the N64 CRC matches the one calculated word by word."""
+        for numpy in self.backends:
+            with self.subTest(numpy=bool(numpy)), mock.patch.object(RomBuffer, "numpy", numpy):
+                self.assertEqual((0x7F2A5898, 0x3B5DAFCA), RomBuffer.n64_cic6105_crc(self.data))
+
+    def test_apply_tokens(self) -> None:
+        """Test that every token type is applied in order."""
+        patch = APTokenMixin()
+        patch.write_token(APTokenTypes.WRITE, 0, b"\x01\x02\x03\x04")
+        patch.write_token(APTokenTypes.AND_8, 1, 0x01)
+        patch.write_token(APTokenTypes.OR_8, 2, 0xF0)
+        patch.write_token(APTokenTypes.XOR_8, 3, 0xFF)
+        patch.write_token(APTokenTypes.COPY, 4, (4, 0))
+        patch.write_token(APTokenTypes.RLE, 8, (4, 0xAA))
+        data = bytearray(16)
+        RomBuffer.apply_tokens(data, patch.get_token_binary())
+        self.assertEqual(bytes([1, 0, 0xF3, 0xFB, 1, 0, 0xF3, 0xFB, 0xAA, 0xAA, 0xAA, 0xAA, 0, 0, 0, 0]), data)
+
+    def test_block_delta(self) -> None:
+        """Test that a block delta only contains the changed blocks, and patches the source into the target."""
+        for target_size in (len(self.data), len(self.data) - 100, len(self.data) + 1000):
+            with self.subTest(target_size=target_size):
+                target = bytearray(self.data[:target_size])
+                target.extend(bytes(target_size - len(target)))
+                target[0x1234:0x1236] = b"AP"
+                target[0x8000] ^= 0xFF
+                delta = RomBuffer.create_block_delta(self.data, target, 0x100)
+                self.assertLess(len(delta), 0x400 + (1000 if target_size > len(self.data) else 0) + 100)
+                data = self.data.copy()
+                RomBuffer.apply_block_delta(data, delta)
+                self.assertEqual(target, data)
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+from BaseClasses import CollectionState, Location, SphereAnalysis
+from Fill import distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import setup_multiworld
+
+
+class TestSphereAnalysis(unittest.TestCase):
+    def setUp(self) -> None:
+        world_types = [AutoWorldRegister.world_types[game] for game in ("Timespinner", "Raft")]
+        self.multiworld = setup_multiworld(world_types, seed=1)
+        distribute_items_restrictive(self.multiworld)
+        call_all(self.multiworld, "post_fill")
+
+    def test_spheres(self) -> None:
+        """Test that get_spheres matches a sweep over all filled locations, and that each sphere matches its state."""
+        expected = []
+        state = CollectionState(self.multiworld)
+        locations = set(self.multiworld.get_filled_locations())
+        while locations:
+            sphere = {location for location in locations if location.can_reach(state)}
+            if not sphere:
+                break
+            expected.append(sphere)
+            for location in sphere:
+                state.collect(location.item, True, location)
+            locations -= sphere
+        self.assertEqual(expected, list(self.multiworld.get_spheres()))
+
+        analysis = SphereAnalysis(self.multiworld)
+        self.assertEqual(len(analysis.spheres) + 1, len(analysis.states))
+        for num, sphere in enumerate(analysis.spheres):
+            for location in sphere:
+                self.assertTrue(location.can_reach(analysis.states[num]))
+                if num:
+                    self.assertFalse(location.can_reach(analysis.states[num - 1]))
+
+    def test_shared_analysis(self) -> None:
+        """Test that consumers give the same results from the shared analysis, without sweeping again."""
+        spheres = list(self.multiworld.get_spheres())
+        sendable_spheres = list(self.multiworld.get_sendable_spheres())
+        fulfills_accessibility = self.multiworld.fulfills_accessibility(CollectionState(self.multiworld))
+        can_beat_game = self.multiworld.can_beat_game(CollectionState(self.multiworld))
+
+        self.multiworld.sphere_analysis = SphereAnalysis(self.multiworld)
+        self.multiworld.sphere_analysis.sendable_spheres  # noqa
+        with mock.patch.object(Location, "can_reach", side_effect=AssertionError("swept again")):
+            self.assertEqual(spheres, list(self.multiworld.get_spheres()))
+            self.assertEqual(sendable_spheres, list(self.multiworld.get_sendable_spheres()))
+            self.assertEqual(fulfills_accessibility, self.multiworld.fulfills_accessibility())
+            self.assertEqual(can_beat_game, self.multiworld.can_beat_game())
+
+        self.multiworld.spoiler.create_playthrough(create_paths=False)
+        self.assertTrue(self.multiworld.spoiler.playthrough)
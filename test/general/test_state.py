@@ -1,7 +1,8 @@
 import unittest
 
+from BaseClasses import CollectionState, Item, ItemClassification
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +28,40 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestCopyOnWrite(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.state = CollectionState(self.multiworld)
+        self.state.collect(Item("Key", ItemClassification.progression, None, 1), True)
+        self.state.collect(Item("Key", ItemClassification.progression, None, 2), True)
+        self.state.update_reachable_regions(1)
+        self.state.update_reachable_regions(2)
+
+    def test_copy_shares_untouched_players(self) -> None:
+        """Test that copying a state does not clone players that don't change afterward."""
+        copy = self.state.copy()
+        copy.collect(Item("Sword", ItemClassification.progression, None, 1), True)
+        self.assertIs(copy.prog_items[2], self.state.prog_items[2])
+        self.assertIs(copy.reachable_regions[2], self.state.reachable_regions[2])
+        self.assertIsNot(copy.prog_items[1], self.state.prog_items[1])
+        self.assertFalse(copy.stale[2])
+
+    def test_copy_isolates_changes(self) -> None:
+        """Test that changes to either state after copying don't leak into the other one."""
+        copy = self.state.copy()
+        copy.collect(Item("Sword", ItemClassification.progression, None, 1), True)
+        self.state.remove(Item("Key", ItemClassification.progression, None, 2))
+        copy.add_item("Shield", 2)
+        self.assertFalse(self.state.has("Sword", 1))
+        self.assertTrue(copy.has("Sword", 1))
+        self.assertFalse(self.state.has("Key", 2))
+        self.assertTrue(copy.has("Key", 2))
+        self.assertFalse(self.state.has("Shield", 2))
+        self.assertTrue(self.state.reachable_regions[1])
+
+        nested_copy = copy.copy()
+        nested_copy.set_item("Key", 1, 3)
+        self.assertEqual(copy.count("Key", 1), 1)
+        self.assertEqual(self.state.count("Key", 1), 1)
@@ -0,0 +1,52 @@
+import json
+import math
+import unittest
+
+import NetUtils
+from NetUtils import NetworkItem, NetworkPlayer, NetworkSlot, SlotType, decode
+
+
+class TestCodec(unittest.TestCase):
+    packet = [
+        {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 2, 3, 1), NetworkItem(4, 5, 6)]},
+        {"cmd": "Connected", "players": (NetworkPlayer(0, 1, "Alias", "Name"),), "checked_locations": {7},
+         "slot_info": {1: NetworkSlot("Name", "Game", SlotType.group, [2, 3])}, "slot_data": {"big": 2 ** 70}},
+        {"cmd": "PrintJSON", "data": [{"text": "é", "type": "player_id"}], "item": NetworkItem(1, 2, 3, 0)},
+    ]
+    expected = [
+        {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 2, 3, 1), NetworkItem(4, 5, 6, 0)]},
+        {"cmd": "Connected", "players": [NetworkPlayer(0, 1, "Alias", "Name")], "checked_locations": [7],
+         "slot_info": {"1": NetworkSlot("Name", "Game", SlotType.group, [2, 3])}, "slot_data": {"big": 2 ** 70}},
+        {"cmd": "PrintJSON", "data": [{"text": "é", "type": "player_id"}], "item": NetworkItem(1, 2, 3, 0)},
+    ]
+
+    def test_round_trip(self) -> None:
+        """Test that every codec encodes NamedTuples with their class, and that they decode back into them."""
+        for name, encode in NetUtils.codecs.items():
+            with self.subTest(codec=name):
+                data = encode(self.packet)
+                self.assertEqual({"item": 1, "location": 2, "player": 3, "flags": 1, "class": "NetworkItem"},
+                                 json.loads(data)[0]["items"][0])
+                self.assertEqual(self.expected, decode(data))
+
+    def test_non_finite_floats(self) -> None:
+        """Test that every codec encodes inf, -inf and nan the same way, instead of some of them as null."""
+        packet = {"cmd": "Bounced", "data": {"values": [math.inf, -math.inf, None], "nan": (math.nan,)}}
+        encoded = {name: encode(packet) for name, encode in NetUtils.codecs.items()}
+        for name, data in encoded.items():
+            with self.subTest(codec=name):
+                self.assertEqual(encoded["json"], data)
+                values = decode(data)["data"]["values"]
+                self.assertEqual([math.inf, -math.inf, None], values)
+                self.assertTrue(math.isnan(decode(data)["data"]["nan"][0]))
+
+    def test_no_copy(self) -> None:
+        """Test that containers without anything to convert are encoded as they are."""
+        packet = {"cmd": "RoomUpdate", "checked_locations": [1, 2, 3], "hint_points": 5}
+        self.assertIs(packet, NetUtils._scan_for_TypedTuples(packet))
+        self.assertIsNot(self.packet, NetUtils._scan_for_TypedTuples(self.packet))
+
+    def test_decode_missing_fields(self) -> None:
+        """Test that fields missing from the data get their defaults, and unknown ones are dropped."""
+        self.assertEqual(NetworkSlot("Name", "Game", SlotType.player),
+                         decode('{"name": "Name", "game": "Game", "type": 1, "extra": 0, "class": "NetworkSlot"}'))
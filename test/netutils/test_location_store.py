@@ -3,7 +3,7 @@ import os
 import typing
 import unittest
 import warnings
-from NetUtils import LocationStore, _LocationStore
+from NetUtils import LocationStore, _LocationStore, pack_location_table
 
 State = typing.Dict[typing.Tuple[int, int], typing.Set[int]]
 RawLocations = typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
@@ -117,6 +117,17 @@ class Base:
             self.assertEqual(self.store.get_for_player(1), {1: {13}, 2: {22, 23}})
             self.assertEqual(self.store.get_for_player(9999), {})
 
+        def test_hint_order(self) -> None:
+            """Test that find_item and get_for_player return entries in the order of the store."""
+            entries = [(sender, location, item, receiver, flags) for sender, locations in self.store.items()
+                       for location, (item, receiver, flags) in locations.items()]
+            for item in (11, 12, 13, 21, 22, 23, 99):
+                self.assertEqual([entry for entry in entries if entry[2] == item],
+                                 list(self.store.find_item({5, 4, 3, 2, 1}, item)))
+            for slot in range(1, 6):
+                self.assertEqual(list(dict.fromkeys(entry[0] for entry in entries if entry[3] == slot)),
+                                 list(self.store.get_for_player(slot)))
+
         def test_get_checked(self) -> None:
             self.assertEqual(self.store.get_checked(full_state, 0, 1), [11, 12, 13])
             self.assertEqual(self.store.get_checked(one_state, 0, 1), [12])
@@ -241,6 +252,20 @@ class Base:
             self.assertEqual(len(store[1]), 1)
             self.assertEqual(len(store[2]), 0)
 
+        def test_from_table(self) -> None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                store = self.type.from_table(pack_location_table({1: {}, 2: {}}))
+            self.assertEqual(len(store), 2)
+            self.assertEqual(len(store[2]), 0)
+            table = pack_location_table({1: {1: (1, 2, 3)}, 2: {2: (4, 1, 0)}})
+            with self.assertRaises(ValueError):
+                self.type.from_table(table[:-1])
+            with self.assertRaises(ValueError):
+                self.type.from_table(bytes(8) + table[8:])  # no slots
+            with self.assertRaises(ValueError):
+                self.type.from_table(bytes([1]) + table[1:])  # sender 2 is not a slot
+
 
 class TestPurePythonLocationStore(Base.TestLocationStore):
     """Run base method tests for pure python implementation."""
@@ -248,6 +273,23 @@ class TestPurePythonLocationStore(Base.TestLocationStore):
         self.store = _LocationStore(sample_data)
         super().setUp()
 
+    def test_changed_store_hints(self) -> None:
+        """Test that hints reflect players that were set or removed after the first hint lookup."""
+        self.assertEqual(sorted(self.store.find_item({3}, 99)), [(4, 9, 99, 3, 0)])
+        self.store[4] = {9: (98, 3, 0)}
+        self.assertEqual(sorted(self.store.find_item({3}, 99)), [])
+        self.store.update({6: {9: (99, 3, 0)}})
+        self.assertEqual(sorted(self.store.find_item({3}, 99)), [(6, 9, 99, 3, 0)])
+        del self.store[6]
+        self.assertEqual(self.store.get_for_player(3), {4: {9}})
+
+
+class TestPurePythonTableLocationStore(Base.TestLocationStore):
+    """Run base method tests for pure python implementation loaded from a location table."""
+    def setUp(self) -> None:
+        self.store = _LocationStore.from_table(pack_location_table(sample_data))
+        super().setUp()
+
 
 class TestPurePythonLocationStoreConstructor(Base.TestLocationStoreConstructor):
     """Run base constructor tests for the pure python implementation."""
@@ -265,6 +307,15 @@ class TestSpeedupsLocationStore(Base.TestLocationStore):
         super().setUp()
 
 
+@unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
+class TestSpeedupsTableLocationStore(Base.TestLocationStore):
+    """Run base method tests for cython implementation loaded from a location table."""
+    def setUp(self) -> None:
+        self.assertFalse(LocationStore is _LocationStore, "Failed to load _speedups")
+        self.store = LocationStore.from_table(pack_location_table(sample_data))
+        super().setUp()
+
+
 @unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
 class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
     """Run base constructor tests and tests the additional constraints for cython implementation."""
@@ -298,3 +349,8 @@ class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
             self.type({
                 1: {1: None},
             })
+
+    def test_from_table_unsorted(self) -> None:
+        table = pack_location_table({1: {1: (1, 1, 0), 2: (2, 1, 0)}})
+        with self.assertRaises(ValueError):
+            self.type.from_table(table[:8] + table[40:] + table[8:40])
@@ -3,10 +3,12 @@
 import unittest
 import os
 import os.path
+import pickle
 import sys
 
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest import mock
 
 import Generate
 import Main
@@ -137,3 +139,58 @@ class TestGenerateWeights(TestGenerateMain):
                     result, getattr(namespace, option_name)[player].value,
                     "Generated results from weights file did not match expected value."
                 )
+
+    def test_roll_workers(self):
+        """Tests that rolling in a pool of processes gives the same results for any amount of processes."""
+        from settings import get_settings
+        from Utils import user_path, local_path
+        settings = get_settings()
+        settings.generator.player_files_path = settings.generator.PlayerFilesPath(self.yaml_input_dir)
+        settings.generator.players = 5
+        settings._filename = None
+        user_path_backup = user_path.cached_path
+        user_path.cached_path = local_path()
+        results = []
+        try:
+            for roll_workers in (1, 2):
+                sys.argv = [sys.argv[0], "--seed", "1", "--roll_workers", str(roll_workers)]
+                namespace, seed = Generate.main()
+                results.append({
+                    option_name: [getattr(namespace, option_name)[player].value for player in range(1, 6)]
+                    for option_name in ("accessibility", "progression_balancing")
+                })
+        finally:
+            user_path.cached_path = user_path_backup
+
+        self.assertEqual(results[0], results[1])
+        # every player is rolled with a seed of their own
+        self.assertNotEqual(1, len(set(map(tuple, zip(*results[0].values())))))
+
+
+class TestYamlCache(unittest.TestCase):
+    """Tests the cache of parsed weights files of Generate.py"""
+
+    def setUp(self):
+        Generate.yaml_cache.clear()
+
+    def tearDown(self):
+        Generate.yaml_cache.clear()
+
+    def test_parses_once(self):
+        text = "name: Player\ngame: Archipelago\n---\nname: Other\n"
+        documents = Generate.parse_weights_yamls(text)
+        self.assertEqual(({"name": "Player", "game": "Archipelago"}, {"name": "Other"}), documents)
+        documents[0]["name"] = "Changed"
+
+        with mock.patch.object(Generate, "parse_yamls", side_effect=AssertionError("parsed again")):
+            self.assertEqual(({"name": "Player", "game": "Archipelago"}, {"name": "Other"}),
+                             Generate.parse_weights_yamls(text))
+
+    def test_max_size(self):
+        cache = Generate.YamlCache(max_size=2)
+        keys = [cache.get_key(str(number)) for number in range(3)]
+        for key in keys:
+            cache.put(key, pickle.dumps(()))
+            cache.get(keys[0])
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(keys[1]))
@@ -1,5 +1,14 @@
+import asyncio
+import os
+import pickle
+import tempfile
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+from unittest import mock
+
+from MultiServer import Client, Context, ServerCommandProcessor, process_client_cmd, send_items_to, send_new_items
+from NetUtils import Hint, HintStatus, LazySlotData, NetworkItem, NetworkSlot, SlotType, encode_multidata
+from Utils import version_tuple
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +47,287 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestSendNewItems(unittest.TestCase):
+    def setUp(self) -> None:
+        with mock.patch.object(Context, "_load_game_data"):  # the data package only gets stripped once per process
+            self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.clients = {slot: Client(None, self.ctx) for slot in (1, 2, 3)}
+        self.ctx.clients = {0: {slot: [client] for slot, client in self.clients.items()}}
+        self.sent: list[tuple[Client, dict]] = []
+
+        async def send_msgs(endpoint: Client, msgs) -> bool:
+            self.sent.extend((endpoint, msg) for msg in msgs)
+            return True
+
+        self.ctx.send_msgs = send_msgs
+
+    def test_only_receivers_get_items(self) -> None:
+        async def check() -> None:
+            send_items_to(self.ctx, 0, 2, NetworkItem(1, 1, 1))
+            send_new_items(self.ctx)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+        asyncio.run(check())
+        self.assertEqual([(self.clients[2], {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(1, 1, 1)]})],
+                         self.sent)
+        self.assertEqual(1, self.clients[2].send_index)
+        self.assertFalse(self.ctx.new_item_receivers)
+
+    def test_items_batched_per_tick(self) -> None:
+        async def check() -> None:
+            send_items_to(self.ctx, 0, 3, NetworkItem(1, 1, 1))
+            send_new_items(self.ctx)
+            send_items_to(self.ctx, 0, 3, NetworkItem(2, 1, 2))
+            send_new_items(self.ctx)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+        asyncio.run(check())
+        self.assertEqual(1, len(self.sent))
+        client, msg = self.sent[0]
+        self.assertIs(self.clients[3], client)
+        self.assertEqual([NetworkItem(1, 1, 1), NetworkItem(2, 1, 2)], msg["items"])
+
+    def test_items_encoded_once_per_slot(self) -> None:
+        """Test that clients of a slot that are at the same index get one ReceivedItems, encoded once."""
+        tracker = Client(None, self.ctx)
+        self.ctx.clients[0][2].append(tracker)
+        encoded: list[tuple[Client, str]] = []
+
+        async def send_encoded_msgs(endpoint: Client, msg: str) -> bool:
+            encoded.append((endpoint, msg))
+            return True
+
+        self.ctx.send_encoded_msgs = send_encoded_msgs
+
+        async def check() -> None:
+            send_items_to(self.ctx, 0, 2, NetworkItem(1, 1, 1))
+            send_new_items(self.ctx)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+        with mock.patch.object(self.ctx, "dumper", wraps=self.ctx.dumper) as dumper:
+            asyncio.run(check())
+        self.assertEqual(1, dumper.call_count)
+        self.assertEqual([self.clients[2], tracker], [endpoint for endpoint, _ in encoded])
+        self.assertEqual(1, len({msg for _, msg in encoded}))
+        self.assertEqual([1, 1], [self.clients[2].send_index, tracker.send_index])
+        self.assertFalse(self.sent)
+
+class TestBounce(unittest.TestCase):
+    def test_bounce_routing(self) -> None:
+        """Test that Bounce reaches the clients of the sender's team by game, slot and tag as they change."""
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.games = {1: "A", 2: "B", 3: "B"}
+        ctx.game_slots = {"A": [1], "B": [2, 3]}
+        ctx.player_names = {(team, slot): f"Player{slot}" for team in (0, 1) for slot in ctx.games}
+        ctx.clients = {team: {slot: [] for slot in ctx.games} for team in (0, 1)}
+        clients = {}
+        for team, slot, tags in ((0, 1, ["DeathLink"]), (0, 2, []), (0, 3, ["Tracker"]), (1, 1, ["DeathLink"])):
+            client = clients[team, slot] = Client(None, ctx)
+            client.auth, client.team, client.slot, client.tags = True, team, slot, tags
+            ctx.clients[team][slot].append(client)
+            ctx.endpoints.append(client)
+            ctx.index_client_tags(client)
+        bounced: list[set[Client]] = []
+
+        async def broadcast_send_encoded_msgs(endpoints, msg: str) -> bool:
+            if "Bounced" in msg:
+                bounced.append(set(endpoints))
+            return True
+
+        ctx.broadcast_send_encoded_msgs = broadcast_send_encoded_msgs
+
+        async def bounce(**args) -> set[Client]:
+            bounced.clear()
+            await process_client_cmd(ctx, clients[0, 2], {"cmd": "Bounce", "data": {}, **args})
+            return bounced[0] if bounced else set()
+
+        async def check() -> None:
+            self.assertEqual({clients[0, 1]}, await bounce(tags=["DeathLink"]))
+            self.assertEqual({clients[0, 2], clients[0, 3]}, await bounce(games=["B"]))
+            self.assertEqual({clients[0, 1], clients[0, 3]}, await bounce(slots=[3], tags=["DeathLink"]))
+            self.assertEqual(set(), await bounce(games=["C"], slots=[4], tags=["Other"]))
+
+            await process_client_cmd(ctx, clients[0, 3], {"cmd": "ConnectUpdate", "tags": ["DeathLink"]})
+            self.assertEqual({clients[0, 1], clients[0, 3]}, await bounce(tags=["DeathLink"]))
+            await ctx.disconnect(clients[0, 1])
+            self.assertEqual({clients[0, 3]}, await bounce(tags=["DeathLink"]))
+            self.assertEqual({"DeathLink": {clients[1, 1]}}, ctx.tag_clients[1])
+
+        asyncio.run(check())
+
+
+class TestHintRecheck(unittest.TestCase):
+    def test_recheck_location_hints(self) -> None:
+        """Test that checking a location only rechecks the hints for it, in every slot that has them."""
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        checked_hint = Hint(2, 1, 10, 5, False)
+        other_hint = Hint(1, 1, 11, 6, False)
+        other_finder_hint = Hint(1, 2, 10, 7, False)
+        ctx.hints[0, 1] = {checked_hint, other_hint, other_finder_hint}
+        ctx.hints[0, 2] = {checked_hint, other_finder_hint}
+        ctx.recheck_hints()
+        rechecked = ctx.metrics["hints_rechecked"]
+
+        ctx.location_checks[0, 1].add(10)
+        changed: set[tuple[int, int]] = set()
+        ctx.recheck_location_hints(0, 1, [10], changed)
+        found_hint = checked_hint._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual({(0, 1), (0, 2)}, changed)
+        self.assertEqual({found_hint, other_hint, other_finder_hint}, ctx.hints[0, 1])
+        self.assertEqual({found_hint, other_finder_hint}, ctx.hints[0, 2])
+        self.assertEqual(rechecked + 1, ctx.metrics["hints_rechecked"])
+        self.assertNotIn((0, 1, 10), ctx.hint_index)
+
+        # hints that got replaced, like by UpdateHint, are rechecked in their new form
+        prioritized_hint = other_hint.re_prioritize(ctx, HintStatus.HINT_PRIORITY)
+        ctx.replace_hint(0, 1, other_hint, prioritized_hint)
+        ctx.location_checks[0, 1].add(11)
+        ctx.recheck_location_hints(0, 1, [11])
+        self.assertIn(other_hint._replace(found=True, status=HintStatus.HINT_FOUND), ctx.hints[0, 1])
+        self.assertNotIn(prioritized_hint, ctx.hints[0, 1])
+
+
+class TestJournalSave(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.save_filename = os.path.join(self.temp_dir.name, "test.apsave")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def make_context(self, journal: bool) -> Context:
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.connect_names = {"Player1": (0, 1), "Player2": (0, 2)}
+        ctx.save_filename = self.save_filename
+        with mock.patch.object(Context, "_start_async_saving"):
+            ctx.init_save(True, journal)
+        return ctx
+
+    def test_journal_replay(self) -> None:
+        """Test that a save file with its journal loads into the same state that was saved."""
+        ctx = self.make_context(True)
+        snapshot_size = os.path.getsize(self.save_filename)
+        send_items_to(ctx, 0, 2, NetworkItem(1, 1, 1), NetworkItem(2, 2, 1))
+        ctx.location_checks[0, 1] |= {1, 2}
+        ctx.note_save_change("location_checks", (0, 1))
+        ctx.hints[0, 1].add(Hint(2, 1, 1, 1, False))
+        ctx.note_save_change("hints", (0, 1))
+        ctx.stored_data["key"] = {"value": 1}
+        ctx.note_save_change("stored_data", "key")
+        ctx.name_aliases[0, 1] = "Alias"
+        ctx.note_save_change("name_aliases", (0, 1))
+        self.assertTrue(ctx._save())
+        send_items_to(ctx, 0, 2, NetworkItem(3, 3, 1))
+        del ctx.name_aliases[0, 1]
+        ctx.note_save_change("name_aliases", (0, 1))
+        self.assertTrue(ctx._save())
+
+        self.assertEqual(snapshot_size, os.path.getsize(self.save_filename), "save file was rewritten")
+        loaded = self.make_context(False)
+        expected, actual = ctx.get_save(), loaded.get_save()
+        for key in ("received_items", "location_checks", "hints", "stored_data", "name_aliases", "random_state"):
+            self.assertEqual(expected[key], actual[key], key)
+
+    def test_stale_journal_ignored(self) -> None:
+        """Test that a journal written before the save file was compacted does not get replayed."""
+        ctx = self.make_context(True)
+        ctx.location_checks[0, 1] |= {1}
+        ctx.note_save_change("location_checks", (0, 1))
+        self.assertTrue(ctx._save())
+        with open(ctx.journal_filename, "rb") as f:
+            stale_journal = f.read()
+        ctx.location_checks[0, 1] |= {2}
+        ctx.note_save_change("location_checks", (0, 1))
+        self.assertTrue(ctx._save(True))  # compaction
+        with open(ctx.journal_filename, "wb") as f:
+            f.write(stale_journal)
+
+        loaded = self.make_context(False)
+        self.assertEqual({1, 2}, loaded.location_checks[0, 1])
+
+    def test_journal_compaction(self) -> None:
+        """Test that the journal gets compacted into the save file once it gets too big."""
+        ctx = self.make_context(True)
+        ctx.journal_max_size = 0
+        ctx.location_checks[0, 1] |= {1}
+        ctx.note_save_change("location_checks", (0, 1))
+        self.assertTrue(ctx._save())
+        self.assertEqual({}, ctx.get_save_delta(ctx.take_save_changes()))
+
+        loaded = self.make_context(False)
+        self.assertEqual({1}, loaded.location_checks[0, 1])
+
+    def test_journal_writes_changed_keys(self) -> None:
+        """Test that a journal entry only holds the keys that changed, and keeps them if it could not be written."""
+        ctx = self.make_context(True)
+        ctx.location_checks[0, 1] |= {1}
+        ctx.location_checks[0, 2] |= {2}
+        ctx.note_save_change("location_checks", (0, 2))
+        self.assertEqual({"location_checks": {(0, 2): {2}}}, ctx.get_save_delta(ctx.save_changes))
+
+        with mock.patch("MultiServer.write_journal_record", side_effect=OSError):
+            self.assertFalse(ctx._save())
+        self.assertEqual({(0, 2)}, ctx.save_changes["location_checks"])
+
+
+class TestMultiDataFormat(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.multidata = {
+            "version": tuple(version_tuple),
+            "minimum_versions": {"server": (0, 0, 0), "clients": {1: (0, 0, 0), 2: (0, 0, 0)}},
+            "slot_info": {slot: NetworkSlot(f"Player{slot}", "Archipelago", SlotType.player) for slot in (1, 2)},
+            "seed_name": "Test",
+            "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+            "locations": {1: {2: (3, 2, 1), 1: (4, 1, 0)}, 2: {}},
+            "slot_data": {1: {"option": 1}, 2: {}},
+            "er_hint_data": {1: {1: "Entrance"}},
+            "precollected_items": {1: [5], 2: []},
+            "precollected_hints": {1: set(), 2: set()},
+            "spheres": [{1: {1}}, {1: {2}}],
+        }
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def load(self, data: bytes) -> Context:
+        filename = os.path.join(self.temp_dir.name, "test.archipelago")
+        with open(filename, "wb") as f:
+            f.write(data)
+        with mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.load(filename)
+        return ctx
+
+    def check_loaded(self, ctx: Context) -> None:
+        self.assertEqual({2: (3, 2, 1), 1: (4, 1, 0)}, dict(ctx.locations[1].items()))
+        self.assertEqual(0, len(ctx.locations[2]))
+        self.assertEqual({"option": 1}, ctx.read_data["slot_data_1"]())
+        self.assertEqual({}, ctx.slot_data[2])
+        self.assertEqual({1: {1: "Entrance"}}, ctx.er_hint_data)
+        self.assertEqual([NetworkItem(5, -2, 0)], ctx.start_inventory[1])
+        self.assertEqual([{1: {1}}, {1: {2}}], ctx.spheres)
+        self.assertEqual({1: {1: 0, 2: 1}}, ctx.location_spheres)
+        self.assertEqual(1, ctx.get_sphere(1, 2))
+
+    def test_load_format_3(self) -> None:
+        """Test that .archipelago files from before the section index still load."""
+        self.check_loaded(self.load(bytes([3]) + zlib.compress(pickle.dumps(self.multidata), 9)))
+
+    def test_load_format_4(self) -> None:
+        """Test that .archipelago files with a section index load the same, and decode slot_data on access."""
+        ctx = self.load(encode_multidata(self.multidata))
+        self.assertIsInstance(ctx.slot_data, LazySlotData)
+        self.assertFalse(ctx.slot_data._decoded)
+        # the encoded slot_data got copied, so the file is not kept open
+        self.assertIsInstance(ctx.slot_data._data.obj, bytes)
+        self.check_loaded(ctx)
+        self.assertEqual({1, 2}, set(ctx.slot_data._decoded))
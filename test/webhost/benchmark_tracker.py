@@ -0,0 +1,119 @@
+def run_tracker_benchmark(game: str = "Hollow Knight", players: int = 50, requests: int = 20,
+                          spheres: int = 10) -> None:
+    """
+    Run a benchmark of the tracker pages and tracker API endpoints for a large room, comparing requests that have to
+    decode the seed and multisave from the database against requests served from the TrackerData cache.
+
+    :param game: Game of all players in the synthetic room. Should use the generic tracker.
+    :param players: Amount of players in the synthetic room.
+    :param requests: Amount of requests per endpoint and mode.
+    :param spheres: Amount of spheres the locations of every player are spread over.
+    """
+    import logging
+    import pickle
+    import random
+    import time
+    import zlib
+    from uuid import uuid4
+
+    from flask import url_for
+    from pony.orm import db_session
+
+    from NetUtils import ClientStatus, NetworkItem, NetworkSlot, SlotType
+    from Utils import init_logging
+    from WebHost import get_app
+    from WebHostLib import app as raw_app, cache
+    from WebHostLib.models import GameDataPackage, Room, Seed
+    from WebHostLib.tracker import tracker_data_cache
+    from worlds import network_data_package
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    raw_app.config["PONY"] = {"provider": "sqlite", "filename": ":memory:", "create_db": True}
+    raw_app.config.update({"TESTING": True, "HOST_ADDRESS": "localhost"})
+    app = get_app()
+
+    rng = random.Random(0)
+    game_package = network_data_package["games"][game]
+    item_ids = list(game_package["item_name_to_id"].values())
+    location_ids = list(game_package["location_name_to_id"].values())
+    slots = range(1, players + 1)
+    multidata = {
+        "slot_info": {slot: NetworkSlot(f"Player{slot}", game, SlotType.player) for slot in slots},
+        "seed_name": "Benchmark",
+        "locations": {slot: {location: (rng.choice(item_ids), rng.choice(slots), 0) for location in location_ids}
+                      for slot in slots},
+        "slot_data": {slot: {} for slot in slots},
+        "precollected_items": {slot: [] for slot in slots},
+        "datapackage": {game: {"checksum": game_package["checksum"]}},
+        "spheres": [{slot: set(location_ids[sphere::spheres]) for slot in slots} for sphere in range(spheres)],
+    }
+    location_checks = {(0, slot): set(rng.sample(location_ids, len(location_ids) // 2)) for slot in slots}
+    received_items = {(0, slot, True): [] for slot in slots}
+    for (team, slot), locations in location_checks.items():
+        for location in locations:
+            item, receiver, flags = multidata["locations"][slot][location]
+            received_items[team, receiver, True].append(NetworkItem(item, location, slot, flags))
+    multisave = {
+        "location_checks": location_checks,
+        "received_items": received_items,
+        "client_game_state": {(0, slot): ClientStatus.CLIENT_PLAYING for slot in slots},
+        "client_activity_timers": tuple(((0, slot), time.time()) for slot in slots),
+    }
+
+    tracker = uuid4()
+    with db_session:
+        if not GameDataPackage.get(checksum=game_package["checksum"]):
+            GameDataPackage(checksum=game_package["checksum"], data=pickle.dumps(game_package))
+        seed = Seed(multidata=bytes([3]) + zlib.compress(pickle.dumps(multidata), 9), owner=uuid4())
+        Room(seed=seed, owner=uuid4(), tracker=tracker, multisave=pickle.dumps(multisave))
+
+    client = app.test_client()
+    with app.test_request_context():
+        urls = [
+            url_for("get_player_tracker", tracker=tracker, tracked_team=0, tracked_player=1),
+            url_for("get_generic_game_tracker", tracker=tracker, tracked_team=0, tracked_player=1),
+            url_for("get_multiworld_tracker", tracker=tracker, game="Generic"),
+            url_for("get_multiworld_sphere_tracker", tracker=tracker),
+            url_for("api.tracker_data", tracker=tracker),
+            url_for("api.static_tracker_data", tracker=tracker),
+            url_for("api.tracker_slot_data", tracker=tracker),
+        ]
+
+    for url in urls:
+        for use_cache in (False, True):
+            start = time.perf_counter()
+            for _ in range(requests):
+                # the response cache of flask would hide the work of building the tracker
+                cache.clear()
+                if not use_cache:
+                    tracker_data_cache.clear()
+                response = client.get(url)
+                assert response.status_code == 200, f"{url} returned {response.status_code}"
+            duration = time.perf_counter() - start
+            logger.info(f"{url} {'with' if use_cache else 'without'} TrackerData cache: "
+                        f"{duration / requests * 1000:.2f} ms per request")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    # allow running this script from any folder, without the stdlib test package shadowing ours
+    home = os.path.normpath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+    sys.path.remove(os.path.dirname(__file__))
+    sys.path.insert(0, home)
+    os.chdir(home)
+
+    from Utils import local_path
+    local_path.cached_path = home
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--game", default="Hollow Knight")
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--spheres", type=int, default=10)
+    args, _ = parser.parse_known_args()
+    run_tracker_benchmark(args.game, args.players, args.requests, args.spheres)
@@ -71,3 +71,26 @@ class TestGenerate(TestBase):
                           "Response shows unexpected error")
             self.assertIn("generate-game-form", response.text,
                           "Response did not get user back to the form")
+
+    def test_roll_workers(self) -> None:
+        """
+        Verify that rolling options in a pool of processes reports the same results as rolling them in the web-thread.
+        """
+        from WebHostLib.check import get_roll_pool, roll_options
+
+        options = {
+            "valid.yaml": b"name: Valid\ngame: Archipelago\nArchipelago: {}\n",
+            "multi.yaml": b"name: First\ngame: Archipelago\nArchipelago: {}\n---\n"
+                          b"name: Second\ngame: Archipelago\nArchipelago: {}\n",
+            "broken.yaml": b"name: [Broken\n",
+            "invalid.yaml": b"name: Invalid\ngame: Archipelago\nArchipelago:\n  accessibility: nonsense\n",
+            "weights": {"name": "Weights", "game": "Archipelago", "Archipelago": {}},
+        }
+        results, rolled = roll_options(options)
+        pool_results, pool_rolled = roll_options(options, roll_workers=2)
+        self.assertEqual(results, pool_results)
+        self.assertEqual(rolled.keys(), pool_rolled.keys())
+        self.assertEqual({"valid.yaml", "multi.yaml/1", "multi.yaml/2", "weights"}, set(pool_rolled))
+        self.assertEqual("Second", pool_rolled["multi.yaml/2"].name)
+        # the pool is kept for the next request instead of being started again
+        self.assertIs(get_roll_pool(2), get_roll_pool(2))
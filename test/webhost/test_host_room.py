@@ -191,3 +191,24 @@ class TestHostFakeRoom(TestBase):
         with db_session:
             commands = select(command for command in Command if command.room.id == self.room_id)  # type: ignore
             self.assertNotIn("/help", (command.commandtext for command in commands))
+
+    def test_dispatch_commands(self) -> None:
+        """Verify that queued commands get handed to their room's event loop in order and removed from the queue."""
+        from types import SimpleNamespace
+        from pony.orm import db_session, select
+        from WebHostLib.customserver import CommandDispatcher
+        from WebHostLib.models import Command, Room
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            Command(room=room, commandtext="/help")
+            Command(room=room, commandtext="/exit")
+
+        calls = []
+        processor = SimpleNamespace(ctx=SimpleNamespace(main_loop=SimpleNamespace(
+            call_soon_threadsafe=lambda *args: calls.append(args))))
+        CommandDispatcher.dispatch({self.room_id: processor})
+
+        self.assertEqual([(processor, "/help"), (processor, "/exit")], calls)
+        with db_session:
+            self.assertFalse(select(command for command in Command if command.room.id == self.room_id)[:])
@@ -103,3 +103,62 @@ class TestTracker(TestBase):
                 self.assertEqual(response.status_code, 200)
             with self.client.open(url_for("api.tracker_slot_data", tracker=self.tracker_uuid)) as response:
                 self.assertEqual(response.status_code, 200)
+
+    def test_tracker_data_cache(self) -> None:
+        """Verify that TrackerData shares decoded data between requests until the multisave changes."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.multisave = pickle.dumps({"name_aliases": {(0, 1): "Alias1"}})
+            first = TrackerData(room)
+            second = TrackerData(room)
+            self.assertIs(first._multidata, second._multidata)
+            self.assertIs(first.item_id_to_name, second.item_id_to_name)
+            self.assertIs(first._multisave, second._multisave)
+            self.assertEqual(first.get_room_long_player_names(), {(0, 1): "Alias1 (Player1)"})
+            self.assertIs(first.get_room_long_player_names(), second.get_room_long_player_names())
+
+            room.multisave = pickle.dumps({"name_aliases": {(0, 1): "Alias2"}})
+            third = TrackerData(room)
+            self.assertIs(first._multidata, third._multidata)
+            self.assertIsNot(first._multisave, third._multisave)
+            self.assertEqual(third.get_room_long_player_names(), {(0, 1): "Alias2 (Player1)"})
+
+    def test_checked_locations_by_sphere(self) -> None:
+        """Verify that checked locations are grouped by their earliest sphere and player."""
+        from dataclasses import replace
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.multisave = pickle.dumps({"location_checks": {(0, 1): {1, 2, 3, 5}, (0, 2): {1}}})
+            tracker_data = TrackerData(room)
+        spheres = [{1: {3}, 2: {1}}, {1: {1, 2, 3, 4}}]
+        tracker_data._seed_data = replace(tracker_data._seed_data,
+                                          multidata={**tracker_data._multidata, "spheres": spheres})
+        tracker_data._multidata = tracker_data._seed_data.multidata
+        self.assertEqual({1: {1: 1, 2: 1, 3: 0, 4: 1}, 2: {1: 0}}, tracker_data.get_location_spheres())
+        self.assertEqual([(0, 1, [3]), (0, 2, [1]), (1, 1, [1, 2])],
+                         [(sphere, player, sorted(locations))
+                          for sphere, player, locations in tracker_data.get_checked_locations_by_sphere(0)])
+
+    def test_tracker_data_cache_eviction(self) -> None:
+        """Verify that the least recently used entries are evicted above the size limit."""
+        from WebHostLib.tracker import TrackerDataCache
+
+        tracker_cache = TrackerDataCache(12)
+        self.assertEqual(tracker_cache.get("a", lambda: (6, "a")), "a")
+        self.assertEqual(tracker_cache.get("b", lambda: (6, "b")), "b")
+        self.assertEqual(tracker_cache.get("a", lambda: (6, "new a")), "a")
+        self.assertEqual(tracker_cache.get("c", lambda: (6, "c")), "c")
+        self.assertNotIn("b", tracker_cache)
+        self.assertIn("a", tracker_cache)
+        self.assertEqual(tracker_cache.size, 12)
+
+        self.assertEqual(tracker_cache.get("d", lambda: (20, "d")), "d")
+        self.assertEqual(len(tracker_cache), 1, "newest entry has to be kept even if it is too large")
@@ -1,19 +1,24 @@
 from __future__ import annotations
 
 import abc
+import concurrent.futures
+import contextlib
 import json
+import multiprocessing
 import zipfile
 from enum import IntEnum
 import os
 import threading
 from io import BytesIO
+from multiprocessing import shared_memory
 
 from typing import (ClassVar, Dict, List, Literal, Tuple, Any, Optional, Union, BinaryIO, overload, Sequence,
-                    TYPE_CHECKING)
+                    TYPE_CHECKING, Iterator, Type)
 
 import bsdiff4
 
 semaphore = threading.Semaphore(os.cpu_count() or 4)
+_delta_pool_lock = threading.Lock()
 
 del threading
 
@@ -361,6 +366,53 @@ class APProcedurePatch(APAutoPatchInterface):
             f.write(base_data)
 
 
+_delta_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_shared_source_data: Dict[Type[APProcedurePatch], shared_memory.SharedMemory] = {}
+_worker_source_data: Dict[str, bytes] = {}
+
+
+@contextlib.contextmanager
+def delta_pool(workers: int) -> Iterator[None]:
+    """
+    While open, the bsdiff4 deltas of APDeltaPatch are created in a pool of this many processes, instead of in the
+    thread writing the patch. Source data is handed to the processes once per patch type through shared memory.
+    With 0 workers, this does nothing.
+    """
+    global _delta_pool
+    if workers <= 0:
+        yield
+        return
+    # workers get started from the threads writing output, and forking a process that runs threads can deadlock
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # the fork server imports the worlds once, instead of each worker doing so
+        context.set_forkserver_preload(["__main__", __name__])
+    else:
+        context = multiprocessing.get_context("spawn")
+    _delta_pool = concurrent.futures.ProcessPoolExecutor(workers, mp_context=context)
+    try:
+        yield
+    finally:
+        with _delta_pool_lock:
+            pool, _delta_pool = _delta_pool, None
+            pool.shutdown()
+            for memory in _shared_source_data.values():
+                memory.close()
+                memory.unlink()
+            _shared_source_data.clear()
+
+
+def _diff_shared_source(source_name: str, source_size: int, patched_path: str) -> bytes:
+    # bsdiff4 only takes bytes, so each process copies the source data out of the shared memory once
+    source_data = _worker_source_data.get(source_name)
+    if source_data is None:
+        memory = shared_memory.SharedMemory(source_name)
+        source_data = _worker_source_data[source_name] = bytes(memory.buf[:source_size])
+        memory.close()
+    with open(patched_path, "rb") as f:
+        return bsdiff4.diff(source_data, f.read())
+
+
 class APDeltaPatch(APProcedurePatch):
     """An APProcedurePatch that additionally has delta.bsdiff4
     containing a delta patch to get the desired file, often a rom."""
@@ -368,16 +420,45 @@ class APDeltaPatch(APProcedurePatch):
     procedure = [
         ("apply_bsdiff4", ["delta.bsdiff4"])
     ]
+    block_size: ClassVar[int] = 0
+    """
+    If set, delta.blocks is written instead of delta.bsdiff4, containing the changed blocks of this many bytes.
+    This is a lot cheaper to create than a bsdiff4, but only smaller for files whose patches touch few regions.
+    """
 
     def __init__(self, *args: Any, patched_path: str = "", **kwargs: Any) -> None:
         super(APDeltaPatch, self).__init__(*args, **kwargs)
         self.patched_path = patched_path
+        if self.block_size:
+            self.procedure = [("apply_block_delta", ["delta.blocks"])]
 
     def write_contents(self, opened_zipfile: zipfile.ZipFile) -> None:
-        self.write_file("delta.bsdiff4",
-                        bsdiff4.diff(self.get_source_data_with_cache(), open(self.patched_path, "rb").read()))
+        if self.block_size:
+            from .RomBuffer import create_block_delta
+            with open(self.patched_path, "rb") as f:
+                self.write_file("delta.blocks",
+                                create_block_delta(self.get_source_data_with_cache(), f.read(), self.block_size))
+        else:
+            self.write_file("delta.bsdiff4", self.create_bsdiff4())
         super(APDeltaPatch, self).write_contents(opened_zipfile)
 
+    def create_bsdiff4(self) -> bytes:
+        """Creates the bsdiff4 delta from the source data to the patched file, in the delta pool if one is open."""
+        source_data = self.get_source_data_with_cache()
+        with _delta_pool_lock:
+            pool = _delta_pool
+            if pool is not None:
+                memory = _shared_source_data.get(type(self))
+                if memory is None:
+                    memory = shared_memory.SharedMemory(create=True, size=max(1, len(source_data)))
+                    memory.buf[:len(source_data)] = source_data
+                    _shared_source_data[type(self)] = memory
+                future = pool.submit(_diff_shared_source, memory.name, len(source_data), self.patched_path)
+        if pool is not None:
+            return future.result()
+        with open(self.patched_path, "rb") as f:
+            return bsdiff4.diff(source_data, f.read())
+
 
 class APTokenTypes(IntEnum):
     WRITE = 0
@@ -477,45 +558,26 @@ class APPatchExtension(metaclass=AutoPatchExtensionRegister):
         """Applies the given bsdiff4 from the patch onto the current file."""
         return bsdiff4.patch(rom, caller.get_file(patch))
 
+    @staticmethod
+    def apply_block_delta(caller: APProcedurePatch, rom: bytes, patch: str) -> bytes:
+        """Applies the given block delta, as written by APDeltaPatch with a block_size, onto the current file."""
+        from .RomBuffer import apply_block_delta
+        rom_data = bytearray(rom)
+        apply_block_delta(rom_data, caller.get_file(patch))
+        return bytes(rom_data)
+
     @staticmethod
     def apply_tokens(caller: APProcedurePatch, rom: bytes, token_file: str) -> bytes:
         """Applies the given token file from the patch onto the current file."""
-        token_data = caller.get_file(token_file)
+        from .RomBuffer import apply_tokens
         rom_data = bytearray(rom)
-        token_count = int.from_bytes(token_data[0:4], "little")
-        bpr = 4
-        for _ in range(token_count):
-            token_type = token_data[bpr:bpr + 1][0]
-            offset = int.from_bytes(token_data[bpr + 1:bpr + 5], "little")
-            size = int.from_bytes(token_data[bpr + 5:bpr + 9], "little")
-            data = token_data[bpr + 9:bpr + 9 + size]
-            if token_type in [APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8]:
-                arg = data[0]
-                if token_type == APTokenTypes.AND_8:
-                    rom_data[offset] = rom_data[offset] & arg
-                elif token_type == APTokenTypes.OR_8:
-                    rom_data[offset] = rom_data[offset] | arg
-                else:
-                    rom_data[offset] = rom_data[offset] ^ arg
-            elif token_type in [APTokenTypes.COPY, APTokenTypes.RLE]:
-                length = int.from_bytes(data[:4], "little")
-                value = int.from_bytes(data[4:], "little")
-                if token_type == APTokenTypes.COPY:
-                    rom_data[offset: offset + length] = rom_data[value: value + length]
-                else:
-                    rom_data[offset: offset + length] = bytes([value] * length)
-            else:
-                rom_data[offset:offset + len(data)] = data
-            bpr += 9 + size
+        apply_tokens(rom_data, caller.get_file(token_file))
         return bytes(rom_data)
 
     @staticmethod
     def calc_snes_crc(caller: APProcedurePatch, rom: bytes) -> bytes:
         """Calculates and applies a valid CRC for the SNES rom header."""
+        from .RomBuffer import write_snes_checksum
         rom_data = bytearray(rom)
-        if len(rom) < 0x8000:
-            raise Exception("Tried to calculate SNES CRC on file too small to be a SNES ROM.")
-        crc = (sum(rom_data[:0x7FDC] + rom_data[0x7FE0:]) + 0x01FE) & 0xFFFF
-        inv = crc ^ 0xFFFF
-        rom_data[0x7FDC:0x7FE0] = [inv & 0xFF, (inv >> 8) & 0xFF, crc & 0xFF, (crc >> 8) & 0xFF]
+        write_snes_checksum(rom_data)
         return bytes(rom_data)
@@ -0,0 +1,161 @@
+"""
+Shared checksum and bulk patching routines for ROM outputs.
+
+These work on the whole buffer at once instead of looping over it byte by byte in Python.
+NumPy is used when it is installed, otherwise they fall back to memoryview and array based implementations.
+"""
+import itertools
+import struct
+import sys
+from array import array
+from typing import Tuple, Union
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .Files import APTokenTypes
+
+__all__ = ["snes_checksum", "write_snes_checksum", "n64_cic6105_crc", "apply_tokens", "create_block_delta",
+           "apply_block_delta"]
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+_u32 = 0xFFFFFFFF
+_token_header = struct.Struct("<BII")
+_block_header = struct.Struct("<II")
+
+
+def _byte_sum(data: Buffer) -> int:
+    if numpy is not None:
+        return int(numpy.frombuffer(data, numpy.uint8).sum(dtype=numpy.uint64))
+    return sum(bytes(data))
+
+
+def snes_checksum(data: Buffer) -> int:
+    """
+    Calculates the checksum of an SNES rom, with the checksum and its complement in the header counted as
+    0xFFFF and 0x0000, the same as if they were already valid.
+    """
+    view = memoryview(data)
+    return (_byte_sum(view[:0x7FDC]) + _byte_sum(view[0x7FE0:]) + 0x01FE) & 0xFFFF
+
+
+def write_snes_checksum(data: bytearray) -> None:
+    """Calculates the checksum of an SNES rom and writes it and its complement into the header."""
+    if len(data) < 0x8000:
+        raise Exception("Tried to calculate SNES CRC on file too small to be a SNES ROM.")
+    crc = snes_checksum(data)
+    data[0x7FDC:0x7FE0] = struct.pack("<HH", crc ^ 0xFFFF, crc)
+
+
+def _big_endian_words(data: Buffer) -> array:
+    words = array("I", bytes(data))
+    assert words.itemsize == 4
+    if sys.byteorder == "little":
+        words.byteswap()
+    return words
+
+
+def n64_cic6105_crc(data: Buffer) -> Tuple[int, int]:
+    """Calculates the two header checksum words of an N64 rom that boots with the CIC-NUS-6105."""
+    seed = 0xDF26F436
+    if numpy is not None:
+        words = numpy.frombuffer(data, ">u4", 0x40000, 0x1000).astype(numpy.uint64)
+        words2 = numpy.frombuffer(data, ">u4", 0x40, 0x750).astype(numpy.uint64)
+        shifts = words & 0x1F
+        rotated = ((words << shifts) | (words >> (32 - shifts))) & _u32
+        t6_full = numpy.cumsum(words) + seed
+        others = ((t6_full & _u32) ^ words).tolist()
+        t6_full = int(t6_full[-1])
+        t3 = seed ^ int(numpy.bitwise_xor.reduce(words))
+        t5 = seed + int(rotated.sum())
+        t1 = seed + int((numpy.resize(words2, words.shape) ^ words).sum())
+        words = words.tolist()
+        rotated = rotated.tolist()
+    else:
+        words = _big_endian_words(memoryview(data)[0x1000:0x101000])
+        words2 = _big_endian_words(memoryview(data)[0x750:0x850])
+        rotated = [((d << (d & 0x1F)) | (d >> (32 - (d & 0x1F)))) & _u32 for d in words]
+        t6s = itertools.islice(itertools.accumulate(words, initial=seed), 1, None)
+        others = [(t6 & _u32) ^ d for t6, d in zip(t6s, words)]
+        t6_full = seed + sum(words)
+        t3 = seed
+        for d in words:
+            t3 ^= d
+        t5 = seed + sum(rotated)
+        t1 = seed + sum(d2 ^ d for d, d2 in zip(words, itertools.cycle(words2)))
+
+    # every overflow of the running sum t6 counts up t4
+    t4 = seed + (t6_full >> 32)
+    t6 = t6_full & _u32
+    # t2 depends on its own previous value, so it is the one part that has to run in order
+    t2 = seed
+    for d, r, other in zip(words, rotated, others):
+        t2 ^= r if t2 > d else other
+
+    return (t6 ^ t4 ^ t3) & _u32, (t5 ^ t2 ^ t1) & _u32
+
+
+def apply_tokens(data: bytearray, token_data: Buffer) -> None:
+    """Applies a token binary, as created by APTokenMixin.get_token_binary, onto data in place."""
+    token_view = memoryview(token_data)
+    token_count = int.from_bytes(token_view[0:4], "little")
+    unpack_header = _token_header.unpack_from
+    bpr = 4
+    for _ in range(token_count):
+        token_type, offset, size = unpack_header(token_view, bpr)
+        bpr += 9
+        if token_type == APTokenTypes.AND_8:
+            data[offset] &= token_view[bpr]
+        elif token_type == APTokenTypes.OR_8:
+            data[offset] |= token_view[bpr]
+        elif token_type == APTokenTypes.XOR_8:
+            data[offset] ^= token_view[bpr]
+        elif token_type == APTokenTypes.COPY:
+            length = int.from_bytes(token_view[bpr:bpr + 4], "little")
+            value = int.from_bytes(token_view[bpr + 4:bpr + size], "little")
+            data[offset:offset + length] = data[value:value + length]
+        elif token_type == APTokenTypes.RLE:
+            length = int.from_bytes(token_view[bpr:bpr + 4], "little")
+            value = int.from_bytes(token_view[bpr + 4:bpr + size], "little")
+            data[offset:offset + length] = bytes((value,)) * length
+        else:
+            data[offset:offset + size] = token_view[bpr:bpr + size]
+        bpr += size
+
+
+def create_block_delta(source: Buffer, target: Buffer, block_size: int) -> bytes:
+    """
+    Creates a delta from source to target, made up of the size of target and each run of blocks of block_size bytes
+    that differ between them, as offset, length and data.
+    """
+    source_view = memoryview(source)
+    target_view = memoryview(target)
+    delta = bytearray(len(target_view).to_bytes(4, "little"))
+    run_start = None
+    for offset in range(0, len(target_view) + block_size, block_size):
+        if offset < len(target_view) and \
+                source_view[offset:offset + block_size] != target_view[offset:offset + block_size]:
+            if run_start is None:
+                run_start = offset
+        elif run_start is not None:
+            run = target_view[run_start:offset]
+            delta += _block_header.pack(run_start, len(run))
+            delta += run
+            run_start = None
+    return bytes(delta)
+
+
+def apply_block_delta(data: bytearray, delta: Buffer) -> None:
+    """Applies a delta created by create_block_delta onto data in place."""
+    delta_view = memoryview(delta)
+    del data[int.from_bytes(delta_view[0:4], "little"):]
+    unpack_header = _block_header.unpack_from
+    position = 4
+    while position < len(delta_view):
+        offset, length = unpack_header(delta_view, position)
+        position += 8
+        data[offset:offset + length] = delta_view[position:position + length]
+        position += length
@@ -8,10 +8,14 @@ import zipimport
 import time
 import dataclasses
 import json
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Type, TypedDict
 
-from NetUtils import DataPackage
-from Utils import local_path, user_path, Version, version_tuple, tuplize_version
+from NetUtils import DataPackage, GamesPackage
+from Utils import local_path, user_path, Version, version_tuple, tuplize_version, __version__, \
+    load_data_package_for_checksum, store_data_package_for_checksum
+
+if TYPE_CHECKING:
+    from .AutoWorld import World
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -27,6 +31,8 @@ __all__ = {
     "local_folder",
     "user_folder",
     "failed_world_loads",
+    "load_worlds",
+    "write_world_manifest",
 }
 
 
@@ -40,6 +46,7 @@ class WorldSource:
     relative: bool = True  # relative to regular world import folder
     time_taken: float = -1.0
     version: Version = Version(0, 0, 0)
+    load_attempted: bool = dataclasses.field(default=False, compare=False)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
@@ -51,6 +58,7 @@ class WorldSource:
         return self.path
 
     def load(self) -> bool:
+        self.load_attempted = True
         try:
             start = time.perf_counter()
             if self.is_zip:
@@ -85,38 +93,133 @@ class WorldSource:
 
 
 # find potential world containers, currently folders and zip-importable .apworld's
-world_sources: List[WorldSource] = []
-for folder in (folder for folder in (user_folder, local_folder) if folder):
-    relative = folder == local_folder
+def _scan_world_sources(folder: str, relative: bool) -> List[WorldSource]:
+    found: List[WorldSource] = []
     for entry in os.scandir(folder):
         # prevent loading of __pycache__ and allow _* for non-world folders, disable files/folders starting with "."
         if not entry.name.startswith(("_", ".")):
             file_name = entry.name if relative else os.path.join(folder, entry.name)
             if entry.is_dir():
                 if os.path.isfile(os.path.join(entry.path, '__init__.py')):
-                    world_sources.append(WorldSource(file_name, relative=relative))
+                    found.append(WorldSource(file_name, relative=relative))
                 elif os.path.isfile(os.path.join(entry.path, '__init__.pyc')):
-                    world_sources.append(WorldSource(file_name, relative=relative))
+                    found.append(WorldSource(file_name, relative=relative))
                 else:
                     logging.warning(f"excluding {entry.name} from world sources because it has no __init__.py")
             elif entry.is_file() and entry.name.endswith(".apworld"):
-                world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
+                found.append(WorldSource(file_name, is_zip=True, relative=relative))
+    return found
+
 
-# import all submodules to trigger AutoWorldRegister
+world_sources: List[WorldSource] = []
+for folder in (folder for folder in (user_folder, local_folder) if folder):
+    world_sources.extend(_scan_world_sources(folder, folder == local_folder))
 world_sources.sort()
-apworlds: list[WorldSource] = []
-for world_source in world_sources:
-    # load all loose files first:
-    if world_source.is_zip:
-        apworlds.append(world_source)
-    else:
-        world_source.load()
 
 
-from .AutoWorld import AutoWorldRegister
+class WorldManifestGame(TypedDict):
+    module: str
+    world_version: str
+    checksum: str  # of its data package, which gets cached by checksum
+    options: Dict[str, str]  # option name to qualified name of its class
+
+
+class WorldManifestSource(TypedDict):
+    signature: List[int]  # changes when any file of the source does
+    games: Dict[str, WorldManifestGame]
+
+
+class WorldManifest(TypedDict):
+    version: str
+    sources: Dict[str, WorldManifestSource]  # by WorldSource.path
+
+
+# The world manifest records which games each world source provides, so that with lazy world loading only the
+# sources of the games that are actually used get imported, and which data packages they have, so that those can be
+# read from the data package cache instead of being built. setup.py ships one with the worlds it builds.
+world_manifest_path = os.path.join(local_folder, "_world_manifest.json")
+lazy_world_loading = os.environ.get("LAZY_WORLD_LOADING", "").lower() in ("1", "true", "yes")
+
+
+def _read_world_manifest(path: str) -> WorldManifest:
+    try:
+        with open(path, encoding="utf-8") as manifest_file:
+            manifest: WorldManifest = json.load(manifest_file)
+        if manifest["version"] == __version__:
+            return manifest
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"Ignoring invalid world manifest {path}: {e}")
+    return {"version": __version__, "sources": {}}
+
+
+world_manifest: WorldManifest = _read_world_manifest(world_manifest_path)
+
+
+def _source_signature(path: str, is_zip: bool) -> List[int]:
+    if is_zip:
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+    file_count = total_size = latest_change = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = [dirname for dirname in dirnames if dirname != "__pycache__"]
+        for filename in filenames:
+            stat = os.stat(os.path.join(dirpath, filename))
+            file_count += 1
+            total_size += stat.st_size
+            latest_change = max(latest_change, stat.st_mtime_ns)
+    return [file_count, total_size, latest_change]
+
+
+def _source_games(source_path: str) -> Dict[str, WorldManifestGame]:
+    module_name = os.path.basename(source_path)
+    if module_name.endswith(".apworld"):
+        module_name = module_name.rsplit(".", 1)[0]
+    module = f"worlds.{module_name}"
+    return {
+        game: {
+            "module": world.__module__,
+            "world_version": world.world_version.as_simple_string(),
+            "checksum": network_data_package["games"][game]["checksum"],
+            "options": {name: f"{option.__module__}.{option.__qualname__}"
+                        for name, option in world.options_dataclass.type_hints.items()},
+        }
+        for game, world in AutoWorldRegister.world_types.items()
+        if world.__module__ == module or world.__module__.startswith(module + ".")
+    }
+
+
+def write_world_manifest(folder: str = local_folder, path: Optional[str] = None) -> None:
+    """
+    Write the world manifest of the world sources in folder, from the loaded worlds.
 
-for world_source in world_sources:
-    if not world_source.is_zip:
+    :param folder: Folder of the world sources, setup.py passes the worlds folder of the build.
+    :param path: Where to write the manifest to, defaults to the manifest in folder.
+    """
+    manifest: WorldManifest = {"version": __version__, "sources": {}}
+    for world_source in _scan_world_sources(folder, True):
+        games = _source_games(world_source.path)
+        if games:
+            manifest["sources"][world_source.path] = {
+                "signature": _source_signature(os.path.join(folder, world_source.path), world_source.is_zip),
+                "games": games,
+            }
+    _save_world_manifest(manifest, path or os.path.join(folder, "_world_manifest.json"))
+
+
+def _save_world_manifest(manifest: WorldManifest, path: str) -> None:
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(temp_path, path)
+    except OSError as e:  # can't write to an installation folder, lazy loading then has to load unknown worlds
+        logging.debug(f"Could not write world manifest {path}: {e}")
+
+
+def _apply_world_versions(sources: List[WorldSource]) -> None:
+    for world_source in sources:
         # look for manifest
         manifest = {}
         for dirpath, dirnames, filenames in os.walk(world_source.resolved_path):
@@ -131,68 +234,158 @@ for world_source in world_sources:
         if game in AutoWorldRegister.world_types:
             AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
 
-if apworlds:
-    # encapsulation for namespace / gc purposes
-    def load_apworlds() -> None:
-        global apworlds
-        from .Files import APWorldContainer, InvalidDataError
-        core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
-
-        def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
-            if add_as_failed_to_load:
-                failed_world_loads.append(game_name)
-            logging.warning(reason)
-
-        for apworld_source in apworlds:
-            apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
-            # populate metadata
-            try:
-                apworld.read()
-            except InvalidDataError as e:
-                if version_tuple < (0, 7, 0):
-                    logging.error(
-                        f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
-                        "This apworld will stop working with Archipelago 0.7.0."
-                    )
-                    logging.error(e)
-                else:
-                    raise e
-
-            if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its minimum core version {apworld.minimum_ap_version} "
-                           f"is higher than current core version {version_tuple}.")
-            elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its maximum core version {apworld.maximum_ap_version} "
-                           f"is lower than current core version {version_tuple}.")
-            else:
-                core_compatible.append((apworld_source, apworld))
-        # load highest version first
-        core_compatible.sort(
-            key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
-            reverse=True)
-        for apworld_source, apworld in core_compatible:
-            if apworld.game and apworld.game in AutoWorldRegister.world_types:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its game {apworld.game} is already loaded.",
-                           add_as_failed_to_load=False)
+
+def _load_apworlds(apworlds: List[WorldSource]) -> None:
+    from .Files import APWorldContainer, InvalidDataError
+    core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
+
+    def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
+        if add_as_failed_to_load:
+            failed_world_loads.append(game_name)
+        logging.warning(reason)
+
+    for apworld_source in apworlds:
+        apworld_source.load_attempted = True
+        apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
+        # populate metadata
+        try:
+            apworld.read()
+        except InvalidDataError as e:
+            if version_tuple < (0, 7, 0):
+                logging.error(
+                    f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
+                    "This apworld will stop working with Archipelago 0.7.0."
+                )
+                logging.error(e)
             else:
-                apworld_source.load()
-                if apworld.game in AutoWorldRegister.world_types:
-                    # world could fail to load at this point
-                    if apworld.world_version:
-                        AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
-    load_apworlds()
-    del load_apworlds
+                raise e
+
+        if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
+            fail_world(apworld.game,
+                       f"Did not load {apworld_source.path} "
+                       f"as its minimum core version {apworld.minimum_ap_version} "
+                       f"is higher than current core version {version_tuple}.")
+        elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
+            fail_world(apworld.game,
+                       f"Did not load {apworld_source.path} "
+                       f"as its maximum core version {apworld.maximum_ap_version} "
+                       f"is lower than current core version {version_tuple}.")
+        else:
+            core_compatible.append((apworld_source, apworld))
+    # load highest version first
+    core_compatible.sort(
+        key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
+        reverse=True)
+    for apworld_source, apworld in core_compatible:
+        if apworld.game and apworld.game in AutoWorldRegister.world_types:
+            fail_world(apworld.game,
+                       f"Did not load {apworld_source.path} "
+                       f"as its game {apworld.game} is already loaded.",
+                       add_as_failed_to_load=False)
+        else:
+            apworld_source.load()
+            if apworld.game in AutoWorldRegister.world_types:
+                # world could fail to load at this point
+                if apworld.world_version:
+                    AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
+
+
+def load_worlds(games: Optional[Iterable[str]] = None) -> None:
+    """
+    Load the world sources providing games, or all of them if games is None. Sources that were loaded before are
+    skipped, so this is cheap to call again. Only lazy world loading needs this, otherwise all worlds get loaded
+    on import. Sources missing from the world manifest, or changed since it was written, are always loaded.
+    """
+    candidates = [world_source for world_source in world_sources if not world_source.load_attempted]
+    if not candidates:
+        return
+    signatures: Dict[str, List[int]] = {}
+    if games is not None:
+        known_games = {game for manifest_source in world_manifest["sources"].values()
+                       for game in manifest_source["games"]}
+        wanted = ({"Archipelago"} | set(games)) - set(AutoWorldRegister.world_types)
+        if not wanted & known_games and all(world_source.path in world_manifest["sources"]
+                                            for world_source in candidates):
+            return
 
-del apworlds
+        def is_wanted(world_source: WorldSource) -> bool:
+            manifest_source = world_manifest["sources"].get(world_source.path)
+            if manifest_source is None:
+                return True
+            signatures[world_source.path] = _source_signature(world_source.resolved_path, world_source.is_zip)
+            return manifest_source["signature"] != signatures[world_source.path] or \
+                not wanted.isdisjoint(manifest_source["games"])
+
+        candidates = [world_source for world_source in candidates if is_wanted(world_source)]
+
+    # load all loose files first:
+    loose_sources = [world_source for world_source in candidates if not world_source.is_zip]
+    for world_source in loose_sources:
+        world_source.load()
+    _apply_world_versions(loose_sources)
+    apworlds = [world_source for world_source in candidates if world_source.is_zip]
+    if apworlds:
+        _load_apworlds(apworlds)
+
+    # the manifest only vouches for the data packages of sources that did not change since it was written
+    unchanged_games: Dict[str, WorldManifestGame] = {}
+    for world_source in candidates:
+        if world_source.path not in signatures:
+            signatures[world_source.path] = _source_signature(world_source.resolved_path, world_source.is_zip)
+        manifest_source = world_manifest["sources"].get(world_source.path)
+        if manifest_source and manifest_source["signature"] == signatures[world_source.path]:
+            unchanged_games.update(manifest_source["games"])
+
+    # Build the data package for each game.
+    for world_name, world in AutoWorldRegister.world_types.items():
+        if world_name not in network_data_package["games"]:
+            manifest_game = unchanged_games.get(world_name)
+            cached_checksum = manifest_game["checksum"] if manifest_game and \
+                manifest_game["world_version"] == world.world_version.as_simple_string() else None
+            network_data_package["games"][world_name] = _get_data_package(world_name, world, cached_checksum)
+
+    # remember which games the loaded sources provide, so lazy world loading can skip them and their data packages
+    # can be found in the cache next time. Otherwise, the manifest is only written by setup.py.
+    if not lazy_world_loading:
+        return
+    changed = False
+    for world_source in candidates:
+        games_of_source = _source_games(world_source.path)
+        manifest_source = world_manifest["sources"].get(world_source.path)
+        if games_of_source:
+            new_source: WorldManifestSource = {"signature": signatures[world_source.path], "games": games_of_source}
+            if manifest_source != new_source:
+                world_manifest["sources"][world_source.path] = new_source
+                changed = True
+        elif manifest_source is not None:
+            del world_manifest["sources"][world_source.path]
+            changed = True
+    if changed:
+        _save_world_manifest(world_manifest, world_manifest_path)
+
+
+def _get_data_package(game: str, world: "Type[World]", cached_checksum: Optional[str]) -> GamesPackage:
+    """Reads the data package of game from the data package cache if cached_checksum is given, otherwise builds it."""
+    if cached_checksum:
+        data_package = load_data_package_for_checksum(game, cached_checksum)
+        # ids can come from installed packages instead of the world's source, so don't trust the checksum alone
+        if data_package.get("checksum") == cached_checksum and \
+                data_package.get("item_name_to_id") == world.item_name_to_id and \
+                data_package.get("location_name_to_id") == world.location_name_to_id:
+            return data_package
+    data_package = world.get_data_package_data()
+    try:
+        store_data_package_for_checksum(game, data_package)
+    except OSError as e:
+        logging.debug(f"Could not cache data package of {game}: {e}")
+    return data_package
+
+
+from .AutoWorld import AutoWorldRegister
 
-# Build the data package for each game.
 network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
+    "games": {},
 }
 
+# import submodules to trigger AutoWorldRegister, with lazy world loading only the generic world and unknown worlds
+load_worlds(() if lazy_world_loading else None)
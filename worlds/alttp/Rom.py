@@ -23,6 +23,7 @@ from typing import Collection, Optional, List, SupportsIndex
 
 from BaseClasses import CollectionState, Region, Location, MultiWorld
 from Utils import local_path, user_path, int16_as_bytes, int32_as_bytes, snes_to_pc, is_frozen, parse_yaml, read_snes_rom
+from worlds.RomBuffer import snes_checksum
 
 from .Shops import ShopType, ShopPriceType
 from .Dungeons import dungeon_music_addresses
@@ -152,7 +153,7 @@ class LocalRom:
         raise RuntimeError('Base patch unverified.  Unable to continue.')
 
     def write_crc(self):
-        crc = (sum(self.buffer[:0x7FDC] + self.buffer[0x7FE0:]) + 0x01FE) & 0xFFFF
+        crc = snes_checksum(self.buffer)
         inv = crc ^ 0xFFFF
         self.write_bytes(0x7FDC, [inv & 0xFF, (inv >> 8) & 0xFF, crc & 0xFF, (crc >> 8) & 0xFF])
 